@@ -8,33 +8,84 @@ process until shutdown.
 
 from __future__ import annotations
 
+import argparse
 import json
 import multiprocessing as mp
 import sys
 import os
+import time
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generic Concurrent Real-Time Pipeline")
+    parser.add_argument(
+        "--config", default=os.path.join(os.path.dirname(__file__), "config.json"),
+        help="Path to the pipeline config (default: config.json next to main.py).")
+    parser.add_argument(
+        "--supervise", metavar="SUPERVISOR_CONFIG", default=None,
+        help="Run every tenant config listed in this file on one shared worker pool.")
+    parser.add_argument(
+        "--replay", action="store_true",
+        help="Show the dashboard from the stream journal instead of running the pipeline.")
+    parser.add_argument(
+        "--replay-offset", type=int, default=0,
+        help="Journal record offset to start the replay from.")
+    parser.add_argument(
+        "--replay-since", type=float, default=None,
+        help="Only replay records whose time field is at least this value.")
+    return parser.parse_args()
+
+
+def _mp_context(dynamics: dict):
+    """Return the multiprocessing context for pipeline_dynamics.start_method."""
+    method = dynamics.get("start_method", "default")
+    if method == "default":
+        return mp.get_context()
+    ctx = mp.get_context(method)
+    if method == "forkserver":
+        # Preload only what the stage processes need; matplotlib never enters the server.
+        ctx.set_forkserver_preload(["modules.input_module", "modules.core_module"])
+    return ctx
+
+
+def _mark(marks: list, phase: str) -> None:
+    marks.append((phase, time.perf_counter()))
+
+
+def _print_startup(marks: list) -> None:
+    parts = [f"{phase}={(t - prev) * 1000:.0f}ms"
+             for (_, prev), (phase, t) in zip(marks, marks[1:])]
+    total = (marks[-1][1] - marks[0][1]) * 1000
+    print(f"[Main] Startup phases: {', '.join(parts)} (total={total:.0f}ms)")
 
 
 def main() -> None:
+    marks: list = []
+    _mark(marks, "start")
+
     # Import here so multiprocessing startup stays safe across platforms.
+    # The dashboard (and matplotlib with it) is imported only once the queues exist.
     from modules.input_module import InputModule
     from modules.core_module import CoreWorker, Aggregator
-    from modules.output_module import Dashboard
-    from modules.pipeline_telemetry import PipelineTelemetry
+    from modules.pipeline_telemetry import PipelineTelemetry, stage_counters
+    _mark(marks, "imports")
 
-    config_path = os.path.join(os.path.dirname(__file__), "config.json")
-    try:
-        with open(config_path, encoding="utf-8") as fh:
-            config: dict = json.load(fh)
-    except FileNotFoundError:
-        print(f"[Main] ERROR: config.json not found at '{config_path}'", file=sys.stderr)
-        sys.exit(1)
-    except json.JSONDecodeError as exc:
-        print(f"[Main] ERROR: Malformed config.json — {exc}", file=sys.stderr)
-        sys.exit(1)
+    args = _parse_args()
+    if args.supervise:
+        _supervise(args.supervise)
+        return
+    config: dict = _load_json(args.config)
 
     dynamics     = config["pipeline_dynamics"]
     parallelism  = int(dynamics["core_parallelism"])
     max_size     = int(dynamics["stream_queue_max_size"])
+    dispatch_mode = dynamics.get("dispatch_mode", "shared")
+    ctx = _mp_context(dynamics)
+    _mark(marks, "config")
+
+    if args.replay:
+        _replay(config, ctx, max_size, args.replay_offset, args.replay_since)
+        return
 
     print("=" * 60)
     print("  Generic Concurrent Real-Time Pipeline")
@@ -43,21 +94,45 @@ def main() -> None:
     print(f"  Core parallelism: {parallelism} workers")
     print(f"  Queue max size  : {max_size}")
     print(f"  Input delay     : {dynamics['input_delay_seconds']} s/packet")
+    print(f"  Dispatch mode   : {dispatch_mode}")
+    print(f"  Start method    : {ctx.get_start_method()}")
     print("=" * 60)
 
-    raw_queue          = mp.Queue(maxsize=max_size)
-    intermediate_queue = mp.Queue(maxsize=max_size)
-    processed_queue    = mp.Queue(maxsize=max_size)
+    intermediate_queue = ctx.Queue(maxsize=max_size)
+    processed_queue    = ctx.Queue(maxsize=max_size)
+
+    if dispatch_mode == "shared":
+        # Every worker competes for one shared raw stream.
+        raw_queue     = ctx.Queue(maxsize=max_size)
+        worker_queues = None
+    else:
+        # Each worker owns a queue of batches and steals from peers when idle.
+        raw_queue     = None
+        worker_queues = [ctx.Queue(maxsize=max_size) for _ in range(parallelism)]
 
-    input_proc = InputModule(config, raw_queue)
+    # Shared counters that stage processes update and telemetry reports.
+    counters, state_counters = stage_counters(config, ctx)
+
+    input_proc = InputModule(
+        config, raw_queue, worker_queues=worker_queues,
+        duplicate_counter=counters.get("duplicates_suppressed"),
+    )
 
     core_workers = [
-        CoreWorker(config, raw_queue, intermediate_queue, worker_id=i)
+        CoreWorker(
+            config,
+            raw_queue if worker_queues is None else worker_queues[i],
+            intermediate_queue,
+            worker_id=i,
+            peer_queues=worker_queues,
+        )
         for i in range(parallelism)
     ]
 
     aggregator   = Aggregator(
-        config, intermediate_queue, processed_queue, num_workers=parallelism
+        config, intermediate_queue, processed_queue, num_workers=parallelism,
+        state_counters=state_counters,
+        alert_counter=counters.get("alerts_raised"),
     )
 
     telemetry = PipelineTelemetry(
@@ -65,14 +140,38 @@ def main() -> None:
         intermediate_queue,
         processed_queue,
         max_size,
+        worker_queues=worker_queues,
     )
+    for name, shared_value in counters.items():
+        telemetry.register_counter(name, shared_value)
 
-    # Dashboard subscribes to telemetry inside its constructor.
-    dashboard = Dashboard(config, processed_queue, telemetry)
+    # With broadcasting on, the dashboard becomes one subscriber among several.
+    dashboard_stream = processed_queue
+    subscriber_runners: list = []
+    broadcaster = None
+    broadcast_cfg = config.get("broadcast", {})
+    if broadcast_cfg.get("enabled"):
+        from modules.stream_broadcast import StreamBroadcaster, subscribe_configured
+        broadcaster = StreamBroadcaster(ctx, processed_queue)
+        dash_cfg = broadcast_cfg.get("dashboard", {})
+        dashboard_stream = broadcaster.subscribe(
+            "dashboard",
+            policy=dash_cfg.get("policy", "drop_oldest"),
+            max_size=int(dash_cfg.get("max_size", max_size)),
+            sample_every=int(dash_cfg.get("sample_every", 10)),
+        )
+        try:
+            subscriber_runners = subscribe_configured(broadcaster, broadcast_cfg, max_size)
+        except ValueError as exc:
+            print(f"[Main] ERROR: {exc}", file=sys.stderr)
+            sys.exit(1)
+        for subscription in broadcaster.subscriptions:
+            telemetry.register_subscription(subscription)
+    _mark(marks, "queues")
 
     worker_procs = []
 
-    input_process = mp.Process(
+    input_process = ctx.Process(
         target=input_proc.run,
         name="InputProcess",
         daemon=True,
@@ -80,25 +179,48 @@ def main() -> None:
     worker_procs.append(input_process)
 
     for worker in core_workers:
-        p = mp.Process(
+        p = ctx.Process(
             target=worker.run,
             name=f"CoreWorker-{worker._worker_id}",
             daemon=True,
         )
         worker_procs.append(p)
 
-    agg_process = mp.Process(
+    agg_process = ctx.Process(
         target=aggregator.run,
         name="Aggregator",
         daemon=True,
     )
     worker_procs.append(agg_process)
 
+    if broadcaster is not None:
+        worker_procs.append(ctx.Process(
+            target=broadcaster.run,
+            name="StreamBroadcaster",
+            daemon=True,
+        ))
+        for runner in subscriber_runners:
+            worker_procs.append(ctx.Process(
+                target=runner.run,
+                name=f"Subscriber-{runner._subscription.name}",
+                daemon=True,
+            ))
+
+    # The dashboard is built before the stages start. Building the figure while four PBKDF2
+    # workers already run delays the first drawn packet, with fork and forkserver alike.
+    print("[Main] Launching dashboard ...")
+    from modules.output_module import Dashboard
+
+    # Dashboard subscribes to telemetry inside its constructor.
+    dashboard = Dashboard(config, dashboard_stream, telemetry, started_at=marks[0][1])
+    _mark(marks, "dashboard")
+
     for proc in worker_procs:
         proc.start()
         print(f"[Main] Started: {proc.name}  (pid={proc.pid})")
 
-    print("[Main] All workers running — launching dashboard ...")
+    _mark(marks, "workers")
+    _print_startup(marks)
 
     # Matplotlib UI must run on the main thread.
     try:
@@ -114,5 +236,73 @@ def main() -> None:
     print("[Main] Pipeline shutdown complete.")
 
 
+def _load_json(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        print(f"[Main] ERROR: Config not found at '{path}'", file=sys.stderr)
+        sys.exit(1)
+    except json.JSONDecodeError as exc:
+        print(f"[Main] ERROR: Malformed config '{path}' — {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _supervise(supervisor_path: str) -> None:
+    """Run several pipeline configs as tenants of one shared verification pool."""
+    from modules.supervisor import Supervisor
+
+    supervisor_cfg = _load_json(supervisor_path)
+    base_dir = os.path.dirname(os.path.abspath(supervisor_path))
+    # Tenant config paths are relative to the supervisor file.
+    tenant_configs = [_load_json(os.path.join(base_dir, tenant["config"]))
+                      for tenant in supervisor_cfg["tenants"]]
+
+    print("=" * 60)
+    print("  Generic Concurrent Real-Time Pipeline — Supervisor")
+    print("=" * 60)
+    for tenant in supervisor_cfg["tenants"]:
+        print(f"  {tenant['name']:<16}: {tenant['config']} (weight {tenant.get('weight', 1)})")
+    print(f"  Shared workers  : {supervisor_cfg.get('pool_size', 4)}")
+    print("=" * 60)
+
+    Supervisor(supervisor_cfg, tenant_configs, _mp_context(supervisor_cfg)).run()
+    print("[Main] Supervisor shutdown complete.")
+
+
+def _replay(config: dict, ctx, max_size: int, offset: int, since) -> None:
+    """Feed the dashboard from the journal so no PBKDF2 work is repeated."""
+    from modules.stream_journal import JournalReader
+    from modules.output_module import Dashboard
+    from modules.pipeline_telemetry import PipelineTelemetry
+
+    directory = config.get("journal", {}).get("directory", "journal")
+    if not os.path.isdir(directory):
+        print(f"[Main] ERROR: No journal found at '{directory}'", file=sys.stderr)
+        sys.exit(1)
+
+    reader = JournalReader(directory)
+    print(f"[Main] Replaying journal '{directory}' "
+          f"({reader.total_records()} records, offset={offset}, since={since})")
+
+    processed_queue = ctx.Queue(maxsize=max_size)
+    telemetry = PipelineTelemetry(None, None, processed_queue, max_size)
+    dashboard = Dashboard(config, processed_queue, telemetry)
+
+    replay_proc = ctx.Process(
+        target=reader.replay,
+        args=(processed_queue, offset, since),
+        name="JournalReplay",
+        daemon=True,
+    )
+    replay_proc.start()
+    try:
+        dashboard.run()
+    except KeyboardInterrupt:
+        print("\n[Main] Interrupted by user.")
+    replay_proc.terminate()
+    replay_proc.join(timeout=3)
+
+
 if __name__ == "__main__":
     main()
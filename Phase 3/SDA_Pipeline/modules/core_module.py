@@ -1,4 +1,25 @@
 import hashlib
+import queue
+import time
+
+from .entity_state import EntityStateStore
+from .rollup_store import RollupStore
+from .rule_engine import RuleEngine
+from .stream_journal import StreamJournal
+
+# Marks a packet that failed verification; the Aggregator skips it but keeps its place in order.
+DROPPED_FLAG = "_dropped"
+
+# Stateless operations a CoreWorker can run; passthrough is for sources without signatures.
+STATELESS_OPERATIONS = ("verify_signature", "passthrough")
+
+# Per-entity sequence counter assigned by InputModule when ordering is "per_entity".
+ENTITY_SEQUENCE_FIELD = "_entity_sequence"
+
+# End-of-stream marker carrying the number of packets (tombstones included) the Aggregator
+# must receive before it finishes. Used when workers are shared and cannot send sentinels.
+END_OF_STREAM_FIELD = "_end_of_stream"
+
 
 def verify_signature(metric_value: float, security_hash: str, secret_key: str, iterations: int) -> bool:
     raw_value_str: str = f"{metric_value:.2f}"
@@ -24,56 +45,130 @@ class CoreWorker:
     """
     One scatter-stage worker.
     It verifies each packet signature, forwards valid packets, and drops invalid ones.
+    The passthrough operation forwards every packet for sources that carry no signature.
+    With per-worker dispatch it drains its own queue of batches and steals from the
+    busiest peer queue when it runs dry.
     """
 
-    def __init__(self, config: dict, raw_queue, intermediate_queue, worker_id: int = 0):
+    def __init__(self, config: dict, raw_queue, intermediate_queue, worker_id: int = 0,
+                 peer_queues: list = None):
         self._raw_queue = raw_queue
         self._intermediate_queue = intermediate_queue
         self._worker_id = worker_id
+        self._peer_queues = peer_queues
         stateless = config["processing"]["stateless_tasks"]
 
         op = stateless.get("operation", "verify_signature")
-        if op != "verify_signature":
+        if op not in STATELESS_OPERATIONS:
             raise ValueError(f"Unsupported stateless operation: {op}")
+        self._passthrough: bool = op == "passthrough"
 
-        algorithm = stateless.get("algorithm", "pbkdf2_hmac")
-        if algorithm != "pbkdf2_hmac":
-            raise ValueError(f"Unsupported signature algorithm: {algorithm}")
-
-        self._secret_key: str = stateless["secret_key"]
-        self._iterations: int = int(stateless["iterations"])
+        if not self._passthrough:
+            algorithm = stateless.get("algorithm", "pbkdf2_hmac")
+            if algorithm != "pbkdf2_hmac":
+                raise ValueError(f"Unsupported signature algorithm: {algorithm}")
+            self._secret_key: str = stateless["secret_key"]
+            self._iterations: int = int(stateless["iterations"])
         self._value_field: str = stateless.get("value_field", "metric_value")
         self._signature_field: str = stateless.get("signature_field", "security_hash")
+        self._steal_wait: float = float(
+            config["pipeline_dynamics"].get("steal_poll_seconds", 0.01))
+        self._verified = self._dropped = self._stolen = 0
 
     def run(self) -> None:
-        verified = dropped = 0
+        if self._peer_queues is not None:
+            self._run_dispatched()
+            return
         while True:
             packet = self._raw_queue.get()
             if packet is None:
-                self._intermediate_queue.put(None)
-                print(f"[CoreWorker-{self._worker_id}] Done. "
-                      f"Verified={verified}, Dropped={dropped}")
+                self._finish()
                 return
-            if verify_signature(
-                packet[self._value_field],
-                packet[self._signature_field],
-                self._secret_key,
-                self._iterations,
-            ):
-                self._intermediate_queue.put(packet)
-                verified += 1
-            else:
-                dropped += 1
+            self._process(packet)
+
+    def _run_dispatched(self) -> None:
+        # Peers whose sentinel we have already seen hold no more work to steal.
+        exhausted = {self._worker_id}
+        while True:
+            try:
+                batch = self._raw_queue.get_nowait()
+            except queue.Empty:
+                batch = self._steal(exhausted)
+                if batch is None:
+                    try:
+                        batch = self._raw_queue.get(timeout=self._steal_wait)
+                    except queue.Empty:
+                        continue
+            if batch is None:
+                self._finish()
+                return
+            self.process_batch(batch)
+
+    def process_batch(self, batch: list) -> None:
+        """Verify and forward a batch without taking part in queue shutdown."""
+        for packet in batch:
+            self._process(packet)
+
+    def _steal(self, exhausted: set):
+        """Take one batch from the busiest peer queue, or return None if there is none."""
+        candidates = []
+        for peer_id, peer in enumerate(self._peer_queues):
+            if peer_id in exhausted:
+                continue
+            try:
+                depth = peer.qsize()
+            except NotImplementedError:
+                depth = 1   # qsize is unavailable on some platforms; just try every peer.
+            if depth > 0:
+                candidates.append((depth, peer_id))
+        for _, peer_id in sorted(candidates, reverse=True):
+            victim = self._peer_queues[peer_id]
+            try:
+                batch = victim.get_nowait()
+            except queue.Empty:
+                continue
+            if batch is None:
+                # The sentinel is always last, so the victim has no work left. Give it back.
+                victim.put(None)
+                exhausted.add(peer_id)
+                continue
+            self._stolen += 1
+            return batch
+        return None
+
+    def _process(self, packet: dict) -> None:
+        if self._passthrough or verify_signature(
+            packet[self._value_field],
+            packet[self._signature_field],
+            self._secret_key,
+            self._iterations,
+        ):
+            self._intermediate_queue.put(packet)
+            self._verified += 1
+        else:
+            # Forward a tombstone so the Aggregator can advance past this sequence number.
+            self._intermediate_queue.put({**packet, DROPPED_FLAG: True})
+            self._dropped += 1
+
+    def _finish(self) -> None:
+        self._intermediate_queue.put(None)
+        stolen = f", StolenBatches={self._stolen}" if self._peer_queues is not None else ""
+        print(f"[CoreWorker-{self._worker_id}] Done. "
+              f"Verified={self._verified}, Dropped={self._dropped}{stolen}")
 
 class Aggregator:
     """
     Gather-stage node that restores packet order and computes running averages.
     """
 
-    def __init__(self, config: dict, intermediate_queue, processed_queue, num_workers: int):
+    def __init__(self, config: dict, intermediate_queue, processed_queue, num_workers: int,
+                 state_counters: dict = None, alert_counter=None):
         self._intermediate_queue = intermediate_queue
         self._processed_queue = processed_queue
         self._num_workers = num_workers
+        # Optional shared Values ("resident", "spilled") that telemetry reads.
+        self._state_counters = state_counters
+        self._state_cfg: dict = config.get("entity_state", {})
         stateful = config["processing"]["stateful_tasks"]
         stateless = config["processing"]["stateless_tasks"]
         self._window_size: int = int(stateful["running_average_window_size"])
@@ -83,42 +178,116 @@ class Aggregator:
         )
         self._computed_field: str = stateful.get("output_field", "computed_metric")
 
+        ordering = stateful.get("ordering", "global")
+        if ordering not in ("global", "per_entity"):
+            raise ValueError(f"Unsupported ordering mode: {ordering}")
+        self._per_entity: bool = ordering == "per_entity"
+        self._sequence_field: str = ENTITY_SEQUENCE_FIELD if self._per_entity else "_sequence"
+
+        # Optional output stages that see every emitted packet, opened inside run().
+        self._journal_cfg: dict = config.get("journal", {})
+        self._rollup_cfg: dict = dict(config.get("rollup", {}))
+        self._rollup_cfg.setdefault("entity_field", self._entity_field)
+        self._rules_cfg: dict = config.get("rules", {})
+        self._alert_counter = alert_counter
+        self._stages: list = []
+
     def run(self) -> None:
         # Mutable shell state for packet ordering and per-entity windows.
-        windows: dict = {}          # Maps each entity to its current averaging window.
-        reseq_buffer: dict = {}     # Holds out-of-order packets by sequence number.
-        next_expected: int = 0
+        # Maps each entity to its current averaging window; bounded when entity_state is enabled.
+        windows = EntityStateStore(self._state_cfg, "aggregator")
+        reseq_buffer: dict = {}     # Holds out-of-order packets by (ordering key, sequence).
+        # Next sequence number per ordering key; per-entity keys are bounded like the windows.
+        next_expected = EntityStateStore(self._state_cfg, "aggregator_sequences")
         sentinels: int = 0
         total: int = 0
+        received: int = 0
+        expected_total = None       # Set by an end-of-stream marker from a shared worker pool.
+
+        self._stages = self._open_stages()
 
         while True:
-            packet = self._intermediate_queue.get()
+            packet = self._next_packet()
 
             if packet is None:
                 sentinels += 1
                 if sentinels == self._num_workers:
                     # All workers finished; emit any buffered packets still in order.
-                    while next_expected in reseq_buffer:
-                        p = reseq_buffer.pop(next_expected)
-                        total += self._emit(p, windows)
-                        next_expected += 1
-                    self._processed_queue.put(None)
-                    print(f"[Aggregator] Done. Emitted={total}")
+                    for key in list(next_expected):
+                        total += self._release(key, next_expected, reseq_buffer, windows)
+                    self._finish(total, reseq_buffer, windows, next_expected)
                     return
                 continue
 
-            seq: int = packet["_sequence"]
-            if seq == next_expected:
-                total += self._emit(packet, windows)
-                next_expected += 1
-                while next_expected in reseq_buffer:
-                    p = reseq_buffer.pop(next_expected)
-                    total += self._emit(p, windows)
-                    next_expected += 1
+            if END_OF_STREAM_FIELD in packet:
+                # The marker can overtake packets still being verified; wait for the count.
+                expected_total = packet[END_OF_STREAM_FIELD]
             else:
-                reseq_buffer[seq] = packet
+                # Global mode orders the whole stream; per-entity mode only orders within an entity.
+                key = (packet.get(self._entity_field, "__global__")
+                       if self._per_entity else "__global__")
+                reseq_buffer[(key, packet[self._sequence_field])] = packet
+                total += self._release(key, next_expected, reseq_buffer, windows)
+                received += 1
+            if expected_total is not None and received >= expected_total:
+                self._finish(total, reseq_buffer, windows, next_expected)
+                return
+
+    def _next_packet(self):
+        # Stages with time-based output (the rule engine's open batch) report a due time;
+        # while the queue stays idle past it they are polled so nothing waits for the next packet.
+        while True:
+            due = [stage.due() for stage in self._stages if hasattr(stage, "due")]
+            due = [deadline for deadline in due if deadline is not None]
+            if not due:
+                return self._intermediate_queue.get()
+            try:
+                return self._intermediate_queue.get(timeout=max(min(due) - time.monotonic(), 0))
+            except queue.Empty:
+                for stage in self._stages:
+                    if hasattr(stage, "poll"):
+                        stage.poll()
+
+    def _finish(self, total: int, reseq_buffer: dict, windows: EntityStateStore,
+                next_expected: EntityStateStore) -> None:
+        for stage in self._stages:
+            stage.close()
+        self._processed_queue.put(None)
+        print(f"[Aggregator] Done. Emitted={total}, "
+              f"Unreleased={len(reseq_buffer)}, "
+              f"ResidentEntities={windows.resident_count}, "
+              f"SpilledEntities={windows.spilled_count}")
+        windows.close()
+        next_expected.close()
+
+    def _open_stages(self) -> list:
+        # Stages are created here so their file handles belong to the Aggregator process.
+        stages = []
+        if self._journal_cfg.get("enabled"):
+            journal = StreamJournal(self._journal_cfg)
+            journal.open()
+            stages.append(journal)
+        if self._rollup_cfg.get("enabled"):
+            stages.append(RollupStore(self._rollup_cfg))
+        if self._rules_cfg.get("enabled"):
+            stages.append(RuleEngine(self._rules_cfg, self._entity_field,
+                                     self._state_cfg, self._alert_counter))
+        return stages
+
+    def _release(self, key, next_expected: EntityStateStore, reseq_buffer: dict,
+                 windows: EntityStateStore) -> int:
+        """Emit every buffered packet that is contiguous with the key's next expected sequence."""
+        expected = next_expected.get(key, 0)
+        emitted = 0
+        while (key, expected) in reseq_buffer:
+            emitted += self._emit(reseq_buffer.pop((key, expected)), windows)
+            expected += 1
+        next_expected[key] = expected
+        return emitted
 
-    def _emit(self, packet: dict, windows: dict) -> int:
+    def _emit(self, packet: dict, windows: EntityStateStore) -> int:
+        if packet.get(DROPPED_FLAG):
+            return 0
         entity = packet.get(self._entity_field, "__global__")
         if entity not in windows:
             windows[entity] = []
@@ -127,7 +296,12 @@ class Aggregator:
             windows[entity], packet[self._value_field], self._window_size
         )
         windows[entity] = new_window
+        if self._state_counters is not None:
+            self._state_counters["resident"].value = windows.resident_count
+            self._state_counters["spilled"].value = windows.spilled_count
         out = dict(packet)
         out[self._computed_field] = avg
+        for stage in self._stages:
+            stage.append(out)
         self._processed_queue.put(out)
         return 1
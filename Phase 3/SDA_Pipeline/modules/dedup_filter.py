@@ -0,0 +1,123 @@
+"""
+Duplicate suppression for retried deliveries.
+
+A small exact set of recently seen keys catches back-to-back retries with no
+error. Older keys fall through to a scalable Bloom filter that adds slices as
+it fills, so memory grows with the stream while the false-positive rate stays
+bounded. A false positive drops one genuine reading; a duplicate only gets
+through once its key has aged out of the memory cap.
+"""
+
+import hashlib
+import math
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter using double hashing over one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        bits = math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self._num_bits = max(bits, 8)
+        self._num_hashes = max(1, round(self._num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self._num_bits + 7) // 8)
+        self.count = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._num_bits for i in range(self._num_hashes)]
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: bytes) -> None:
+        for p in self._positions(key):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """
+    Chain of Bloom filters that grows by growth_factor when the newest slice fills.
+    Each new slice gets a tighter error rate so the compound rate stays near error_rate.
+    Once max_bytes is reached the oldest slice is recycled, so its keys are forgotten.
+    """
+
+    _TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int, error_rate: float,
+                 growth_factor: int = 2, max_bytes: int = None):
+        self._initial_capacity = initial_capacity
+        self._error_rate = error_rate
+        self._growth_factor = growth_factor
+        self._max_bytes = max_bytes
+        self._slices: list = []
+        self._add_slice()
+        # Recycling never goes below one slice, so the first one alone must fit the cap.
+        if max_bytes is not None and self.size_bytes > max_bytes:
+            raise ValueError(f"max_memory_bytes={max_bytes} is smaller than the first Bloom slice "
+                             f"({self.size_bytes} bytes); lower initial_capacity or raise the cap")
+
+    def _add_slice(self) -> None:
+        n = len(self._slices)
+        capacity = self._initial_capacity * (self._growth_factor ** n)
+        error = self._error_rate * (1 - self._TIGHTENING) * (self._TIGHTENING ** n)
+        new_slice = BloomFilter(capacity, error)
+        if (self._max_bytes is not None and self._slices
+                and self.size_bytes + new_slice.size_bytes > self._max_bytes):
+            # At the memory cap: stop growing and reuse the oldest slice's budget instead.
+            oldest = self._slices.pop(0)
+            new_slice = BloomFilter(oldest.capacity, oldest.error_rate)
+        self._slices.append(new_slice)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(s.size_bytes for s in self._slices)
+
+    def __contains__(self, key: bytes) -> bool:
+        return any(key in s for s in reversed(self._slices))
+
+    def add(self, key: bytes) -> None:
+        if self._slices[-1].count >= self._slices[-1].capacity:
+            self._add_slice()
+        self._slices[-1].add(key)
+
+
+class DuplicateSuppressor:
+    """Answers "was this key seen before?" and records it either way."""
+
+    def __init__(self, dedup_cfg: dict):
+        self._key_fields: list = dedup_cfg.get("key_fields", ["entity_name", "time_period"])
+        self._recent_size: int = int(dedup_cfg.get("exact_recent_size", 4096))
+        self._recent: OrderedDict = OrderedDict()
+        self._bloom = ScalableBloomFilter(
+            initial_capacity=int(dedup_cfg.get("initial_capacity", 100000)),
+            error_rate=float(dedup_cfg.get("error_rate", 0.001)),
+            growth_factor=int(dedup_cfg.get("growth_factor", 2)),
+            max_bytes=dedup_cfg.get("max_memory_bytes"),
+        )
+
+    def key_for(self, packet: dict) -> bytes:
+        return "\x1f".join(str(packet.get(f)) for f in self._key_fields).encode("utf-8")
+
+    def is_duplicate(self, packet: dict) -> bool:
+        key = self.key_for(packet)
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return True
+        if key in self._bloom:
+            return True
+        self._bloom.add(key)
+        self._recent[key] = None
+        if len(self._recent) > self._recent_size:
+            self._recent.popitem(last=False)
+        return False
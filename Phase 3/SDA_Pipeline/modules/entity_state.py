@@ -0,0 +1,144 @@
+"""
+Bounded per-entity state with idle TTL and LRU spill-to-disk.
+
+Both the Aggregator (averaging windows) and the Dashboard (plot buffers) keep
+one piece of state per entity. With high-cardinality device ids that grows
+without bound, so this mapping keeps at most max_resident_entities in memory,
+moves entities idle for longer than idle_ttl_seconds (or the least recently
+used ones) to a SQLite file, and loads them back transparently on next access.
+"""
+
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class EntityStateStore(MutableMapping):
+    def __init__(self, state_cfg: dict, name: str):
+        enabled = bool(state_cfg.get("enabled"))
+        max_resident = state_cfg.get("max_resident_entities") if enabled else None
+        ttl = state_cfg.get("idle_ttl_seconds") if enabled else None
+        self._max_resident = int(max_resident) if max_resident is not None else None
+        self._ttl = float(ttl) if ttl is not None else None
+        if self._max_resident is not None and self._max_resident < 1:
+            raise ValueError("entity_state.max_resident_entities must be at least 1")
+        if self._ttl is not None and self._ttl <= 0:
+            raise ValueError("entity_state.idle_ttl_seconds must be greater than 0")
+        self._spill_path = os.path.join(
+            state_cfg.get("spill_directory", "entity_state"), f"{name}.sqlite")
+
+        self._resident: OrderedDict = OrderedDict()    # Least recently used first.
+        self._last_access: dict = {}
+        self._db = None
+        self._spilled: int = 0
+
+    @property
+    def resident_count(self) -> int:
+        return len(self._resident)
+
+    @property
+    def spilled_count(self) -> int:
+        return self._spilled
+
+    def resident_items(self):
+        """Iterate resident entities only, without touching disk or LRU order."""
+        return self._resident.items()
+
+    def _connection(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self._spill_path) or ".", exist_ok=True)
+            # Spilled state belongs to this run only; start from an empty file.
+            if os.path.exists(self._spill_path):
+                os.remove(self._spill_path)
+            self._db = sqlite3.connect(self._spill_path)
+            self._db.execute("CREATE TABLE state (entity TEXT PRIMARY KEY, value BLOB)")
+        return self._db
+
+    def _touch(self, key) -> None:
+        self._resident.move_to_end(key)
+        self._last_access[key] = time.monotonic()
+
+    def _load_spilled(self, key):
+        if not self._spilled:
+            return None
+        db = self._connection()
+        row = db.execute("SELECT value FROM state WHERE entity = ?", (str(key),)).fetchone()
+        if row is None:
+            return None
+        db.execute("DELETE FROM state WHERE entity = ?", (str(key),))
+        self._spilled -= 1
+        return pickle.loads(row[0])
+
+    def _spill(self, key) -> None:
+        value = self._resident.pop(key)
+        del self._last_access[key]
+        self._connection().execute(
+            "INSERT OR REPLACE INTO state (entity, value) VALUES (?, ?)",
+            (str(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._spilled += 1
+
+    def _evict(self, keep) -> None:
+        """Spill idle and excess entities, never `keep`, the key the caller just touched."""
+        # `keep` was touched last, so it is the newest entry and every scan stops at it.
+        if self._ttl is not None:
+            cutoff = time.monotonic() - self._ttl
+            while self._resident:
+                oldest = next(iter(self._resident))
+                if oldest == keep or self._last_access[oldest] > cutoff:
+                    break
+                self._spill(oldest)
+        if self._max_resident is not None:
+            while len(self._resident) > self._max_resident:
+                oldest = next(iter(self._resident))
+                if oldest == keep:
+                    break
+                self._spill(oldest)
+
+    def __contains__(self, key) -> bool:
+        if key in self._resident:
+            return True
+        value = self._load_spilled(key)
+        if value is None:
+            return False
+        # Rehydrate now; the caller is about to use this entity.
+        self._resident[key] = value
+        self._touch(key)
+        self._evict(key)
+        return True
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._touch(key)
+        return self._resident[key]
+
+    def __setitem__(self, key, value) -> None:
+        if key not in self._resident:
+            self._load_spilled(key)     # Discard any stale spilled copy.
+        self._resident[key] = value
+        self._touch(key)
+        self._evict(key)
+
+    def __delitem__(self, key) -> None:
+        if key in self._resident:
+            del self._resident[key]
+            del self._last_access[key]
+        elif self._load_spilled(key) is None:
+            raise KeyError(key)
+
+    def __iter__(self):
+        yield from list(self._resident)
+        if self._spilled:
+            for (entity,) in self._connection().execute("SELECT entity FROM state"):
+                yield entity
+
+    def __len__(self) -> int:
+        return len(self._resident) + self._spilled
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,27 +1,192 @@
 
 import csv
+import gzip
+import json
+import math
+import mmap
+import re
 import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from .core_module import ENTITY_SEQUENCE_FIELD
+from .dedup_filter import DuplicateSuppressor
+from .entity_state import EntityStateStore
+
+
+def read_csv_rows(path: str, input_cfg: dict):
+    with open(path, newline="", encoding="utf-8") as fh:
+        yield from csv.DictReader(fh)
+
+
+def read_ndjson_rows(path: str, input_cfg: dict):
+    with open(path, encoding="utf-8") as fh:
+        yield from _iter_json_lines(fh)
+
+
+def read_ndjson_gzip_rows(path: str, input_cfg: dict):
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        yield from _iter_json_lines(fh)
+
+
+def _iter_json_lines(fh):
+    for line in fh:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_json_array_rows(path: str, input_cfg: dict):
+    """
+    Stream the objects of a top-level JSON array one at a time.
+    The file is read in blocks and each object is decoded as soon as it is complete,
+    so the whole array is never loaded. NaN literals are accepted, as in json.load.
+    """
+    decoder = json.JSONDecoder()
+    block_size = int(input_cfg.get("json_block_bytes", 1 << 16))
+    with open(path, encoding="utf-8") as fh:
+        buf, pos, eof = "", 0, False
+        opened = False
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","
+                                      or (buf[pos] == "[" and not opened)):
+                opened = opened or buf[pos] == "["
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    if buf[pos:].strip():
+                        raise
+                    return
+                block = fh.read(block_size)
+                eof = not block
+                buf, pos = buf[pos:] + block, 0
+                continue
+            yield obj
+            pos = end
+
+
+def binary_record_dtype(layout: list) -> np.dtype:
+    """
+    Build the fixed-width record dtype described by input.binary_record_layout.
+    Each entry gives a source_name and a NumPy format string such as "S32" or "<f8".
+    """
+    return np.dtype([(field["source_name"], field["format"]) for field in layout])
+
+
+def read_binary_rows(path: str, input_cfg: dict):
+    """
+    Memory-map a file of fixed-width records and decode it one chunk at a time.
+    Each chunk is a zero-copy view over the mapping; columns are converted in bulk.
+    """
+    dtype = binary_record_dtype(input_cfg["binary_record_layout"])
+    chunk_records = int(input_cfg.get("binary_chunk_records", 65536))
+    names = dtype.names
+
+    with open(path, "rb") as fh:
+        size = fh.seek(0, 2)
+        total, leftover = divmod(size, dtype.itemsize)
+        # A partial record means the layout does not match the file; never drop it silently.
+        if leftover:
+            raise ValueError(f"Binary input {path} has {leftover} trailing bytes: its size {size} "
+                             f"is not a multiple of the {dtype.itemsize}-byte record layout")
+        if total == 0:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, total, chunk_records):
+                count = min(chunk_records, total - start)
+                chunk = np.frombuffer(mm, dtype=dtype, count=count,
+                                      offset=start * dtype.itemsize)
+                columns = []
+                for name in names:
+                    values = chunk[name].tolist()
+                    if dtype[name].kind == "S":
+                        values = [v.decode("utf-8") for v in values]
+                    columns.append(values)
+                del chunk   # Release the view so the mapping can close cleanly.
+                for values in zip(*columns):
+                    yield dict(zip(names, values))
+
+
+# Maps input.driver to a reader that yields source rows keyed by source_name.
+INPUT_DRIVERS = {
+    "csv": read_csv_rows,
+    "ndjson": read_ndjson_rows,
+    "ndjson_gzip": read_ndjson_gzip_rows,
+    "json_array": read_json_array_rows,
+    "binary": read_binary_rows,
+}
+
+
+DISPATCH_MODES = ("shared", "round_robin", "entity_affine")
 
 
 class InputModule:
-    def __init__(self, config: dict, raw_queue):
+    def __init__(self, config: dict, raw_queue, worker_queues: list = None,
+                 duplicate_counter=None):
         self._config = config
         self._raw_queue = raw_queue
+        # Shared counter (multiprocessing.Value) that telemetry reads for suppressed duplicates.
+        self._duplicate_counter = duplicate_counter
 
         dynamics = config["pipeline_dynamics"]
         self._delay: float = dynamics["input_delay_seconds"]
         self._parallelism: int = dynamics["core_parallelism"]
         self._dataset_path: str = config["dataset_path"]
 
-        # Build a quick lookup so CSV column names map to internal field names and types.
+        # Per-worker dispatch sends batches straight to each worker's own queue.
+        self._dispatch_mode: str = dynamics.get("dispatch_mode", "shared")
+        if self._dispatch_mode not in DISPATCH_MODES:
+            raise ValueError(f"Unsupported dispatch mode: {self._dispatch_mode}")
+        if self._dispatch_mode != "shared" and worker_queues is None:
+            raise ValueError(f"Dispatch mode '{self._dispatch_mode}' needs per-worker queues")
+        self._worker_queues = worker_queues
+        self._batch_size: int = int(dynamics.get("dispatch_batch_size", 8))
+        # A partial batch is sent once this many packets were dispatched after its first one, or
+        # once it is this many seconds old, so a worker the hash rarely picks cannot hold packets
+        # back until end of stream. Defaults to one batch per worker; null disables either limit.
+        age_packets = dynamics.get("dispatch_max_batch_age_packets",
+                                   self._batch_size * len(worker_queues or ()))
+        age_seconds = dynamics.get("dispatch_max_batch_age_seconds")
+        self._max_age_packets = int(age_packets) if age_packets is not None else None
+        self._max_age_seconds = float(age_seconds) if age_seconds is not None else None
+
+        self._input_cfg: dict = config.get("input", {})
+        driver = self._input_cfg.get("driver", "csv")
+        if driver not in INPUT_DRIVERS:
+            raise ValueError(f"Unsupported input driver: {driver}")
+        self._driver: str = driver
+
+        # Per-entity ordering needs a contiguous counter for each entity as well.
+        stateful = config["processing"]["stateful_tasks"]
+        self._per_entity: bool = stateful.get("ordering", "global") == "per_entity"
+        self._entity_field: str = stateful.get("group_by_field", "entity_name")
+
+        # Optional duplicate suppression runs here, before any packet reaches verification.
+        self._dedup_cfg: dict = config["processing"].get("dedup", {})
+
+        # Build a quick lookup so source column names map to internal field names and types.
         self._column_map: dict = {}
         for col in config["schema_mapping"]["columns"]:
             self._column_map[col["source_name"]] = (
                 col["internal_mapping"],
                 col["data_type"],
             )
+
+        # Melt mode turns each wide row into one packet per matching column (e.g. one per year).
+        # The mapped columns above become id fields copied into every packet of that row.
+        self._melt_cfg: dict = config["schema_mapping"].get("melt", {})
+        self._melt_pattern = None
+        if self._melt_cfg:
+            self._melt_pattern = re.compile(self._melt_cfg["variable_pattern"])
+            self._melt_columns: dict = {}   # Source column -> whether it matches the pattern.
     @staticmethod
-    def _cast(value: str, data_type: str):
+    def _cast(value, data_type: str):
         if data_type == "string":
             return str(value)
         if data_type == "integer":
@@ -32,18 +197,136 @@ class InputModule:
 
     def run(self) -> None:
         sequence = 0
-        with open(self._dataset_path, newline="", encoding="utf-8") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                packet: dict = {"_sequence": sequence}
-                for source_name, raw_value in row.items():
-                    if source_name in self._column_map:
-                        internal_name, data_type = self._column_map[source_name]
-                        packet[internal_name] = self._cast(raw_value, data_type)
+        suppressed = 0
+        # Next per-entity sequence number; bounded and spilled like the Aggregator's window state.
+        entity_sequences = (EntityStateStore(self._config.get("entity_state", {}), "input_sequences")
+                            if self._per_entity else None)
+        pending: list = [[] for _ in self._worker_queues or ()]
+        started: OrderedDict = OrderedDict()   # Worker -> (sequence, time) of its batch's first packet, oldest first.
+        self._stale_flushes = 0
+        dedup = DuplicateSuppressor(self._dedup_cfg) if self._dedup_cfg.get("enabled") else None
+        reader = INPUT_DRIVERS[self._driver]
+        rows = reader(self._dataset_path, self._input_cfg)
+        records = self._melt(rows) if self._melt_pattern is not None else self._map(rows)
+        for fields in records:
+            packet: dict = {"_sequence": sequence, **fields}
+            if dedup is not None and dedup.is_duplicate(packet):
+                # Suppressed packets never take a sequence number, so ordering has no gaps.
+                suppressed += 1
+                if self._duplicate_counter is not None:
+                    with self._duplicate_counter.get_lock():
+                        self._duplicate_counter.value += 1
+                continue
+            if self._per_entity:
+                entity = packet.get(self._entity_field, "__global__")
+                packet[ENTITY_SEQUENCE_FIELD] = entity_sequences.get(entity, 0)
+                entity_sequences[entity] = packet[ENTITY_SEQUENCE_FIELD] + 1
+            if self._worker_queues is None:
                 self._raw_queue.put(packet)
-                sequence += 1
-                time.sleep(self._delay)
+            else:
+                self._dispatch(packet, sequence, pending, started)
+            sequence += 1
+            time.sleep(self._delay)
+
+        if entity_sequences is not None:
+            entity_sequences.close()
+        stale = f", StaleBatchFlushes={self._stale_flushes}" if self._worker_queues is not None else ""
+        print(f"[InputModule] Done. Sent={sequence}, DuplicatesSuppressed={suppressed}{stale}")
+
+        if self._worker_queues is None:
+            # Send one sentinel per worker so each worker can shut down cleanly.
+            for _ in range(self._parallelism):
+                self._raw_queue.put(None)
+            return
+
+        for worker_id, batch in enumerate(pending):
+            if batch:
+                self._worker_queues[worker_id].put(batch)
+        # Each worker queue ends with its own sentinel, after all of its batches.
+        for worker_queue in self._worker_queues:
+            worker_queue.put(None)
+
+    def _map(self, rows):
+        for row in rows:
+            fields: dict = {}
+            for source_name, raw_value in row.items():
+                if source_name in self._column_map:
+                    internal_name, data_type = self._column_map[source_name]
+                    fields[internal_name] = self._cast(raw_value, data_type)
+            yield fields
+
+    def _melt(self, rows):
+        """Yield one record per (id columns, matching column) cell, one source row at a time."""
+        melt = self._melt_cfg
+        variable_field = melt.get("variable_mapping", "time_period")
+        variable_type = melt.get("variable_type", "integer")
+        value_field = melt.get("value_mapping", "metric_value")
+        value_type = melt.get("value_type", "float")
+        skip_missing = melt.get("skip_missing", True)
+        for fields, cells in self._split_wide(rows):
+            for source_name, raw_value in cells:
+                if skip_missing and _is_missing(raw_value):
+                    continue
+                yield {
+                    **fields,
+                    variable_field: self._cast(source_name, variable_type),
+                    value_field: self._cast(raw_value, value_type),
+                }
+
+    def _split_wide(self, rows):
+        """Split each wide row into mapped id fields and the (column, value) cells to melt."""
+        for row in rows:
+            fields: dict = {}
+            cells: list = []
+            for source_name, raw_value in row.items():
+                if source_name in self._column_map:
+                    internal_name, data_type = self._column_map[source_name]
+                    fields[internal_name] = self._cast(raw_value, data_type)
+                    continue
+                matches = self._melt_columns.get(source_name)
+                if matches is None:
+                    matches = self._melt_pattern.fullmatch(source_name) is not None
+                    self._melt_columns[source_name] = matches
+                if matches:
+                    cells.append((source_name, raw_value))
+            yield fields, cells
+
+    def _dispatch(self, packet: dict, sequence: int, pending: list, started: OrderedDict) -> None:
+        if self._dispatch_mode == "entity_affine":
+            # crc32 is stable across runs, unlike the salted built-in str hash.
+            entity = str(packet.get(self._entity_field, "__global__"))
+            worker_id = zlib.crc32(entity.encode("utf-8")) % len(self._worker_queues)
+        else:
+            worker_id = (sequence // self._batch_size) % len(self._worker_queues)
+        pending[worker_id].append(packet)
+        if len(pending[worker_id]) == 1:
+            started[worker_id] = (sequence, time.monotonic() if self._max_age_seconds is not None else 0.0)
+        if len(pending[worker_id]) >= self._batch_size:
+            self._send_batch(worker_id, pending, started)
+        self._flush_stale(sequence, pending, started)
+
+    def _send_batch(self, worker_id: int, pending: list, started: OrderedDict) -> None:
+        self._worker_queues[worker_id].put(pending[worker_id])
+        pending[worker_id] = []
+        del started[worker_id]
+
+    def _flush_stale(self, sequence: int, pending: list, started: OrderedDict) -> None:
+        """Send partial batches that exceeded the age limits; only the oldest ones need checking."""
+        now = time.monotonic() if self._max_age_seconds is not None else 0.0
+        while started:
+            worker_id, (first_sequence, first_time) = next(iter(started.items()))
+            too_many = (self._max_age_packets is not None
+                        and sequence - first_sequence >= self._max_age_packets)
+            too_old = self._max_age_seconds is not None and now - first_time >= self._max_age_seconds
+            if not (too_many or too_old):
+                return
+            self._send_batch(worker_id, pending, started)
+            self._stale_flushes += 1
+
 
-        # Send one sentinel per worker so each worker can shut down cleanly.
-        for _ in range(self._parallelism):
-            self._raw_queue.put(None)
+def _is_missing(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() == ""
+    return isinstance(value, float) and math.isnan(value)
@@ -1,13 +1,10 @@
 
 import queue
+import time
 from collections import deque
 
-import matplotlib
-matplotlib.use("TkAgg")
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.gridspec import GridSpec
-from matplotlib.patches import FancyBboxPatch
+from .entity_state import EntityStateStore
+from .rollup_store import RollupStore
 
 _BG_DARK    = "#0d1117"
 _BG_PANEL   = "#161b22"
@@ -19,10 +16,24 @@ _RED        = "#da3633"
 _BLUE_LINE  = "#58a6ff"
 _ORANGE_LINE = "#f0883e"
 
+_plt = None
+
+
+def _pyplot():
+    """Import pyplot on first use so pipeline startup never pays for matplotlib."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("TkAgg")
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
 
 class Dashboard:
-    def __init__(self, config: dict, processed_queue, telemetry):
+    def __init__(self, config: dict, processed_queue, telemetry, started_at: float = None):
         self._config = config
+        self._started_at = started_at
         self._processed_queue = processed_queue
         self._telemetry = telemetry
         self._telemetry.subscribe(self)
@@ -42,9 +53,19 @@ class Dashboard:
         self._value_field = stateless.get("value_field") or values_chart.get("y_axis") or "metric_value"
         self._computed_field = stateful.get("output_field") or avg_chart.get("y_axis") or "computed_metric"
 
-        self._x_vals: dict = {}
-        self._y_vals: dict = {}
-        self._avg_vals: dict = {}
+        # History mode draws the values chart from the rollup store instead of the live buffers.
+        history_cfg = viz.get("history", {})
+        rollup_cfg = dict(config.get("rollup", {}))
+        self._history = None
+        if history_cfg.get("enabled") and rollup_cfg.get("enabled"):
+            rollup_cfg.setdefault("entity_field", self._entity_field)
+            self._history = RollupStore(rollup_cfg, writable=False)
+            self._history_span = float(history_cfg.get("span_seconds", 21600))
+            self._history_points = int(history_cfg.get("max_points", 400))
+
+        # Per-entity plot buffers as (x, value, average) deques; bounded when entity_state is on.
+        self._series = EntityStateStore(config.get("entity_state", {}), "dashboard")
+        self._series_bounded = bool(config.get("entity_state", {}).get("enabled"))
         self._buf_len = 300
 
         self._telem_state: dict = {
@@ -61,6 +82,9 @@ class Dashboard:
         self._telem_state = state
 
     def _build_figure(self) -> None:
+        from matplotlib.gridspec import GridSpec
+
+        plt = _pyplot()
         plt.style.use("dark_background")
         self._fig = plt.figure(figsize=(15, 9), facecolor=_BG_DARK)
         self._fig.canvas.manager.set_window_title(
@@ -90,14 +114,16 @@ class Dashboard:
                     self._finished = True
                     break
                 entity = packet.get(self._entity_field, "__stream__")
-                if entity not in self._x_vals:
-                    self._x_vals[entity] = deque(maxlen=self._buf_len)
-                    self._y_vals[entity] = deque(maxlen=self._buf_len)
-                    self._avg_vals[entity] = deque(maxlen=self._buf_len)
+                if entity not in self._series:
+                    self._series[entity] = tuple(deque(maxlen=self._buf_len) for _ in range(3))
+                x_deq, y_deq, avg_deq = self._series[entity]
+                if self._total_received == 0 and self._started_at is not None:
+                    print(f"[Dashboard] First processed packet after "
+                          f"{(time.perf_counter() - self._started_at) * 1000:.0f}ms")
                 x_val = packet.get(self._x_field, self._total_received)
-                self._x_vals[entity].append(x_val)
-                self._y_vals[entity].append(packet.get(self._value_field))
-                self._avg_vals[entity].append(packet.get(self._computed_field))
+                x_deq.append(x_val)
+                y_deq.append(packet.get(self._value_field))
+                avg_deq.append(packet.get(self._computed_field))
                 self._total_received += 1
             except queue.Empty:
                 break
@@ -118,6 +144,8 @@ class Dashboard:
         return _GREEN if r < 0.50 else (_YELLOW if r < 0.80 else _RED)
 
     def _draw_telemetry(self) -> None:
+        from matplotlib.patches import FancyBboxPatch
+
         ax = self._ax_telem
         ax.clear()
         ax.set_facecolor(_BG_PANEL)
@@ -132,12 +160,27 @@ class Dashboard:
         max_s = s["max_size"]
         streams = []
         if self._telem_cfg.get("show_raw_stream"):
-            streams.append(("Raw Stream\n(Input → Core)", s["raw_queue_size"], max_s))
+            if "worker_queue_sizes" in s:
+                for worker_id, size in enumerate(s["worker_queue_sizes"]):
+                    streams.append((f"W{worker_id}\n(batches)", size, max_s))
+            else:
+                streams.append(("Raw Stream\n(Input → Core)", s["raw_queue_size"], max_s))
         if self._telem_cfg.get("show_intermediate_stream"):
             streams.append(("Intermediate\n(Core → Aggregator)", s["intermediate_queue_size"], max_s))
         if self._telem_cfg.get("show_processed_stream"):
             streams.append(("Processed\n(Aggregator → Output)", s["processed_queue_size"], max_s))
 
+        counters = dict(s.get("counters", {}))
+        if self._series_bounded:
+            counters["dashboard_resident_entities"] = self._series.resident_count
+            counters["dashboard_spilled_entities"] = self._series.spilled_count
+        if counters:
+            ax.text(0.5, 0.02,
+                    "   ".join(f"{name.replace('_', ' ')}: {value}"
+                               for name, value in counters.items()),
+                    ha="center", va="bottom", color="#8b949e", fontsize=8,
+                    transform=ax.transAxes)
+
         n = len(streams)
         if not n:
             return
@@ -169,20 +212,21 @@ class Dashboard:
                     transform=ax.transAxes)
             status = ("● FLOWING" if color == _GREEN
                       else ("⚠ FILLING" if color == _YELLOW else "🔴 BACKPRESSURE"))
+            # Narrow per-worker bars only have room for the depth itself.
             ax.text(x0 + bw / 2, bar_y + bar_h / 2,
-                    f"{size} / {max_size}  {status}",
+                    f"{size} / {max_size}  {status}" if n <= 6 else str(size),
                     ha="center", va="center", color="white",
                     fontsize=7.5, fontweight="bold", transform=ax.transAxes)
 
     def _draw_line_charts(self) -> None:
         chart_map = {
-            "real_time_line_graph_values":  (self._ax_line1, self._y_vals,   _BLUE_LINE),
-            "real_time_line_graph_average": (self._ax_line2, self._avg_vals, _ORANGE_LINE),
+            "real_time_line_graph_values":  (self._ax_line1, 1, _BLUE_LINE),
+            "real_time_line_graph_average": (self._ax_line2, 2, _ORANGE_LINE),
         }
         for cfg in self._charts_cfg:
             if cfg["type"] not in chart_map:
                 continue
-            ax, y_store, color = chart_map[cfg["type"]]
+            ax, y_index, color = chart_map[cfg["type"]]
             ax.clear()
             ax.set_facecolor(_BG_PANEL)
             ax.set_title(cfg["title"], color=_FG_TEXT, fontsize=10)
@@ -193,24 +237,56 @@ class Dashboard:
             for spine in ax.spines.values():
                 spine.set_edgecolor(_GRID_COLOR)
 
-            if not self._x_vals:
+            if self._history is not None and cfg["type"] == "real_time_line_graph_values":
+                self._draw_history(ax, color)
+                continue
+
+            if not self._series.resident_count:
                 ax.text(0.5, 0.5, "Waiting for data…",
                         ha="center", va="center", color="#8b949e",
                         fontsize=10, transform=ax.transAxes)
                 continue
 
-            for entity, x_deq in self._x_vals.items():
-                y_deq = y_store.get(entity, deque())
+            # Only resident entities are drawn; spilled ones come back when they send data.
+            for entity, series in self._series.resident_items():
+                x_deq, y_deq = series[0], series[y_index]
                 if len(x_deq) >= 2:
                     ax.plot(list(x_deq), list(y_deq), color=color,
                             linewidth=1.2, label=entity)
 
-            if self._x_vals:
+            if self._series.resident_count:
                 ax.legend(loc="upper left", fontsize=7,
                            facecolor=_BG_PANEL, edgecolor=_GRID_COLOR,
                            labelcolor=_FG_TEXT)
 
+    def _draw_history(self, ax, color) -> None:
+        resolution = None
+        for entity in self._history.entities():
+            latest = self._history.latest_time(entity)
+            if latest is None:
+                continue
+            hist = self._history.query(
+                entity, latest - self._history_span, latest, self._history_points)
+            if len(hist["time"]) < 2:
+                continue
+            resolution = hist["resolution"]
+            ax.fill_between(hist["time"], hist["min"], hist["max"], color=color, alpha=0.15)
+            ax.plot(hist["time"], hist["mean"], color=color, linewidth=1.2, label=entity)
+        if resolution is None:
+            ax.text(0.5, 0.5, "Waiting for history…",
+                    ha="center", va="center", color="#8b949e",
+                    fontsize=10, transform=ax.transAxes)
+            return
+        ax.set_title(f"{ax.get_title()}  [last {self._history_span:.0f}s, "
+                     f"{resolution}s buckets, min–max band]", color=_FG_TEXT, fontsize=10)
+        ax.legend(loc="upper left", fontsize=7,
+                  facecolor=_BG_PANEL, edgecolor=_GRID_COLOR,
+                  labelcolor=_FG_TEXT)
+
     def run(self) -> None:
+        import matplotlib.animation as animation
+
+        plt = _pyplot()
         self._anim = animation.FuncAnimation(
             self._fig, self._animate, interval=200, cache_frame_data=False)
         plt.tight_layout(rect=[0, 0, 1, 0.96])
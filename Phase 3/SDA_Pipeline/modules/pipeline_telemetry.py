@@ -1,11 +1,41 @@
+def stage_counters(config: dict, ctx) -> tuple:
+    """
+    Create the shared counters that a config's stage processes update. Returns (counters by
+    telemetry name, the Aggregator's {"resident", "spilled"} state counters or None).
+    """
+    counters: dict = {}
+    if config["processing"].get("dedup", {}).get("enabled"):
+        counters["duplicates_suppressed"] = ctx.Value("q", 0)
+    if config.get("rules", {}).get("enabled"):
+        counters["alerts_raised"] = ctx.Value("q", 0)
+    state_counters = None
+    if config.get("entity_state", {}).get("enabled"):
+        state_counters = {"resident": ctx.Value("q", 0), "spilled": ctx.Value("q", 0)}
+        counters["aggregator_resident_entities"] = state_counters["resident"]
+        counters["aggregator_spilled_entities"] = state_counters["spilled"]
+    return counters, state_counters
+
+
 class PipelineTelemetry:
-    def __init__(self, raw_queue, intermediate_queue, processed_queue, max_size: int):
+    def __init__(self, raw_queue, intermediate_queue, processed_queue, max_size: int,
+                 worker_queues: list = None):
         self._raw_queue = raw_queue
         self._intermediate_queue = intermediate_queue
         self._processed_queue = processed_queue
         self._max_size = max_size
+        self._worker_queues = worker_queues
+        self._counters: dict = {}
+        self._subscriptions: list = []
         self._observers: list = []
 
+    def register_counter(self, name: str, shared_value) -> None:
+        """Report a multiprocessing.Value written by a stage process under state["counters"]."""
+        self._counters[name] = shared_value
+
+    def register_subscription(self, subscription) -> None:
+        """Report a broadcast subscriber's lag and drop count under state["counters"]."""
+        self._subscriptions.append(subscription)
+
     def subscribe(self, observer) -> None:
         if observer not in self._observers:
             self._observers.append(observer)
@@ -14,6 +44,9 @@ class PipelineTelemetry:
         self._observers.remove(observer)
 
     def _safe_qsize(self, q) -> int:
+        # Replay mode only has a processed stream, so the other queues may be absent.
+        if q is None:
+            return 0
         try:
             return q.qsize()
         except NotImplementedError:
@@ -26,6 +59,15 @@ class PipelineTelemetry:
             "processed_queue_size": self._safe_qsize(self._processed_queue),
             "max_size": self._max_size,
         }
+        if self._worker_queues is not None:
+            # Per-worker dispatch has no single raw stream; report each worker queue instead.
+            state["worker_queue_sizes"] = [self._safe_qsize(q) for q in self._worker_queues]
+        counters = {name: v.value for name, v in self._counters.items()}
+        for subscription in self._subscriptions:
+            counters[f"{subscription.name}_lag"] = subscription.lag
+            counters[f"{subscription.name}_dropped"] = subscription.dropped
+        if counters:
+            state["counters"] = counters
         for observer in self._observers:
             observer.update(state)
         return state
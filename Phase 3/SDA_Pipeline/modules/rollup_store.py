@@ -0,0 +1,189 @@
+"""
+Multi-resolution rollup store for per-entity sensor history.
+
+Every processed packet updates one min/max/sum/count bucket per resolution
+(1 s, 1 min and 1 h by default). Buckets live in fixed-size ring buffers backed
+by NumPy memmap files, one file per entity and resolution, so history survives
+restarts and can be read by another process while the Aggregator writes it.
+"""
+
+import os
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+BUCKET_DTYPE = np.dtype([
+    ("bucket", "<i8"),      # Bucket number (time // resolution).
+    ("min", "<f8"),
+    ("max", "<f8"),
+    ("sum", "<f8"),
+    ("count", "<i8"),       # 0 marks an unused slot, so new files need no initialisation.
+])
+
+# Record 0 of every file is a header: its bucket field holds the newest bucket written and its
+# count field the number of values added (0 for a ring that is still empty). Slots follow it.
+HEADER_RECORDS = 1
+
+DEFAULT_RESOLUTIONS = [
+    {"seconds": 1, "buckets": 86400},       # One day of per-second buckets.
+    {"seconds": 60, "buckets": 10080},      # One week of per-minute buckets.
+    {"seconds": 3600, "buckets": 8760},     # One year of per-hour buckets.
+]
+
+
+class RollupStore:
+    """
+    Writer and reader for rollup buckets.
+    The Aggregator uses append(); readers such as the Dashboard use query().
+    At most max_open_rings memmaps stay open; the least recently used one is closed first.
+    """
+
+    def __init__(self, rollup_cfg: dict, writable: bool = True):
+        self._directory: str = rollup_cfg.get("directory", "rollup")
+        self._entity_field: str = rollup_cfg.get("entity_field", "entity_name")
+        self._time_field: str = rollup_cfg.get("time_field", "time_period")
+        self._value_field: str = rollup_cfg.get("value_field", "metric_value")
+        resolutions = rollup_cfg.get("resolutions", DEFAULT_RESOLUTIONS)
+        self._resolutions: list = sorted(
+            (int(r["seconds"]), int(r["buckets"])) for r in resolutions)
+        self._max_open: int = int(rollup_cfg.get("max_open_rings", 1024))
+        if self._max_open < 1:
+            raise ValueError("rollup.max_open_rings must be at least 1")
+        self._writable = writable
+        self._arrays: OrderedDict = OrderedDict()   # (entity, seconds) -> memmap, least recently used first.
+
+    @property
+    def resolutions(self) -> list:
+        return [seconds for seconds, _ in self._resolutions]
+
+    def _path(self, entity: str, seconds: int) -> str:
+        return os.path.join(self._directory, quote(str(entity), safe=""), f"{seconds}s.dat")
+
+    def _ring(self, entity: str, seconds: int, capacity: int):
+        key = (entity, seconds)
+        ring = self._arrays.get(key)
+        if ring is not None:
+            self._arrays.move_to_end(key)
+            return ring
+        path = self._path(entity, seconds)
+        shape = (HEADER_RECORDS + capacity,)
+        if os.path.exists(path):
+            ring = np.memmap(path, dtype=BUCKET_DTYPE,
+                             mode="r+" if self._writable else "r", shape=shape)
+        elif self._writable:
+            # A new memmap file reads as zeros, i.e. an empty header and empty slots, so
+            # nothing is written and the file stays sparse until buckets arrive.
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ring = np.memmap(path, dtype=BUCKET_DTYPE, mode="w+", shape=shape)
+        else:
+            return None
+        self._arrays[key] = ring
+        if len(self._arrays) > self._max_open:
+            _, oldest = self._arrays.popitem(last=False)
+            if self._writable:
+                oldest.flush()
+        return ring
+
+    def append(self, packet: dict) -> None:
+        value = packet.get(self._value_field)
+        timestamp = packet.get(self._time_field)
+        if value is None or timestamp is None:
+            return
+        self.add(packet.get(self._entity_field, "__global__"), timestamp, float(value))
+
+    def add(self, entity: str, timestamp: float, value: float) -> None:
+        for seconds, capacity in self._resolutions:
+            ring = self._ring(entity, seconds, capacity)
+            header = ring[0]
+            bucket = int(timestamp // seconds)
+            if header["count"] and bucket <= header["bucket"] - capacity:
+                # Older than this ring retains; its slot belongs to a newer bucket now.
+                continue
+            index = HEADER_RECORDS + bucket % capacity
+            slot = ring[index]
+            if slot["count"] == 0 or slot["bucket"] != bucket:
+                # The slot is unused or still holds an older bucket from a previous lap.
+                ring[index] = (bucket, value, value, value, 1)
+            else:
+                slot["min"] = min(slot["min"], value)
+                slot["max"] = max(slot["max"], value)
+                slot["sum"] += value
+                slot["count"] += 1
+            if header["count"] == 0 or bucket > header["bucket"]:
+                header["bucket"] = bucket
+            header["count"] += 1
+
+    def close(self) -> None:
+        for ring in self._arrays.values():
+            if self._writable:
+                ring.flush()
+        self._arrays.clear()
+
+    def entities(self) -> list:
+        if not os.path.isdir(self._directory):
+            return []
+        return sorted(unquote(name) for name in os.listdir(self._directory))
+
+    def latest_time(self, entity: str):
+        """Start time of the newest finest-resolution bucket, or None if the entity is unknown."""
+        seconds, capacity = self._resolutions[0]
+        ring = self._ring(entity, seconds, capacity)
+        if ring is None or ring[0]["count"] == 0:
+            return None
+        return int(ring[0]["bucket"]) * seconds
+
+    def choose_resolution(self, start: float, end: float, max_points: int,
+                          latest: float = None) -> int:
+        """
+        Pick the finest resolution that still fits the span into max_points buckets and
+        whose retention reaches back to start; fall back to the coarsest resolution.
+        """
+        span = max(end - start, 0)
+        for seconds, capacity in self._resolutions:
+            retained_from = (latest if latest is not None else end) - seconds * capacity
+            if span / seconds <= max_points and start >= retained_from:
+                return seconds
+        return self._resolutions[-1][0]
+
+    def query(self, entity: str, start: float, end: float, max_points: int = 1000) -> dict:
+        """
+        Return bucket arrays (time, min, max, mean, count) for entity over [start, end].
+        """
+        latest = self.latest_time(entity)
+        seconds = self.choose_resolution(start, end, max_points, latest)
+        capacity = dict(self._resolutions)[seconds]
+        ring = self._ring(entity, seconds, capacity)
+        rows = np.empty(0, dtype=BUCKET_DTYPE)
+        if ring is not None and ring[0]["count"]:
+            rows = self._slots(ring, capacity, int(start // seconds), int(end // seconds))
+        return {
+            "resolution": seconds,
+            "time": rows["bucket"] * seconds,
+            "min": rows["min"],
+            "max": rows["max"],
+            "mean": rows["sum"] / rows["count"],
+            "count": rows["count"],
+        }
+
+    @staticmethod
+    def _slots(ring, capacity: int, first: int, last: int) -> np.ndarray:
+        """
+        Copy the used slots of buckets first..last in bucket order. Only the newest `capacity`
+        buckets can still be in the ring, and they sit in consecutive slots (wrapping once at
+        the end), so the range is one or two slices instead of a scan of the whole ring.
+        """
+        newest = int(ring[0]["bucket"])
+        first = max(first, newest - capacity + 1)
+        last = min(last, newest)
+        if first > last:
+            return np.empty(0, dtype=BUCKET_DTYPE)
+        low = HEADER_RECORDS + first % capacity
+        high = HEADER_RECORDS + last % capacity
+        if low <= high:
+            rows = ring[low:high + 1]
+        else:
+            rows = np.concatenate([ring[low:], ring[HEADER_RECORDS:high + 1]])
+        # A slot skipped in this lap still holds a bucket from an earlier one.
+        used = (rows["count"] > 0) & (rows["bucket"] == np.arange(first, last + 1))
+        return rows[used]
@@ -0,0 +1,291 @@
+"""
+Threshold and anomaly rules evaluated on the processed stream.
+
+Rules from the config's rules section are compiled once into NumPy arrays, one
+row per rule. The Aggregator hands every emitted packet to the engine, which
+collects micro-batches and evaluates all rules of a kind for the whole batch in
+a few array operations, so adding rules widens the arrays instead of adding
+Python loops. Streak lengths and exponentially weighted statistics are carried
+per entity between batches. Alerts are appended to a JSON-lines file.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+from .entity_state import EntityStateStore
+
+RULE_TYPES = ("threshold", "zscore")
+
+# Comparison operators as (sign, strict): the rule holds when sign * (value - limit) > 0 (or >= 0).
+_OPERATORS = {
+    ">": (1.0, True),
+    ">=": (1.0, False),
+    "<": (-1.0, True),
+    "<=": (-1.0, False),
+}
+
+
+class JsonlAlertSink:
+    """Appends alert records to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._fh = None
+        self.written: int = 0
+
+    def write(self, alerts: list) -> None:
+        if not alerts:
+            return
+        if self._fh is None:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            self._fh = open(self._path, "a", encoding="utf-8")
+        self._fh.writelines(json.dumps(alert) + "\n" for alert in alerts)
+        self._fh.flush()
+        self.written += len(alerts)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class RuleEngine:
+    """
+    Aggregator stage that evaluates compiled rules over micro-batches.
+    threshold rules fire on the reading that completes for_readings consecutive matches;
+    zscore rules fire when a reading is more than threshold standard deviations from the
+    entity's exponentially weighted mean (alpha) of the readings before it.
+    """
+
+    def __init__(self, rules_cfg: dict, entity_field: str, state_cfg: dict = None,
+                 alert_counter=None):
+        self._entity_field = entity_field
+        self._time_field: str = rules_cfg.get("time_field", "time_period")
+        self._batch_size: int = int(rules_cfg.get("batch_size", 64))
+        self._max_latency: float = float(rules_cfg.get("max_batch_latency_seconds", 0.5))
+        self._state_cfg: dict = state_cfg or {}
+        self._alert_path: str = rules_cfg.get("alert_path", "alerts/alerts.jsonl")
+        # Shared counter (multiprocessing.Value) that telemetry reads for raised alerts.
+        self._alert_counter = alert_counter
+        self._compile(rules_cfg.get("definitions", []))
+
+        self._batch: list = []
+        self._batch_started: float = 0.0
+        self._state = None
+        self._sink = None
+
+    def _compile(self, definitions: list) -> None:
+        fields: dict = {}           # Field name -> column in the batch value matrix.
+        streams: dict = {}          # (field, alpha) -> column in the EW statistics.
+        thr, z = [], []
+        for rule in definitions:
+            kind = rule.get("type")
+            if kind not in RULE_TYPES:
+                raise ValueError(f"Unsupported rule type for '{rule.get('name')}': {kind}")
+            column = fields.setdefault(rule["field"], len(fields))
+            if kind == "threshold":
+                op = rule.get("op", ">")
+                if op not in _OPERATORS:
+                    raise ValueError(f"Unsupported operator for '{rule.get('name')}': {op}")
+                sign, strict = _OPERATORS[op]
+                thr.append((rule["name"], rule["field"], column, float(rule["value"]),
+                            sign, strict, max(int(rule.get("for_readings", 1)), 1)))
+            else:
+                alpha = float(rule.get("alpha", 0.1))
+                if not 0 < alpha <= 1:
+                    raise ValueError(f"Rule '{rule.get('name')}' needs 0 < alpha <= 1")
+                stream = streams.setdefault((rule["field"], alpha), len(streams))
+                z.append((rule["name"], rule["field"], stream, float(rule.get("threshold", 3.0)),
+                          max(int(rule.get("warmup_readings", 20)), 1)))
+
+        self._fields: list = list(fields)
+        self._thr_names = [r[0] for r in thr]
+        self._thr_fields = [r[1] for r in thr]
+        self._thr_column = np.array([r[2] for r in thr], dtype=np.intp)
+        self._thr_limit = np.array([r[3] for r in thr], dtype=np.float64)
+        self._thr_sign = np.array([r[4] for r in thr], dtype=np.float64)
+        self._thr_strict = np.array([r[5] for r in thr], dtype=bool)
+        self._thr_count = np.array([r[6] for r in thr], dtype=np.int64)
+
+        self._stream_column = np.array([fields[f] for f, _ in streams], dtype=np.intp)
+        self._stream_alpha = np.array([a for _, a in streams], dtype=np.float64)
+        self._z_names = [r[0] for r in z]
+        self._z_fields = [r[1] for r in z]
+        self._z_stream = np.array([r[2] for r in z], dtype=np.intp)
+        self._z_limit = np.array([r[3] for r in z], dtype=np.float64)
+        self._z_warmup = np.array([r[4] for r in z], dtype=np.int64)
+
+    def _new_state(self) -> dict:
+        streams = len(self._stream_alpha)
+        return {
+            "run": np.zeros(len(self._thr_names), dtype=np.int64),   # Current streak per threshold rule.
+            "mean": np.zeros(streams),      # EW mean per (field, alpha).
+            "square": np.zeros(streams),    # EW mean of squares per (field, alpha).
+            "count": np.zeros(streams, dtype=np.int64),     # Readings folded in per stream.
+        }
+
+    def append(self, packet: dict) -> None:
+        if self._state is None:
+            # Created on first use so the SQLite spill file belongs to the Aggregator process.
+            self._state = EntityStateStore(self._state_cfg, "rules")
+            self._sink = JsonlAlertSink(self._alert_path)
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(packet)
+        if (len(self._batch) >= self._batch_size
+                or time.monotonic() - self._batch_started >= self._max_latency):
+            self.flush()
+
+    def due(self):
+        """Monotonic time by which the open batch must be flushed, or None when there is none."""
+        return self._batch_started + self._max_latency if self._batch else None
+
+    def poll(self) -> None:
+        """Flush the open batch once it is older than max_batch_latency_seconds."""
+        if self._batch and time.monotonic() - self._batch_started >= self._max_latency:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        alerts = self.evaluate(batch)
+        self._sink.write(alerts)
+        if alerts and self._alert_counter is not None:
+            with self._alert_counter.get_lock():
+                self._alert_counter.value += len(alerts)
+
+    def close(self) -> None:
+        if self._state is None:
+            return
+        self.flush()
+        self._sink.close()
+        self._state.close()
+        print(f"[RuleEngine] Done. Rules={len(self._thr_names) + len(self._z_names)}, "
+              f"Alerts={self._sink.written}")
+
+    def evaluate(self, batch: list) -> list:
+        """Evaluate every rule over one batch, update per-entity state and return alerts."""
+        if self._state is None:
+            self._state = EntityStateStore(self._state_cfg, "rules")
+        entities = [p.get(self._entity_field, "__global__") for p in batch]
+        codes: dict = {}
+        entity_code = np.array([codes.setdefault(e, len(codes)) for e in entities])
+        # Group each entity's readings together while keeping their stream order.
+        order = np.argsort(entity_code, kind="stable")
+        values = np.array([[_as_float(p.get(f)) for f in self._fields] for p in batch],
+                          dtype=np.float64).reshape(len(batch), len(self._fields))[order]
+        sorted_code = entity_code[order]
+        starts = np.flatnonzero(np.r_[True, sorted_code[1:] != sorted_code[:-1]])
+        ends = np.r_[starts[1:], len(batch)]
+        segment = np.repeat(np.arange(len(starts)), ends - starts)
+        segment_entities = [entities[order[s]] for s in starts]
+
+        states = []
+        for entity in segment_entities:
+            if entity not in self._state:
+                self._state[entity] = self._new_state()
+            states.append(self._state[entity])
+
+        hits = []      # (batch row, rule name, field, detail name, detail value)
+        if self._thr_names:
+            hits += self._evaluate_thresholds(values, starts, ends, segment, states, order)
+        if self._z_names:
+            hits += self._evaluate_zscores(values, starts, ends, states, order)
+
+        for entity, state in zip(segment_entities, states):
+            self._state[entity] = state
+
+        hits.sort(key=lambda hit: hit[0])
+        alerts = []
+        for row, name, field, detail, detail_value in hits:
+            packet = batch[row]
+            alerts.append({
+                "rule": name,
+                "entity": entities[row],
+                "time": packet.get(self._time_field),
+                "field": field,
+                "value": packet.get(field),
+                detail: detail_value,
+                "_sequence": packet.get("_sequence"),
+            })
+        return alerts
+
+    def _evaluate_thresholds(self, values, starts, ends, segment, states, order) -> list:
+        n = len(values)
+        readings = values[:, self._thr_column]
+        diff = (readings - self._thr_limit) * self._thr_sign
+        matched = np.where(self._thr_strict, diff > 0, diff >= 0)     # (rows, rules)
+        # A missing reading (NaN) neither matches nor breaks a streak.
+        breaks = ~matched & ~np.isnan(readings)
+
+        # Streak length by the cumsum trick: matches since the last break in the same entity.
+        # Rows with no break yet in their segment continue the streak carried from earlier batches.
+        rows = np.arange(n)[:, None]
+        before_segment = (starts - 1)[segment][:, None]
+        last_break = np.maximum.accumulate(np.where(breaks, rows, before_segment), axis=0)
+        matches = np.vstack([np.zeros((1, matched.shape[1]), dtype=np.int64), np.cumsum(matched, axis=0)])
+        columns = np.arange(matched.shape[1])[None, :]
+        carried = np.stack([s["run"] for s in states])[segment]
+        run = (matches[rows + 1, columns] - matches[last_break + 1, columns]
+               + np.where(last_break == before_segment, carried, 0))
+
+        for state, end in zip(states, ends):
+            state["run"] = run[end - 1].copy()
+
+        fired_rows, fired_rules = np.nonzero(matched & (run == self._thr_count))
+        return [(int(order[r]), self._thr_names[k], self._thr_fields[k],
+                 "consecutive_readings", int(run[r, k]))
+                for r, k in zip(fired_rows, fired_rules)]
+
+    def _evaluate_zscores(self, values, starts, ends, states, order) -> list:
+        alpha = self._stream_alpha
+        decay = 1.0 - alpha
+        hits = []
+        for state, start, end in zip(states, starts, ends):
+            x = values[start:end][:, self._stream_column]      # (readings, streams)
+            # Missing readings (NaN) are skipped per stream: they add no weight and no count.
+            present = ~np.isnan(x)
+            x = np.where(present, x, 0.0)
+            folded = np.cumsum(present, axis=0)                # Readings folded in up to row i.
+            mean0, square0 = state["mean"].copy(), state["square"].copy()
+            count = state["count"]
+            first = np.argmax(present, axis=0)
+            seed = (count == 0) & present.any(axis=0)
+            mean0[seed] = x[first[seed], np.flatnonzero(seed)]
+            square0[seed] = mean0[seed] ** 2
+
+            # EW recurrence m_i = decay * m_(i-1) + alpha * x_i over each stream's present
+            # readings, in closed form for the whole run with f_i = folded readings up to row i:
+            # m_i = decay^f_i * m0 + alpha * sum_(k<=i, present) decay^(f_i - f_k) * x_k.
+            lag = folded.T[:, :, None] - folded.T[:, None, :]          # (streams, i, k)
+            later = np.arange(len(x))[:, None] >= np.arange(len(x))[None, :]
+            weights = np.where(later[None] & present.T[:, None, :],
+                               decay[:, None, None] ** np.maximum(lag, 0), 0.0)
+            carry = decay[None, :] ** folded
+            mean = carry * mean0 + alpha * np.einsum("sik,ks->is", weights, x)
+            square = carry * square0 + alpha * np.einsum("sik,ks->is", weights, x ** 2)
+
+            # Score each reading against the statistics of the readings before it.
+            prior_mean = np.vstack([mean0, mean[:-1]])
+            prior_var = np.maximum(np.vstack([square0, square[:-1]]) - prior_mean ** 2, 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z = np.where(present & (prior_var > 1e-12), (x - prior_mean) / np.sqrt(prior_var), 0.0)
+            seen = count + folded - present                    # Readings before row i, per stream.
+
+            scores = z[:, self._z_stream]                      # (readings, rules)
+            fired = (np.abs(scores) > self._z_limit) & (seen[:, self._z_stream] >= self._z_warmup)
+            for r, k in zip(*np.nonzero(fired)):
+                hits.append((int(order[start + r]), self._z_names[k], self._z_fields[k],
+                             "z_score", round(float(scores[r, k]), 4)))
+
+            state["mean"], state["square"] = mean[-1], square[-1]
+            state["count"] = count + folded[-1]
+        return hits
+
+
+def _as_float(value) -> float:
+    return np.nan if value is None else float(value)
@@ -0,0 +1,183 @@
+"""
+Pub/sub fan-out of the processed stream.
+
+The Aggregator writes to one processed queue. StreamBroadcaster reads that queue,
+pickles each packet once together with its stream offset, and hands the same
+bytes to every subscription. Each subscription owns a bounded queue, a cursor
+(the offset after the last packet it received) and an overflow policy, so a slow
+file sink never holds back the dashboard or the other way round.
+"""
+
+import json
+import os
+import pickle
+import queue
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "sample")
+
+
+class Subscription:
+    """
+    Consumer end of one subscriber.
+    get(), get_nowait() and qsize() behave like a queue of packet dicts, so a
+    subscription can be passed anywhere the processed queue was used before.
+    """
+
+    def __init__(self, ctx, name: str, head, policy: str = "block",
+                 max_size: int = 50, sample_every: int = 10):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy for '{name}': {policy}")
+        self.name = name
+        self.policy = policy
+        self._sample_every = max(int(sample_every), 1)
+        self._queue = ctx.Queue(maxsize=max_size)
+        self._head = head                   # Packets published so far (shared with the broadcaster).
+        self._cursor = ctx.Value("q", 0)    # Offset after the last packet this subscriber received.
+        self._dropped = ctx.Value("q", 0)
+
+    @property
+    def lag(self) -> int:
+        return max(self._head.value - self._cursor.value, 0)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped.value
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def get(self, block: bool = True, timeout: float = None):
+        offset, packet = pickle.loads(self._queue.get(block, timeout))
+        self._cursor.value = offset + 1
+        return packet
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def offer(self, payload: bytes, offset: int) -> None:
+        """Called by the broadcaster with the already-pickled (offset, packet) bytes."""
+        if self.policy == "block":
+            self._queue.put(payload)
+            return
+        if self.policy == "sample" and offset % self._sample_every:
+            self._drop()
+            return
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            if self.policy == "sample":
+                self._drop()
+                return
+            self._evict_oldest()
+            self._queue.put(payload)
+
+    def close_stream(self, payload: bytes) -> None:
+        """Deliver the end-of-stream payload; it must not be sampled or dropped."""
+        if self.policy == "block":
+            self._queue.put(payload)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(payload)
+                return
+            except queue.Full:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        try:
+            self._queue.get_nowait()
+        except queue.Empty:
+            return      # The subscriber drained it meanwhile.
+        self._drop()
+
+    def _drop(self) -> None:
+        with self._dropped.get_lock():
+            self._dropped.value += 1
+
+
+class StreamBroadcaster:
+    """
+    Fan-out stage between the Aggregator and any number of subscribers.
+    Subscribe everything before the process starts; the set is fixed afterwards.
+    """
+
+    def __init__(self, ctx, source_queue):
+        self._ctx = ctx
+        self._source_queue = source_queue
+        self._head = ctx.Value("q", 0)
+        self._subscriptions: list = []
+
+    @property
+    def subscriptions(self) -> list:
+        return list(self._subscriptions)
+
+    def subscribe(self, name: str, policy: str = "block", max_size: int = 50,
+                  sample_every: int = 10) -> Subscription:
+        subscription = Subscription(self._ctx, name, self._head, policy, max_size, sample_every)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def run(self) -> None:
+        offset = 0
+        while True:
+            packet = self._source_queue.get()
+            if packet is None:
+                break
+            # Serialize once; every subscriber receives the same bytes.
+            payload = pickle.dumps((offset, packet), protocol=pickle.HIGHEST_PROTOCOL)
+            for subscription in self._subscriptions:
+                subscription.offer(payload, offset)
+            offset += 1
+            self._head.value = offset
+
+        end = pickle.dumps((offset, None), protocol=pickle.HIGHEST_PROTOCOL)
+        for subscription in self._subscriptions:
+            subscription.close_stream(end)
+        dropped = ", ".join(f"{s.name}={s.dropped}" for s in self._subscriptions)
+        print(f"[StreamBroadcaster] Done. Published={offset}, Dropped: {dropped or 'none'}")
+
+
+class JsonlFileSubscriber:
+    """Appends every received packet to a JSON-lines file."""
+
+    def __init__(self, subscription: Subscription, subscriber_cfg: dict):
+        self._subscription = subscription
+        self._path: str = subscriber_cfg.get("path", f"{subscription.name}.jsonl")
+        self._flush_every: int = int(subscriber_cfg.get("flush_every", 64))
+
+    def run(self) -> None:
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        written = 0
+        with open(self._path, "a", encoding="utf-8") as fh:
+            while True:
+                packet = self._subscription.get()
+                if packet is None:
+                    break
+                fh.write(json.dumps(packet) + "\n")
+                written += 1
+                if written % self._flush_every == 0:
+                    fh.flush()
+        print(f"[{self._subscription.name}] Done. Wrote {written} packets to '{self._path}'")
+
+
+# Maps broadcast.subscribers[].type to a consumer that runs in its own process.
+SUBSCRIBER_TYPES = {
+    "jsonl_file": JsonlFileSubscriber,
+}
+
+
+def subscribe_configured(broadcaster: StreamBroadcaster, broadcast_cfg: dict, max_size: int) -> list:
+    """Subscribe every broadcast.subscribers entry and return their runners, one per process."""
+    runners = []
+    for sub_cfg in broadcast_cfg.get("subscribers", []):
+        sub_type = sub_cfg.get("type")
+        if sub_type not in SUBSCRIBER_TYPES:
+            raise ValueError(f"Unsupported subscriber type: {sub_type}")
+        subscription = broadcaster.subscribe(
+            sub_cfg.get("name", sub_type),
+            policy=sub_cfg.get("policy", "block"),
+            max_size=int(sub_cfg.get("max_size", max_size)),
+            sample_every=int(sub_cfg.get("sample_every", 10)),
+        )
+        runners.append(SUBSCRIBER_TYPES[sub_type](subscription, sub_cfg))
+    return runners
@@ -0,0 +1,265 @@
+"""
+Append-only binary journal of the processed stream.
+
+The Aggregator appends every emitted packet as one fixed-width record. Records
+live in numbered segment files so old data never has to be rewritten, and each
+segment has a sparse index that maps record offsets to the running maximum of
+the time field. Readers map segments with mmap and get zero-copy NumPy views,
+so a restarted Dashboard or an offline job can catch up from any offset.
+"""
+
+import json
+import os
+
+import numpy as np
+
+_META_FILE = "journal.json"
+_SEGMENT_SUFFIX = ".seg"
+_INDEX_SUFFIX = ".idx"
+
+# One sparse index entry: a record offset and the largest time value seen before it.
+INDEX_DTYPE = np.dtype([("offset", "<i8"), ("max_time_before", "<f8")])
+
+DEFAULT_FIELDS = [
+    {"field": "_sequence", "format": "<i8"},
+    {"field": "entity_name", "format": "S32"},
+    {"field": "time_period", "format": "<i8"},
+    {"field": "metric_value", "format": "<f8"},
+    {"field": "computed_metric", "format": "<f8"},
+]
+
+
+def record_dtype(fields: list) -> np.dtype:
+    return np.dtype([(f["field"], f["format"]) for f in fields])
+
+
+def _segment_name(base_offset: int, suffix: str) -> str:
+    return f"{base_offset:020d}{suffix}"
+
+
+def _list_segments(directory: str) -> list:
+    if not os.path.isdir(directory):
+        return []
+    bases = [int(name[:-len(_SEGMENT_SUFFIX)]) for name in os.listdir(directory)
+             if name.endswith(_SEGMENT_SUFFIX)]
+    return sorted(bases)
+
+
+class StreamJournal:
+    """
+    Writer side of the journal.
+    Records are buffered and written in small batches to keep syscalls low.
+    """
+
+    def __init__(self, journal_cfg: dict):
+        self._directory: str = journal_cfg.get("directory", "journal")
+        self._fields: list = journal_cfg.get("fields", DEFAULT_FIELDS)
+        self._time_field: str = journal_cfg.get("time_field", "time_period")
+        self._segment_records: int = int(journal_cfg.get("segment_records", 65536))
+        self._index_interval: int = int(journal_cfg.get("index_interval", 256))
+        self._flush_records: int = int(journal_cfg.get("flush_records", 64))
+        self._dtype = record_dtype(self._fields)
+        if self._time_field not in self._dtype.names:
+            raise ValueError(f"Journal time_field '{self._time_field}' is not a journal field")
+
+        self._buffer: list = []
+        self._segment_fh = None
+        self._index_fh = None
+        self._segment_base: int = 0
+        self._segment_count: int = 0
+        self._next_offset: int = 0
+        self._max_time: float = -np.inf
+        self._truncated: int = 0
+
+    def open(self) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        self._write_or_check_meta()
+
+        # Continue after whatever complete records earlier runs left behind.
+        reader = JournalReader(self._directory)
+        self._next_offset = reader.total_records()
+        if self._next_offset:
+            for view in reader.read(0):
+                self._max_time = max(self._max_time, float(view[self._time_field].max()))
+        bases = _list_segments(self._directory)
+        self._segment_base = bases[-1] if bases else 0
+        self._segment_count = self._next_offset - self._segment_base
+        if bases:
+            # Drop a torn trailing record left by a crash so appends stay aligned.
+            path = os.path.join(self._directory, _segment_name(self._segment_base, _SEGMENT_SUFFIX))
+            os.truncate(path, self._segment_count * self._dtype.itemsize)
+        if self._segment_count >= self._segment_records:
+            self._segment_base, self._segment_count = self._next_offset, 0
+        self._open_segment()
+
+    def _write_or_check_meta(self) -> None:
+        meta_path = os.path.join(self._directory, _META_FILE)
+        meta = {"fields": self._fields, "time_field": self._time_field}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as fh:
+                existing = json.load(fh)
+            if existing != meta:
+                raise ValueError(
+                    f"Journal at '{self._directory}' uses a different record layout")
+            return
+        with open(meta_path, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=2)
+
+    def _open_segment(self) -> None:
+        self._segment_fh = open(os.path.join(
+            self._directory, _segment_name(self._segment_base, _SEGMENT_SUFFIX)), "ab")
+        self._index_fh = open(os.path.join(
+            self._directory, _segment_name(self._segment_base, _INDEX_SUFFIX)), "ab")
+
+    def _close_segment(self) -> None:
+        self._segment_fh.close()
+        self._index_fh.close()
+
+    def append(self, packet: dict) -> None:
+        record = []
+        for name in self._dtype.names:
+            value = packet.get(name)
+            if self._dtype[name].kind == "S":
+                value = b"" if value is None else self._fit(name, str(value).encode("utf-8"))
+            elif value is None:
+                value = 0
+            record.append(value)
+        self._buffer.append(tuple(record))
+        if len(self._buffer) >= self._flush_records:
+            self.flush()
+
+    def _fit(self, name: str, encoded: bytes) -> bytes:
+        """Cut a UTF-8 value that overflows its field on a character boundary, never inside one."""
+        width = self._dtype[name].itemsize
+        if len(encoded) <= width:
+            return encoded
+        self._truncated += 1
+        return encoded[:width].decode("utf-8", errors="ignore").encode("utf-8")
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        records = np.array(self._buffer, dtype=self._dtype)
+        self._buffer = []
+        times = records[self._time_field].astype("<f8")
+
+        start = 0
+        while start < len(records):
+            if self._segment_count >= self._segment_records:
+                self._close_segment()
+                self._segment_base, self._segment_count = self._next_offset, 0
+                self._open_segment()
+            take = min(len(records) - start, self._segment_records - self._segment_count)
+            index_entries = []
+            for i in range(start, start + take):
+                if (self._next_offset + i - start) % self._index_interval == 0:
+                    index_entries.append((self._next_offset + i - start, self._max_time))
+                self._max_time = max(self._max_time, times[i])
+            self._segment_fh.write(records[start:start + take].tobytes())
+            if index_entries:
+                self._index_fh.write(np.array(index_entries, dtype=INDEX_DTYPE).tobytes())
+            self._next_offset += take
+            self._segment_count += take
+            start += take
+
+        self._segment_fh.flush()
+        self._index_fh.flush()
+
+    def close(self) -> None:
+        if self._segment_fh is None:
+            return
+        self.flush()
+        self._close_segment()
+        self._segment_fh = self._index_fh = None
+        if self._truncated:
+            print(f"[StreamJournal] Truncated {self._truncated} string values to fit their field widths")
+
+
+class JournalReader:
+    """
+    Reader side of the journal.
+    Only complete records are visible, so it is safe to read while a writer appends.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        meta_path = os.path.join(directory, _META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as fh:
+                meta = json.load(fh)
+        else:
+            meta = {"fields": DEFAULT_FIELDS, "time_field": "time_period"}
+        self._dtype = record_dtype(meta["fields"])
+        self._time_field: str = meta["time_field"]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._dtype
+
+    def _segment_sizes(self) -> list:
+        sizes = []
+        for base in _list_segments(self._directory):
+            path = os.path.join(self._directory, _segment_name(base, _SEGMENT_SUFFIX))
+            sizes.append((base, os.path.getsize(path) // self._dtype.itemsize))
+        return sizes
+
+    def total_records(self) -> int:
+        sizes = self._segment_sizes()
+        return sizes[-1][0] + sizes[-1][1] if sizes else 0
+
+    def read(self, offset: int = 0, count: int = None):
+        """Yield read-only structured views, one per segment, covering [offset, offset + count)."""
+        end = self.total_records() if count is None else offset + count
+        for base, size in self._segment_sizes():
+            lo, hi = max(offset, base), min(end, base + size)
+            if lo >= hi:
+                continue
+            path = os.path.join(self._directory, _segment_name(base, _SEGMENT_SUFFIX))
+            view = np.memmap(path, dtype=self._dtype, mode="r", shape=(size,))
+            yield view[lo - base:hi - base]
+
+    def find_offset(self, time_value: float) -> int:
+        """
+        Return an offset from which every record with time >= time_value is visible.
+        Uses the sparse index, so records just after the offset may still be older.
+        """
+        best = 0
+        for base, _ in self._segment_sizes():
+            path = os.path.join(self._directory, _segment_name(base, _INDEX_SUFFIX))
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                continue
+            index = np.fromfile(path, dtype=INDEX_DTYPE)
+            below = index["offset"][index["max_time_before"] < time_value]
+            if len(below) == 0:
+                break
+            best = int(below[-1])
+            if len(below) < len(index):
+                break
+        return best
+
+    def iter_packets(self, offset: int = 0, since: float = None):
+        """Decode journal records back into packet dicts."""
+        if since is not None:
+            offset = max(offset, self.find_offset(since))
+        names = self._dtype.names
+        for view in self.read(offset):
+            if since is not None:
+                view = view[view[self._time_field] >= since]
+            columns = []
+            for name in names:
+                values = view[name].tolist()
+                if self._dtype[name].kind == "S":
+                    # Journals written before values were cut on character boundaries may end mid-character.
+                    values = [v.decode("utf-8", errors="replace") for v in values]
+                columns.append(values)
+            for values in zip(*columns):
+                yield dict(zip(names, values))
+
+    def replay(self, out_queue, offset: int = 0, since: float = None) -> None:
+        """Push journal packets into a queue followed by the end-of-stream sentinel."""
+        sent = 0
+        for packet in self.iter_packets(offset, since):
+            out_queue.put(packet)
+            sent += 1
+        out_queue.put(None)
+        print(f"[JournalReader] Replayed {sent} packets from '{self._directory}'")
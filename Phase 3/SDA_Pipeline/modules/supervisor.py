@@ -0,0 +1,273 @@
+"""
+Supervisor mode: several pipeline configs ("tenants") on one shared worker pool.
+
+Each tenant keeps its own InputModule, Aggregator (with its journal, rollup and
+rule stages), processed stream, broadcast subscribers and telemetry counters.
+Only signature verification is shared: a
+dispatcher takes packets from every tenant's input queue with deficit round
+robin, so under load each tenant gets pool time in proportion to its weight,
+and hands them to one pool of workers that verify with the tenant's own keys.
+"""
+
+import copy
+import os
+import queue
+import time
+
+from .core_module import CoreWorker, Aggregator, END_OF_STREAM_FIELD
+from .input_module import InputModule
+from .pipeline_telemetry import PipelineTelemetry, stage_counters
+from .stream_broadcast import StreamBroadcaster, subscribe_configured
+
+
+class TenantDispatcher:
+    """
+    Moves packets from tenant input queues into the shared work queue.
+    Every round a tenant may send up to weight * quantum_packets packets as one batch.
+    """
+
+    def __init__(self, input_queues: list, weights: list, work_queue, intermediate_queues: list,
+                 dispatched_counters: list, pool_size: int, quantum_packets: int = 8,
+                 idle_poll_seconds: float = 0.005):
+        self._input_queues = input_queues
+        self._quanta = [max(int(w * quantum_packets), 1) for w in weights]
+        self._work_queue = work_queue
+        self._intermediate_queues = intermediate_queues
+        self._dispatched = dispatched_counters
+        self._pool_size = pool_size
+        self._idle_poll = idle_poll_seconds
+
+    def run(self) -> None:
+        active = list(range(len(self._input_queues)))
+        while active:
+            moved = False
+            for tenant in list(active):
+                batch, ended = self._take(tenant)
+                if batch:
+                    self._work_queue.put((tenant, batch))
+                    with self._dispatched[tenant].get_lock():
+                        self._dispatched[tenant].value += len(batch)
+                    moved = True
+                if ended:
+                    # Workers are shared, so they cannot send per-tenant sentinels. The
+                    # Aggregator finishes once it has received this many packets instead.
+                    self._intermediate_queues[tenant].put(
+                        {END_OF_STREAM_FIELD: self._dispatched[tenant].value})
+                    active.remove(tenant)
+            if not moved:
+                time.sleep(self._idle_poll)
+
+        for _ in range(self._pool_size):
+            self._work_queue.put(None)
+        print("[TenantDispatcher] Done. All tenant inputs drained.")
+
+    def _take(self, tenant: int):
+        batch = []
+        while len(batch) < self._quanta[tenant]:
+            try:
+                packet = self._input_queues[tenant].get_nowait()
+            except queue.Empty:
+                break
+            if packet is None:
+                return batch, True
+            batch.append(packet)
+        return batch, False
+
+
+class PoolWorker:
+    """Shared verification worker that serves every tenant with that tenant's settings."""
+
+    def __init__(self, tenant_configs: list, work_queue, intermediate_queues: list,
+                 worker_id: int = 0):
+        self._tenant_configs = tenant_configs
+        self._work_queue = work_queue
+        self._intermediate_queues = intermediate_queues
+        self._worker_id = worker_id
+
+    def run(self) -> None:
+        # One verifier per tenant; each forwards straight to its tenant's Aggregator.
+        verifiers = [
+            CoreWorker(config, None, self._intermediate_queues[tenant], worker_id=self._worker_id)
+            for tenant, config in enumerate(self._tenant_configs)
+        ]
+        batches = [0] * len(verifiers)
+        while True:
+            item = self._work_queue.get()
+            if item is None:
+                break
+            tenant, batch = item
+            verifiers[tenant].process_batch(batch)
+            batches[tenant] += 1
+        print(f"[PoolWorker-{self._worker_id}] Done. Batches per tenant={batches}")
+
+
+def _tenant_config(name: str, config: dict) -> dict:
+    """Copy a tenant config and adjust it to run behind the shared pool."""
+    config = copy.deepcopy(config)
+    dynamics = config["pipeline_dynamics"]
+    # The tenant's InputModule feeds the dispatcher, which needs a single sentinel.
+    dynamics["core_parallelism"] = 1
+    dynamics["dispatch_mode"] = "shared"
+    state_cfg = config.get("entity_state")
+    if state_cfg:
+        # Spill files are named per stage, so give each tenant its own directory.
+        state_cfg["spill_directory"] = os.path.join(
+            state_cfg.get("spill_directory", "entity_state"), name)
+    return config
+
+
+class Supervisor:
+    """
+    Runs every tenant of a supervisor config and reports per-tenant throughput and
+    queue depth every report_interval_seconds until all tenants have finished.
+    """
+
+    def __init__(self, supervisor_cfg: dict, tenant_configs: list, ctx):
+        self._ctx = ctx
+        self._pool_size: int = int(supervisor_cfg.get("pool_size", 4))
+        self._work_max_size: int = int(supervisor_cfg.get("work_queue_max_size", self._pool_size * 2))
+        self._quantum: int = int(supervisor_cfg.get("quantum_packets", 8))
+        self._report_interval: float = float(supervisor_cfg.get("report_interval_seconds", 2.0))
+
+        self._names = [t["name"] for t in supervisor_cfg["tenants"]]
+        if len(set(self._names)) != len(self._names):
+            raise ValueError("Supervisor tenant names must be unique")
+        self._weights = [float(t.get("weight", 1)) for t in supervisor_cfg["tenants"]]
+        if any(w <= 0 for w in self._weights):
+            raise ValueError("Supervisor tenant weights must be positive")
+        self._configs = [_tenant_config(name, config)
+                         for name, config in zip(self._names, tenant_configs)]
+        self._check_outputs()
+
+    def _check_outputs(self) -> None:
+        """Tenants keep their own outputs, so two tenants must never write to the same place."""
+        owners: dict = {}
+        for name, config in zip(self._names, self._configs):
+            paths = []
+            for section, key, default in (("journal", "directory", "journal"),
+                                          ("rollup", "directory", "rollup"),
+                                          ("rules", "alert_path", "alerts/alerts.jsonl")):
+                if config.get(section, {}).get("enabled"):
+                    paths.append(config[section].get(key, default))
+            if config.get("broadcast", {}).get("enabled"):
+                for sub_cfg in config["broadcast"].get("subscribers", []):
+                    name_or_type = sub_cfg.get("name", sub_cfg.get("type"))
+                    paths.append(sub_cfg.get("path", f"{name_or_type}.jsonl"))
+            for path in paths:
+                path = os.path.abspath(path)
+                if path in owners:
+                    raise ValueError(f"Tenants '{owners[path]}' and '{name}' both write to '{path}'")
+                owners[path] = name
+
+    def run(self) -> dict:
+        """Run every tenant to end of stream and return the packets each one emitted, by name."""
+        ctx = self._ctx
+        tenants = range(len(self._configs))
+        sizes = [int(c["pipeline_dynamics"]["stream_queue_max_size"]) for c in self._configs]
+        input_queues = [ctx.Queue(maxsize=sizes[t]) for t in tenants]
+        intermediate_queues = [ctx.Queue(maxsize=sizes[t]) for t in tenants]
+        processed_queues = [ctx.Queue(maxsize=sizes[t]) for t in tenants]
+        dispatched = [ctx.Value("q", 0) for _ in tenants]
+        work_queue = ctx.Queue(maxsize=self._work_max_size)
+
+        telemetry = [
+            PipelineTelemetry(input_queues[t], intermediate_queues[t], processed_queues[t], sizes[t])
+            for t in tenants
+        ]
+
+        procs = []
+        # The supervisor counts each tenant's packets from this stream; with broadcasting on it
+        # is one more subscriber, next to the tenant's own.
+        streams = list(processed_queues)
+        for t in tenants:
+            config, name = self._configs[t], self._names[t]
+            counters, state_counters = stage_counters(config, ctx)
+            for counter_name, shared_value in counters.items():
+                telemetry[t].register_counter(counter_name, shared_value)
+            procs.append(ctx.Process(
+                target=InputModule(config, input_queues[t],
+                                   duplicate_counter=counters.get("duplicates_suppressed")).run,
+                name=f"Input-{name}", daemon=True))
+            procs.append(ctx.Process(
+                target=Aggregator(config, intermediate_queues[t], processed_queues[t], num_workers=1,
+                                  state_counters=state_counters,
+                                  alert_counter=counters.get("alerts_raised")).run,
+                name=f"Aggregator-{name}", daemon=True))
+
+            broadcast_cfg = config.get("broadcast", {})
+            if broadcast_cfg.get("enabled"):
+                broadcaster = StreamBroadcaster(ctx, processed_queues[t])
+                streams[t] = broadcaster.subscribe("supervisor", policy="block", max_size=sizes[t])
+                runners = subscribe_configured(broadcaster, broadcast_cfg, sizes[t])
+                for subscription in broadcaster.subscriptions:
+                    telemetry[t].register_subscription(subscription)
+                procs.append(ctx.Process(target=broadcaster.run, name=f"StreamBroadcaster-{name}",
+                                         daemon=True))
+                procs.extend(ctx.Process(target=runner.run, daemon=True,
+                                         name=f"Subscriber-{name}-{runner._subscription.name}")
+                             for runner in runners)
+
+        dispatcher = TenantDispatcher(input_queues, self._weights, work_queue, intermediate_queues,
+                                      dispatched, self._pool_size, self._quantum)
+        procs.append(ctx.Process(target=dispatcher.run, name="TenantDispatcher", daemon=True))
+        for worker_id in range(self._pool_size):
+            worker = PoolWorker(self._configs, work_queue, intermediate_queues, worker_id)
+            procs.append(ctx.Process(target=worker.run, name=f"PoolWorker-{worker_id}", daemon=True))
+
+        for proc in procs:
+            proc.start()
+        print(f"[Supervisor] Running {len(self._configs)} tenants on {self._pool_size} shared workers")
+
+        started = last_report = time.perf_counter()
+        emitted = [0] * len(self._configs)
+        last_emitted = [0] * len(self._configs)
+        finished = [False] * len(self._configs)
+        try:
+            while not all(finished):
+                self._drain(streams, emitted, finished)
+                now = time.perf_counter()
+                if now - last_report >= self._report_interval:
+                    self._report(telemetry, dispatched, emitted, last_emitted, now - last_report)
+                    last_emitted = list(emitted)
+                    last_report = now
+        except KeyboardInterrupt:
+            print("\n[Supervisor] Interrupted by user.")
+
+        elapsed = time.perf_counter() - started
+        for t in tenants:
+            print(f"[Supervisor] {self._names[t]}: Emitted={emitted[t]} "
+                  f"in {elapsed:.1f}s ({emitted[t] / elapsed:.1f} packets/s)")
+        # Subscribers may still be writing out their queues, so give them time to finish.
+        for proc in procs:
+            proc.join(timeout=3)
+            if proc.is_alive():
+                proc.terminate()
+        return dict(zip(self._names, emitted))
+
+    def _drain(self, streams: list, emitted: list, finished: list) -> None:
+        idle = True
+        for t, processed in enumerate(streams):
+            while not finished[t]:
+                try:
+                    packet = processed.get_nowait()
+                except queue.Empty:
+                    break
+                idle = False
+                if packet is None:
+                    finished[t] = True
+                else:
+                    emitted[t] += 1
+        if idle:
+            time.sleep(0.01)
+
+    def _report(self, telemetry: list, dispatched: list, emitted: list,
+                last_emitted: list, interval: float) -> None:
+        for t, tenant_telemetry in enumerate(telemetry):
+            s = tenant_telemetry.poll_and_notify()
+            rate = (emitted[t] - last_emitted[t]) / interval
+            print(f"[Supervisor] {self._names[t]}: {rate:.1f} packets/s, "
+                  f"dispatched={dispatched[t].value}, emitted={emitted[t]}, "
+                  f"input={s['raw_queue_size']}/{s['max_size']}, "
+                  f"verified={s['intermediate_queue_size']}/{s['max_size']}, "
+                  f"processed={s['processed_queue_size']}/{s['max_size']}"
+                  + "".join(f", {name}={value}" for name, value in s.get("counters", {}).items()))
@@ -0,0 +1,109 @@
+"""
+Benchmark shared-queue dispatch against per-worker dispatch with work stealing.
+
+Generates a synthetic NDJSON stream, runs Input -> CoreWorkers -> Aggregator for each
+dispatch mode and worker count, and prints end-to-end packets per second.
+
+Usage (from the SDA_Pipeline directory):
+    python scripts/benchmark_dispatch.py [--packets 20000] [--workers 8 16 32] [--iterations 200]
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.input_module import DISPATCH_MODES, InputModule  # noqa: E402
+from modules.core_module import CoreWorker, Aggregator  # noqa: E402
+
+
+def _write_dataset(path: str, packets: int, entities: int, secret_key: str, iterations: int) -> None:
+    # Real signatures, so every packet passes verification and reaches the Aggregator's emit path.
+    signatures: dict = {}
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(packets):
+            value = round(20 + (i % 997) / 10, 2)
+            if value not in signatures:
+                signatures[value] = hashlib.pbkdf2_hmac(
+                    "sha256", secret_key.encode("utf-8"), f"{value:.2f}".encode("utf-8"), iterations).hex()
+            fh.write(json.dumps({
+                "Sensor_ID": f"Sensor_{i % entities}",
+                "Timestamp": 1773037623 + i,
+                "Raw_Value": value,
+                "Auth_Signature": signatures[value],
+            }) + "\n")
+
+
+def _run_once(config: dict, parallelism: int) -> tuple:
+    max_size = int(config["pipeline_dynamics"]["stream_queue_max_size"])
+    intermediate_queue = mp.Queue(maxsize=max_size)
+    processed_queue = mp.Queue(maxsize=max_size)
+    if config["pipeline_dynamics"]["dispatch_mode"] == "shared":
+        raw_queue, worker_queues = mp.Queue(maxsize=max_size), None
+    else:
+        raw_queue, worker_queues = None, [mp.Queue(maxsize=max_size) for _ in range(parallelism)]
+
+    procs = [mp.Process(target=InputModule(config, raw_queue, worker_queues=worker_queues).run)]
+    for i in range(parallelism):
+        own = raw_queue if worker_queues is None else worker_queues[i]
+        worker = CoreWorker(config, own, intermediate_queue, worker_id=i, peer_queues=worker_queues)
+        procs.append(mp.Process(target=worker.run))
+    procs.append(mp.Process(
+        target=Aggregator(config, intermediate_queue, processed_queue, parallelism).run))
+
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    emitted = 0
+    while processed_queue.get() is not None:
+        emitted += 1
+    elapsed = time.perf_counter() - start
+    for proc in procs:
+        proc.join()
+    return elapsed, emitted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--packets", type=int, default=20000)
+    parser.add_argument("--entities", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="PBKDF2 iterations per packet (kept low to expose dispatch overhead)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(__file__), "..", "config.json"), encoding="utf-8") as fh:
+        base = json.load(fh)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = os.path.join(tmp, "bench.ndjson")
+        stateless = base["processing"]["stateless_tasks"]
+        _write_dataset(dataset, args.packets, args.entities, stateless["secret_key"], args.iterations)
+        print(f"{'mode':<15}{'workers':>8}{'seconds':>10}{'packets/s':>12}")
+        for parallelism in args.workers:
+            for mode in DISPATCH_MODES:
+                config = copy.deepcopy(base)
+                config["dataset_path"] = dataset
+                config["input"] = {"driver": "ndjson"}
+                config["journal"] = {"enabled": False}
+                dynamics = config["pipeline_dynamics"]
+                dynamics.update(input_delay_seconds=0, core_parallelism=parallelism,
+                                dispatch_mode=mode, dispatch_batch_size=args.batch_size)
+                config["processing"]["stateless_tasks"]["iterations"] = args.iterations
+                elapsed, emitted = _run_once(config, parallelism)
+                if emitted != args.packets:
+                    raise RuntimeError(f"{mode} with {parallelism} workers emitted {emitted} of "
+                                       f"{args.packets} packets; the run did not exercise the full pipeline")
+                print(f"{mode:<15}{parallelism:>8}{elapsed:>10.2f}{args.packets / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
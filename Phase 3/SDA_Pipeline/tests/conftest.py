@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the pipeline as `modules.<name>`, as main.py does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def pipeline_config(tmp_path):
+    """Smallest config the input, worker and aggregator stages accept; tests override parts of it."""
+    return {
+        "dataset_path": str(tmp_path / "data.csv"),
+        "pipeline_dynamics": {
+            "input_delay_seconds": 0,
+            "core_parallelism": 1,
+            "dispatch_mode": "shared",
+            "dispatch_batch_size": 8,
+        },
+        "schema_mapping": {
+            "columns": [
+                {"source_name": "Sensor_ID", "internal_mapping": "entity_name", "data_type": "string"},
+                {"source_name": "Timestamp", "internal_mapping": "time_period", "data_type": "integer"},
+                {"source_name": "Raw_Value", "internal_mapping": "metric_value", "data_type": "float"},
+            ]
+        },
+        "processing": {
+            "stateless_tasks": {"operation": "passthrough"},
+            "stateful_tasks": {"running_average_window_size": 3, "ordering": "global"},
+        },
+        "entity_state": {"enabled": False, "spill_directory": str(tmp_path / "entity_state")},
+    }
@@ -0,0 +1,63 @@
+import pytest
+
+from modules.dedup_filter import BloomFilter, DuplicateSuppressor, ScalableBloomFilter
+
+
+def _keys(start, stop):
+    return [f"key-{i}".encode("utf-8") for i in range(start, stop)]
+
+
+def test_suppresses_each_repeat_once_seen():
+    suppressor = DuplicateSuppressor({"exact_recent_size": 16, "initial_capacity": 1000,
+                                      "error_rate": 0.001})
+    packets = [{"entity_name": f"E{i % 5}", "time_period": i} for i in range(400)]
+    # Retries of the newest keys hit the exact set; older ones are caught by the Bloom filter.
+    stream = packets + packets[:50] + [dict(p) for p in packets[350:]] + packets[100:150]
+    flags = [suppressor.is_duplicate(packet) for packet in stream]
+    assert not any(flags[:400])
+    assert sum(flags) == 150
+
+
+def test_slices_grow_with_tighter_error_rates():
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01, growth_factor=2)
+    for key in _keys(0, 700):
+        bloom.add(key)
+    # 100 + 200 + 400 keys fill exactly three slices.
+    assert [s.capacity for s in bloom._slices] == [100, 200, 400]
+    assert [s.error_rate for s in bloom._slices] == pytest.approx([0.005, 0.0025, 0.00125])
+    assert all(key in bloom for key in _keys(0, 700))
+
+
+def test_oldest_slice_is_recycled_at_the_memory_cap():
+    sizes = [BloomFilter(100 * 2 ** n, 0.005 * 0.5 ** n).size_bytes for n in range(4)]
+    cap = sum(sizes[:3]) + sizes[3] // 2     # Room for slices of 100, 200 and 400 keys, not a fourth.
+    bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01, growth_factor=2, max_bytes=cap)
+    for key in _keys(0, 2000):
+        bloom.add(key)
+        assert bloom.size_bytes <= cap
+    # Every slice added after the third reuses the budget of the slice it replaced.
+    assert len(bloom._slices) == 3
+    assert all(key in bloom for key in _keys(1900, 2000))
+    forgotten = sum(key in bloom for key in _keys(0, 100))
+    assert forgotten < 10
+
+
+def test_rejects_cap_smaller_than_first_slice():
+    size = BloomFilter(1000, 0.0005).size_bytes
+    ScalableBloomFilter(initial_capacity=1000, error_rate=0.001, max_bytes=size)
+    with pytest.raises(ValueError, match="max_memory_bytes"):
+        ScalableBloomFilter(initial_capacity=1000, error_rate=0.001, max_bytes=size - 1)
+    with pytest.raises(ValueError):
+        DuplicateSuppressor({"initial_capacity": 1000, "max_memory_bytes": 100})
+
+
+def test_false_positive_rate_stays_near_error_rate():
+    error_rate = 0.01
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=error_rate, growth_factor=2)
+    for key in _keys(0, 15000):        # Four slices: 1000, 2000, 4000 and 8000 keys.
+        bloom.add(key)
+    assert len(bloom._slices) == 4
+    unseen = _keys(100000, 200000)
+    rate = sum(key in bloom for key in unseen) / len(unseen)
+    # Slice rates halve each time, so the compound rate stays below error_rate; allow some noise.
+    assert rate < error_rate * 1.2
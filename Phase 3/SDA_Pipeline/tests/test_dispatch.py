@@ -0,0 +1,66 @@
+import zlib
+
+import pytest
+
+from modules.input_module import InputModule
+
+
+class _LoggedQueue:
+    """Worker queue that records every batch in one log shared by all workers, in put order."""
+
+    def __init__(self, worker_id, log):
+        self._worker_id = worker_id
+        self._log = log
+
+    def put(self, batch):
+        self._log.append((self._worker_id, batch))
+
+
+def _entity_for(worker_id, workers):
+    return next(f"S{i}" for i in range(1000)
+                if zlib.crc32(f"S{i}".encode("utf-8")) % workers == worker_id)
+
+
+def _run_skewed(pipeline_config, **dynamics):
+    # Worker 1 gets one packet in fifty; worker 0 gets the rest.
+    busy, rare = _entity_for(0, 2), _entity_for(1, 2)
+    rows = [f"{rare if i % 50 == 0 else busy},{i},1.0" for i in range(500)]
+    with open(pipeline_config["dataset_path"], "w", encoding="utf-8") as fh:
+        fh.write("Sensor_ID,Timestamp,Raw_Value\n" + "\n".join(rows) + "\n")
+    pipeline_config["pipeline_dynamics"].update(dispatch_mode="entity_affine", dispatch_batch_size=8, **dynamics)
+    log = []
+    queues = [_LoggedQueue(worker_id, log) for worker_id in range(2)]
+    InputModule(pipeline_config, None, worker_queues=queues).run()
+    return [(worker_id, [p["_sequence"] for p in batch]) for worker_id, batch in log if batch is not None]
+
+
+def _worst_delay(batches):
+    """Most packets dispatched after a packet before the batch holding it was sent."""
+    dispatched_so_far, worst = -1, 0
+    for _, sequences in batches:
+        dispatched_so_far = max(dispatched_so_far, *sequences)
+        worst = max(worst, dispatched_so_far - min(sequences))
+    return worst
+
+
+@pytest.mark.parametrize("age_packets, bound", [(None, 16 + 8), (20, 20 + 8)])
+def test_rarely_hashed_worker_is_flushed_by_packet_age(pipeline_config, age_packets, bound):
+    dynamics = {} if age_packets is None else {"dispatch_max_batch_age_packets": age_packets}
+    batches = _run_skewed(pipeline_config, **dynamics)
+    assert sorted(s for _, sequences in batches for s in sequences) == list(range(500))
+    assert _worst_delay(batches) <= bound
+    # The rare worker's packets leave in partial batches long before end of stream.
+    assert len([b for worker_id, b in batches if worker_id == 1]) == 10
+
+
+def test_without_age_limits_rare_worker_waits_for_end_of_stream(pipeline_config):
+    batches = _run_skewed(pipeline_config, dispatch_max_batch_age_packets=None)
+    # Its first full batch only leaves with the eighth rare packet, 350 packets after the first.
+    assert _worst_delay(batches) == 350
+
+
+def test_batch_age_in_seconds(pipeline_config):
+    batches = _run_skewed(pipeline_config, dispatch_max_batch_age_packets=None,
+                          dispatch_max_batch_age_seconds=0.0)
+    # A zero-second limit sends every packet as soon as the next one is dispatched.
+    assert _worst_delay(batches) <= 1
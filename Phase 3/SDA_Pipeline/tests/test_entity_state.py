@@ -0,0 +1,49 @@
+import queue
+
+import pytest
+
+from modules.core_module import Aggregator
+from modules.entity_state import EntityStateStore
+
+
+def _state_cfg(tmp_path, **limits):
+    return {"enabled": True, "spill_directory": str(tmp_path), **limits}
+
+
+@pytest.mark.parametrize("limits", [{"idle_ttl_seconds": 0}, {"idle_ttl_seconds": -1},
+                                    {"max_resident_entities": 0}])
+def test_rejects_limits_that_evict_everything(tmp_path, limits):
+    with pytest.raises(ValueError):
+        EntityStateStore(_state_cfg(tmp_path, **limits), "test")
+
+
+@pytest.mark.parametrize("limits", [{"idle_ttl_seconds": 1e-9}, {"max_resident_entities": 1}])
+def test_touched_entity_stays_resident(tmp_path, limits):
+    store = EntityStateStore(_state_cfg(tmp_path, **limits), "test")
+    for round_number in range(3):
+        for entity in ("a", "b", "c"):
+            if entity not in store:
+                store[entity] = []
+            store[entity] = store[entity] + [round_number]
+    assert {entity: store[entity] for entity in ("a", "b", "c")} == {
+        "a": [0, 1, 2], "b": [0, 1, 2], "c": [0, 1, 2]}
+    store.close()
+
+
+@pytest.mark.parametrize("limits", [{"idle_ttl_seconds": 1e-9}, {"max_resident_entities": 1}])
+def test_aggregator_with_tightest_limits(pipeline_config, tmp_path, limits):
+    pipeline_config["entity_state"] = _state_cfg(tmp_path, **limits)
+    intermediate, processed = queue.Queue(), queue.Queue()
+    for sequence in range(60):
+        intermediate.put({"_sequence": sequence, "entity_name": f"E{sequence % 7}",
+                          "time_period": sequence, "metric_value": float(sequence)})
+    intermediate.put(None)
+
+    Aggregator(pipeline_config, intermediate, processed, num_workers=1).run()
+
+    emitted = []
+    while (packet := processed.get()) is not None:
+        emitted.append(packet)
+    assert len(emitted) == 60
+    # E0 is seen at 0, 7, ..., 56; with a window of 3 its last average is (42 + 49 + 56) / 3.
+    assert [p["computed_metric"] for p in emitted if p["entity_name"] == "E0"][-1] == 49.0
@@ -0,0 +1,70 @@
+import gzip
+import json
+
+import numpy as np
+import pytest
+
+from modules.input_module import InputModule, binary_record_dtype
+
+LAYOUT = [
+    {"source_name": "Sensor_ID", "format": "S16"},
+    {"source_name": "Timestamp", "format": "<i8"},
+    {"source_name": "Raw_Value", "format": "<f8"},
+]
+ROWS = [(f"Sensor-{i % 7}", 1000 + i, round(i * 0.37 - 4.5, 6)) for i in range(300)]
+
+
+class _ListQueue:
+    def __init__(self):
+        self.items = []
+
+    def put(self, item):
+        self.items.append(item)
+
+
+def _write(path, driver):
+    names = [field["source_name"] for field in LAYOUT]
+    objects = [dict(zip(names, row)) for row in ROWS]
+    if driver == "csv":
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(",".join(names) + "\n" + "".join(",".join(map(str, row)) + "\n" for row in ROWS))
+    elif driver == "ndjson":
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(obj) + "\n" for obj in objects)
+    elif driver == "ndjson_gzip":
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(obj) + "\n" for obj in objects)
+    elif driver == "json_array":
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(objects, fh, indent=1)
+    else:
+        records = np.array([(name.encode("utf-8"), t, v) for name, t, v in ROWS],
+                           dtype=binary_record_dtype(LAYOUT))
+        records.tofile(path)
+
+
+def _packets(pipeline_config, tmp_path, driver):
+    pipeline_config["dataset_path"] = str(tmp_path / f"data.{driver}")
+    # Small blocks and chunks so the streaming readers cross several boundaries.
+    pipeline_config["input"] = {"driver": driver, "binary_record_layout": LAYOUT,
+                                "binary_chunk_records": 64, "json_block_bytes": 256}
+    _write(pipeline_config["dataset_path"], driver)
+    raw = _ListQueue()
+    InputModule(pipeline_config, raw).run()
+    return raw.items
+
+
+def test_every_driver_yields_the_same_packets(pipeline_config, tmp_path):
+    expected = _packets(pipeline_config, tmp_path, "csv")
+    assert len(expected) == len(ROWS) + 1 and expected[-1] is None
+    assert expected[0]["entity_name"] == "Sensor-0" and expected[0]["time_period"] == 1000
+    for driver in ("ndjson", "ndjson_gzip", "json_array", "binary"):
+        assert _packets(pipeline_config, tmp_path, driver) == expected, driver
+
+
+def test_binary_trailing_bytes_are_rejected(pipeline_config, tmp_path):
+    _packets(pipeline_config, tmp_path, "binary")
+    with open(pipeline_config["dataset_path"], "ab") as fh:
+        fh.write(b"\0" * 5)
+    with pytest.raises(ValueError, match="5 trailing bytes"):
+        InputModule(pipeline_config, _ListQueue()).run()
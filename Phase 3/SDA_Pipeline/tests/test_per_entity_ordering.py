@@ -0,0 +1,52 @@
+import queue
+
+from modules.core_module import ENTITY_SEQUENCE_FIELD, Aggregator
+from modules.input_module import InputModule
+
+
+def _bounded(pipeline_config, tmp_path):
+    pipeline_config["processing"]["stateful_tasks"]["ordering"] = "per_entity"
+    pipeline_config["entity_state"] = {"enabled": True, "max_resident_entities": 1,
+                                       "spill_directory": str(tmp_path / "state")}
+    return pipeline_config
+
+
+def _drain(q):
+    items = []
+    while (item := q.get()) is not None:
+        items.append(item)
+    return items
+
+
+def test_input_sequences_survive_eviction(pipeline_config, tmp_path):
+    config = _bounded(pipeline_config, tmp_path)
+    rows = [f"E{i % 5},{i},{float(i)}" for i in range(40)]
+    with open(config["dataset_path"], "w", encoding="utf-8") as fh:
+        fh.write("Sensor_ID,Timestamp,Raw_Value\n" + "\n".join(rows) + "\n")
+    raw = queue.Queue()
+
+    InputModule(config, raw).run()
+
+    packets = _drain(raw)
+    assert [p[ENTITY_SEQUENCE_FIELD] for p in packets] == [i // 5 for i in range(40)]
+
+
+def test_aggregator_reorders_each_entity_with_one_resident(pipeline_config, tmp_path):
+    config = _bounded(pipeline_config, tmp_path)
+    intermediate, processed = queue.Queue(), queue.Queue()
+    # Each entity's packets arrive newest first, interleaved with the other entities.
+    for entity_sequence in reversed(range(6)):
+        for entity in range(4):
+            intermediate.put({"_sequence": entity_sequence * 4 + entity, "entity_name": f"E{entity}",
+                              ENTITY_SEQUENCE_FIELD: entity_sequence,
+                              "time_period": entity_sequence, "metric_value": float(entity_sequence)})
+    intermediate.put(None)
+
+    Aggregator(config, intermediate, processed, num_workers=1).run()
+
+    emitted = _drain(processed)
+    assert len(emitted) == 24
+    for entity in range(4):
+        mine = [p for p in emitted if p["entity_name"] == f"E{entity}"]
+        assert [p[ENTITY_SEQUENCE_FIELD] for p in mine] == list(range(6))
+        assert mine[-1]["computed_metric"] == 4.0
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pytest
+
+from modules.rollup_store import RollupStore
+
+RESOLUTIONS = [{"seconds": 1, "buckets": 10}, {"seconds": 5, "buckets": 8}]
+
+
+def _store(tmp_path, writable=True, **cfg):
+    return RollupStore({"directory": str(tmp_path / "rollup"), "resolutions": RESOLUTIONS, **cfg},
+                       writable=writable)
+
+
+def _reference(readings, seconds, first, last):
+    """Buckets of first..last built with plain dicts: time -> (min, max, mean, count)."""
+    buckets = {}
+    for timestamp, value in readings:
+        buckets.setdefault(int(timestamp // seconds), []).append(value)
+    return {bucket * seconds: (min(values), max(values), sum(values) / len(values), len(values))
+            for bucket, values in sorted(buckets.items()) if first <= bucket <= last}
+
+
+def _as_dict(result):
+    return {int(t): (lo, hi, mean, int(count)) for t, lo, hi, mean, count in zip(
+        result["time"], result["min"], result["max"], result["mean"], result["count"])}
+
+
+def test_choose_resolution(tmp_path):
+    store = _store(tmp_path)
+    # 8 s fit into 10 one-second buckets, which still reach back to the start.
+    assert store.choose_resolution(100, 108, 10, latest=108) == 1
+    # Too many points for 1 s buckets.
+    assert store.choose_resolution(100, 130, 10, latest=130) == 5
+    # Few enough points, but 1 s buckets only go back 10 s from the newest data.
+    assert store.choose_resolution(100, 105, 10, latest=130) == 5
+    # Nothing fits; the coarsest resolution is the fallback.
+    assert store.choose_resolution(0, 1000, 10, latest=1000) == 5
+
+
+def test_query_across_ring_wrap_around(tmp_path):
+    store = _store(tmp_path)
+    # 1 s ring of 10 slots: times 0..36 lap it more than three times, with gaps and repeats.
+    readings = [(t, float((t * 7) % 11)) for t in range(37) if t % 4 != 3]
+    readings += [(30, -1.0), (34, 50.0)]
+    for timestamp, value in readings:
+        store.add("dev", timestamp, value)
+    store.close()
+
+    reader = _store(tmp_path, writable=False)
+    assert reader.latest_time("dev") == 36
+    # 27..36 are the ten newest buckets; they span the wrap from slot 9 to slot 0.
+    for start, end in [(27, 36), (29, 33), (31, 31), (35, 40)]:
+        result = reader.query("dev", start, end, max_points=10)
+        assert result["resolution"] == 1
+        assert _as_dict(result) == _reference(readings, 1, start, end)
+    # Older buckets are served from the 5 s ring.
+    result = reader.query("dev", 0, 36, max_points=10)
+    assert result["resolution"] == 5
+    assert _as_dict(result) == _reference(readings, 5, 0, 7)
+    assert np.all(np.diff(result["time"]) > 0)
+
+
+def test_late_reading_outside_retention_is_dropped(tmp_path):
+    store = _store(tmp_path)
+    store.add("dev", 25, 1.0)
+    store.add("dev", 5, 9.0)        # Slot 5 of the 1 s ring now belongs to bucket 25.
+    result = store.query("dev", 16, 25, max_points=10)
+    assert _as_dict(result) == {25: (1.0, 1.0, 1.0, 1)}
+    # The 5 s ring (40 s of retention) still takes it.
+    assert _as_dict(store.query("dev", 0, 25, max_points=10)) == {
+        5: (9.0, 9.0, 9.0, 1), 25: (1.0, 1.0, 1.0, 1)}
+
+
+def test_unknown_and_empty_entities(tmp_path):
+    reader = _store(tmp_path, writable=False)
+    assert reader.latest_time("missing") is None
+    result = reader.query("missing", 0, 10)
+    assert len(result["time"]) == 0 and result["count"].dtype == np.int64
+    assert reader.entities() == []
+
+
+def test_open_rings_are_bounded(tmp_path):
+    store = _store(tmp_path, max_open_rings=3)
+    for entity in range(20):
+        store.add(f"dev/{entity}", entity, float(entity))
+        assert len(store._arrays) <= 3
+    store.close()
+    reader = _store(tmp_path, writable=False, max_open_rings=1)
+    assert reader.entities() == sorted(f"dev/{entity}" for entity in range(20))
+    assert [reader.latest_time(f"dev/{entity}") for entity in range(20)] == list(range(20))
+    assert os.path.isfile(tmp_path / "rollup" / "dev%2F3" / "1s.dat")
+
+
+def test_rejects_zero_open_rings(tmp_path):
+    with pytest.raises(ValueError):
+        _store(tmp_path, max_open_rings=0)
@@ -0,0 +1,141 @@
+import json
+import queue
+import random
+import threading
+import time
+
+import pytest
+
+from modules.core_module import Aggregator
+from modules.rule_engine import RuleEngine
+
+DEFINITIONS = [
+    {"name": "v_high", "type": "threshold", "field": "v", "op": ">", "value": 0.5, "for_readings": 3},
+    {"name": "v_low", "type": "threshold", "field": "v", "op": "<=", "value": -0.2, "for_readings": 2},
+    {"name": "w_high", "type": "threshold", "field": "w", "op": ">=", "value": 0.0, "for_readings": 4},
+    {"name": "v_anomaly", "type": "zscore", "field": "v", "alpha": 0.1, "threshold": 2.5, "warmup_readings": 5},
+    {"name": "v_anomaly_fast", "type": "zscore", "field": "v", "alpha": 0.4, "threshold": 2.0, "warmup_readings": 3},
+    {"name": "w_anomaly", "type": "zscore", "field": "w", "alpha": 0.2, "threshold": 2.0, "warmup_readings": 4},
+]
+
+
+def _stream(length=400, entities=4, seed=7):
+    rng = random.Random(seed)
+    packets = []
+    for sequence in range(length):
+        packet = {"_sequence": sequence, "entity_name": f"E{rng.randrange(entities)}", "time_period": sequence}
+        for field in ("v", "w"):
+            if rng.random() < 0.1:
+                continue            # Missing field.
+            value = rng.gauss(0.2, 0.5)
+            packet[field] = value * 12 if rng.random() < 0.03 else value
+        packets.append(packet)
+    return packets
+
+
+def _reference(packets):
+    """Scalar, one reading at a time version of the rules: (sequence, rule) -> detail value."""
+    runs, stats, fired = {}, {}, {}
+    for packet in packets:
+        entity = packet["entity_name"]
+        for rule in DEFINITIONS:
+            value = packet.get(rule["field"])
+            if value is None:
+                continue
+            if rule["type"] == "threshold":
+                key = (entity, rule["name"])
+                holds = {">": value > rule["value"], ">=": value >= rule["value"],
+                         "<": value < rule["value"], "<=": value <= rule["value"]}[rule["op"]]
+                runs[key] = runs.get(key, 0) + 1 if holds else 0
+                if runs[key] == rule["for_readings"]:
+                    fired[(packet["_sequence"], rule["name"])] = runs[key]
+                continue
+            key = (entity, rule["field"], rule["alpha"])
+            mean, square, count = stats.get(key, (value, value ** 2, 0))
+            variance = max(square - mean ** 2, 0.0)
+            z = (value - mean) / variance ** 0.5 if variance > 1e-12 else 0.0
+            if abs(z) > rule["threshold"] and count >= rule["warmup_readings"]:
+                fired[(packet["_sequence"], rule["name"])] = z
+        # EW statistics are shared by rules on the same (field, alpha) and updated once per reading.
+        for key in {(packet["entity_name"], r["field"], r["alpha"]) for r in DEFINITIONS if r["type"] == "zscore"}:
+            value = packet.get(key[1])
+            if value is None:
+                continue
+            alpha = key[2]
+            mean, square, count = stats.get(key, (value, value ** 2, 0))
+            stats[key] = ((1 - alpha) * mean + alpha * value, (1 - alpha) * square + alpha * value ** 2, count + 1)
+    return fired
+
+
+def _evaluate(packets, batch_size, tmp_path):
+    engine = RuleEngine({"definitions": DEFINITIONS}, "entity_name",
+                        {"enabled": False, "spill_directory": str(tmp_path)})
+    alerts = []
+    for start in range(0, len(packets), batch_size):
+        alerts += engine.evaluate(packets[start:start + batch_size])
+    return {(alert["_sequence"], alert["rule"]): alert.get("consecutive_readings", alert.get("z_score"))
+            for alert in alerts}
+
+
+@pytest.mark.parametrize("batch_size", [1, 5, 64, 400])
+def test_matches_scalar_reference(tmp_path, batch_size):
+    packets = _stream()
+    expected = _reference(packets)
+    assert any(rule == "v_anomaly" for _, rule in expected)
+    assert any(rule == "w_high" for _, rule in expected)
+    fired = _evaluate(packets, batch_size, tmp_path)
+    assert fired.keys() == expected.keys()
+    for key, detail in expected.items():
+        assert fired[key] == pytest.approx(detail, rel=1e-6, abs=1e-3)
+
+
+def test_threshold_streak_spans_batches_and_interleaved_entities(tmp_path):
+    engine = RuleEngine({"definitions": DEFINITIONS[:1]}, "entity_name",
+                        {"enabled": False, "spill_directory": str(tmp_path)})
+    readings = [("a", 1.0), ("b", 1.0), ("a", 1.0), ("b", 0.0), ("b", 1.0),
+                ("a", None), ("a", 1.0), ("b", 1.0), ("b", 1.0), ("a", 1.0)]
+    packets = [{"_sequence": sequence, "entity_name": entity, **({} if value is None else {"v": value})}
+               for sequence, (entity, value) in enumerate(readings)]
+    alerts = engine.evaluate(packets[:3]) + engine.evaluate(packets[3:7]) + engine.evaluate(packets[7:])
+    # a: 1, 1, (missing), 1 completes the streak at sequence 6. b restarts at 4 and completes at 8.
+    assert [(alert["entity"], alert["_sequence"]) for alert in alerts] == [("a", 6), ("b", 8)]
+
+
+def test_missing_reading_does_not_poison_zscore(tmp_path):
+    rules = {"definitions": [{"name": "z", "type": "zscore", "field": "v", "alpha": 0.1,
+                              "threshold": 3.0, "warmup_readings": 3}]}
+    results = []
+    for values in ([1, None, 0.9, 1, 1.05, 100], [1, 0.9, 1, 1.05, 100]):
+        engine = RuleEngine(rules, "entity_name", {"enabled": False, "spill_directory": str(tmp_path)})
+        alerts = engine.evaluate([{"entity_name": "a", "v": value} for value in values])
+        results.append([(alert["value"], alert["z_score"]) for alert in alerts])
+    assert results[0] == results[1] and len(results[0]) == 1
+
+
+def test_idle_stream_flushes_open_batch(pipeline_config, tmp_path):
+    alert_path = tmp_path / "alerts.jsonl"
+    pipeline_config["rules"] = {
+        "enabled": True, "batch_size": 64, "max_batch_latency_seconds": 0.05,
+        "alert_path": str(alert_path),
+        "definitions": [{"name": "high", "type": "threshold", "field": "metric_value",
+                         "op": ">", "value": 0.0, "for_readings": 2}],
+    }
+    intermediate, processed = queue.Queue(), queue.Queue()
+    aggregator = Aggregator(pipeline_config, intermediate, processed, num_workers=1)
+    thread = threading.Thread(target=aggregator.run, daemon=True)
+    thread.start()
+    for sequence in range(3):
+        intermediate.put({"_sequence": sequence, "entity_name": "E", "time_period": sequence,
+                          "metric_value": 1.0})
+
+    deadline = time.monotonic() + 5
+    # The sink creates the file before it writes, so wait for a whole line.
+    while not (alert_path.exists() and alert_path.read_text().endswith("\n")) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Alerts arrive while the stream is idle, before end of stream closes the engine.
+    assert thread.is_alive()
+    assert [json.loads(line)["_sequence"] for line in alert_path.read_text().splitlines()] == [1]
+
+    intermediate.put(None)
+    thread.join(5)
+    assert not thread.is_alive()
@@ -0,0 +1,28 @@
+from modules.stream_journal import JournalReader, StreamJournal
+
+FIELDS = [
+    {"field": "_sequence", "format": "<i8"},
+    {"field": "entity_name", "format": "S16"},
+    {"field": "time_period", "format": "<i8"},
+]
+
+
+def _write(directory, names):
+    journal = StreamJournal({"directory": str(directory), "fields": FIELDS, "flush_records": 2})
+    journal.open()
+    for sequence, name in enumerate(names):
+        journal.append({"_sequence": sequence, "entity_name": name, "time_period": sequence})
+    journal.close()
+
+
+def test_long_non_ascii_names_round_trip(tmp_path):
+    # The field holds 16 bytes: "Zürich-東京" takes 14, so the cut falls inside the next 3-byte character.
+    names = ["Zürich-東京東京-Station", "short", "ÄÖÜ" * 10]
+    _write(tmp_path, names)
+
+    replayed = [packet["entity_name"] for packet in JournalReader(str(tmp_path)).iter_packets()]
+
+    assert replayed == ["Zürich-東京", "short", "ÄÖÜ" * 2 + "ÄÖ"]
+    for original, stored in zip(names, replayed):
+        assert original.startswith(stored)
+        assert len(stored.encode("utf-8")) <= 16
@@ -0,0 +1,62 @@
+import copy
+import json
+import multiprocessing as mp
+import queue
+
+from modules.core_module import END_OF_STREAM_FIELD
+from modules.supervisor import Supervisor, TenantDispatcher
+
+
+def test_dispatcher_shares_rounds_by_weight():
+    inputs = [queue.Queue(), queue.Queue()]
+    for tenant, packets in enumerate((120, 120)):
+        for sequence in range(packets):
+            inputs[tenant].put({"_sequence": sequence})
+        inputs[tenant].put(None)
+    work, intermediate = queue.Queue(), [queue.Queue(), queue.Queue()]
+    dispatched = [mp.Value("q", 0), mp.Value("q", 0)]
+    TenantDispatcher(inputs, [2, 1], work, intermediate, dispatched, pool_size=3,
+                     quantum_packets=4, idle_poll_seconds=0).run()
+
+    items = [work.get_nowait() for _ in range(work.qsize())]
+    assert items[-3:] == [None] * 3
+    batches = [(tenant, len(batch)) for tenant, batch in items[:-3]]
+    # While both tenants have a backlog, each round gives the weight 2 tenant twice the packets;
+    # afterwards the other tenant keeps its own quantum per round.
+    assert batches == [(0, 8), (1, 4)] * 15 + [(1, 4)] * 15
+    assert [q.get_nowait() for q in intermediate] == [{END_OF_STREAM_FIELD: 120}, {END_OF_STREAM_FIELD: 120}]
+
+
+def _tenant(pipeline_config, tmp_path, name, rows):
+    config = copy.deepcopy(pipeline_config)
+    config["dataset_path"] = str(tmp_path / f"{name}.csv")
+    config["pipeline_dynamics"]["stream_queue_max_size"] = 16
+    with open(config["dataset_path"], "w", encoding="utf-8") as fh:
+        fh.write("Sensor_ID,Timestamp,Raw_Value\n" + "\n".join(rows) + "\n")
+    return config
+
+
+def test_tenants_run_to_end_of_stream_with_their_own_outputs(pipeline_config, tmp_path, capsys):
+    plain = _tenant(pipeline_config, tmp_path, "plain", [f"P{i % 3},{i},{i}.5" for i in range(150)])
+    # Every reading of this tenant arrives twice.
+    deduped = _tenant(pipeline_config, tmp_path, "deduped",
+                      [f"D{i % 4},{i},1.0" for i in range(40) for _ in range(2)])
+    deduped["processing"]["dedup"] = {"enabled": True, "key_fields": ["entity_name", "time_period"]}
+    broadcast = _tenant(pipeline_config, tmp_path, "broadcast", [f"B{i % 5},{i},2.0" for i in range(90)])
+    broadcast["broadcast"] = {"enabled": True, "subscribers": [
+        {"name": "file", "type": "jsonl_file", "path": str(tmp_path / "broadcast.jsonl")}]}
+
+    supervisor_cfg = {"pool_size": 2, "quantum_packets": 4, "report_interval_seconds": 0, "tenants": [
+        {"name": "plain", "weight": 1}, {"name": "deduped", "weight": 2}, {"name": "broadcast", "weight": 1}]}
+    emitted = Supervisor(supervisor_cfg, [plain, deduped, broadcast], mp.get_context("fork")).run()
+
+    assert emitted == {"plain": 150, "deduped": 40, "broadcast": 90}
+    with open(tmp_path / "broadcast.jsonl", encoding="utf-8") as fh:
+        assert [json.loads(line)["time_period"] for line in fh] == list(range(90))
+    # The last report follows end of stream, so it shows the final counter values.
+    reports = {}
+    for line in capsys.readouterr().out.splitlines():
+        if line.startswith("[Supervisor] ") and "dispatched=" in line:
+            reports[line.split(":")[0]] = [part.strip() for part in line.split(",")]
+    assert "duplicates_suppressed=40" in reports["[Supervisor] deduped"]
+    assert {"supervisor_dropped=0", "file_dropped=0"} <= set(reports["[Supervisor] broadcast"])
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Region names of the shipped data come first; larger region counts add numbered regions.
+REGION_NAMES = ["Africa", "Asia", "Europe", "North America", "Global", "Oceania", "South America"]
+
+
+def generate_panel(countries: int = 266, years: int = 65, missing_ratio: float = 0.15, regions: int = 7,
+                   first_year: int = 1960, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic wide GDP panel in the layout of data/gdp_with_continent_filled.csv: one row per
+    country, one column per year and Continent last. Each country starts from a log-normal
+    level and follows a random walk of yearly growth rates, so rankings, growth and declines
+    all have data to work on. Missing cells are dropped uniformly at random with missing_ratio.
+    """
+    if countries < 1 or years < 1 or regions < 1:
+        raise ValueError("countries, years and regions must be at least 1")
+    if not 0 <= missing_ratio < 1:
+        raise ValueError("missing_ratio must be in [0, 1)")
+
+    rng = np.random.default_rng(seed)
+    start_levels = rng.lognormal(mean=23.0, sigma=2.0, size=(countries, 1))
+    growth = rng.normal(loc=0.03, scale=0.08, size=(countries, years))
+    values = start_levels * np.cumprod(1 + np.clip(growth, -0.9, None), axis=1)
+    values[rng.random((countries, years)) < missing_ratio] = np.nan
+
+    region_names = REGION_NAMES[:regions] + [f"Region {number}" for number in range(len(REGION_NAMES) + 1, regions + 1)]
+    width = len(str(countries))
+    frame = pd.DataFrame({
+        "Country Name": [f"Country {number:0{width}d}" for number in range(1, countries + 1)],
+        "Country Code": [f"C{number:0{width}d}" for number in range(1, countries + 1)],
+        "Indicator Name": "GDP (current US$)",
+        "Indicator Code": "NY.GDP.MKTP.CD",
+    })
+    year_columns = pd.DataFrame(values, columns=[str(first_year + offset) for offset in range(years)])
+    frame = pd.concat([frame, year_columns], axis=1)
+    frame["Continent"] = np.asarray(region_names, dtype=object)[rng.integers(0, regions, size=countries)]
+    return frame
+
+
+def write_panel(frame: pd.DataFrame, path: str | Path) -> Path:
+    """Write a panel as CSV, or for a .json path as a list of records like the shipped JSON twin."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".json":
+        with path.open("w", encoding="utf-8") as file:
+            json.dump(frame.to_dict(orient="records"), file)
+    elif path.suffix.lower() == ".csv":
+        frame.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unsupported panel format: {path.suffix}")
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic wide GDP panel (CSV or JSON).")
+    parser.add_argument("output", help="Output file; .csv or .json")
+    parser.add_argument("--countries", type=int, default=266)
+    parser.add_argument("--years", type=int, default=65)
+    parser.add_argument("--missing-ratio", type=float, default=0.15)
+    parser.add_argument("--regions", type=int, default=7)
+    parser.add_argument("--first-year", type=int, default=1960)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    frame = generate_panel(args.countries, args.years, args.missing_ratio, args.regions, args.first_year, args.seed)
+    path = write_panel(frame, args.output)
+    print(f"[Panel] Wrote {len(frame)} countries x {args.years} years to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_panel import generate_panel, write_panel
+from core.engine import TransformationEngine, normalize_frame
+from main import ENGINE_BACKENDS
+from modules.data_loader import load_dataset
+from modules.data_processor import compute_statistic, filter_dataset
+from plugins.inputs import CSVReader, JSONReader
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class _FrameCapture:
+    """Pipeline service that keeps the loaded frame, so only the reader is timed."""
+
+    def __init__(self):
+        self.frame: pd.DataFrame | None = None
+
+    def execute(self, raw_data: list[dict[str, Any]]) -> None:
+        self.execute_frame(pd.DataFrame(raw_data))
+
+    def execute_frame(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+
+
+class _NullSink:
+    def write(self, records: dict[str, Any]) -> None:
+        pass
+
+
+def measure(step: Callable[[], Any], repeat: int = 3) -> dict[str, float]:
+    """
+    Best and median wall time over `repeat` runs, then one more run under tracemalloc for the
+    peak of Python and NumPy allocations. Tracing slows allocations down, so it never overlaps
+    the timed runs.
+    """
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        step()
+        seconds.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        step()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds_best": min(seconds),
+        "seconds_median": statistics.median(seconds),
+        "peak_mib": peak / 2**20,
+    }
+
+
+def benchmark_panel(panel: dict[str, Any], scenario: dict[str, Any], directory: Path, repeat: int = 3,
+                    backends: list[str] | None = None) -> dict[str, dict[str, float]]:
+    """Time loading, normalizing, every report section, whole reports per backend and the legacy path."""
+    wide = generate_panel(**panel)
+    csv_path = write_panel(wide, directory / "panel.csv")
+    json_path = write_panel(wide, directory / "panel.json")
+    steps: dict[str, Callable[[], Any]] = {}
+
+    def read(reader: type, path: Path) -> pd.DataFrame:
+        capture = _FrameCapture()
+        reader(path=str(path), service=capture).run()
+        return capture.frame
+
+    steps["load.csv_reader"] = lambda: read(CSVReader, csv_path)
+    steps["load.json_reader"] = lambda: read(JSONReader, json_path)
+    frame = read(CSVReader, csv_path)
+    steps["normalize"] = lambda: normalize_frame(frame)
+
+    # Section inputs are built the way TransformationEngine._build_report builds them.
+    engine = TransformationEngine(_NullSink(), scenario)
+    df = normalize_frame(frame)
+    all_regions = str(scenario["region"]).upper() == "ALL"
+    year_df = df[df["Year"] == scenario["year"]]
+    in_range = df[(df["Year"] >= scenario["start_year"]) & (df["Year"] <= scenario["end_year"])]
+    if not all_regions:
+        year_df = year_df[year_df["Region"] == scenario["region"]]
+    range_df = in_range if all_regions else in_range[in_range["Region"] == scenario["region"]]
+    region_year = engine._region_year_totals(in_range)
+
+    steps["section.region_year_totals"] = lambda: engine._region_year_totals(in_range)
+    steps["section.top_10_countries"] = lambda: engine._to_country_value_records(year_df.nlargest(10, "Value"))
+    steps["section.bottom_10_countries"] = lambda: engine._to_country_value_records(year_df.nsmallest(10, "Value"))
+    steps["section.country_growth_rates"] = lambda: engine._country_growth_rates(range_df)
+    steps["section.average_gdp_by_continent"] = lambda: engine._avg_gdp_by_continent(region_year)
+    steps["section.global_gdp_trend"] = lambda: engine._global_gdp_trend(region_year)
+    steps["section.fastest_growing_continent"] = lambda: engine._fastest_growing_continent(region_year)
+    steps["section.consistent_decline"] = lambda: engine._consistent_decline(
+        range_df, scenario["end_year"], scenario["decline_years"]
+    )
+    steps["section.continent_contribution"] = lambda: engine._continent_contribution(region_year)
+
+    for name in backends or list(ENGINE_BACKENDS):
+        backend = ENGINE_BACKENDS[name]
+        steps[f"report.{name}"] = lambda backend=backend: backend(_NullSink(), scenario).execute_frame(frame)
+
+    # The legacy dashboard filters one region, so ALL falls back to the first region name.
+    legacy_region = sorted(df["Region"].unique())[0] if all_regions else scenario["region"]
+    legacy_df = load_dataset(str(csv_path), use_cache=False)
+    legacy_rows = filter_dataset(legacy_df, legacy_region, scenario["year"])
+    steps["legacy.load_dataset"] = lambda: load_dataset(str(csv_path), use_cache=False)
+    steps["legacy.filter_dataset"] = lambda: filter_dataset(legacy_df, legacy_region, scenario["year"])
+    steps["legacy.compute_statistic"] = lambda: compute_statistic(legacy_rows, "average")
+
+    results = {}
+    for name, step in steps.items():
+        results[name] = measure(step, repeat)
+        print(f"[Benchmark] {panel['countries']}x{panel['years']} {name}: {results[name]['seconds_best']:.4f}s, "
+              f"peak {results[name]['peak_mib']:.1f} MiB")
+    return results
+
+
+def default_scenario(panel: dict[str, Any], region: str = "ALL") -> dict[str, Any]:
+    last_year = panel["first_year"] + panel["years"] - 1
+    return {
+        "region": region,
+        "year": max(panel["first_year"], last_year - 5),
+        "start_year": panel["first_year"] + panel["years"] // 2,
+        "end_year": last_year,
+        "decline_years": min(3, max(2, panel["years"] - panel["years"] // 2)),
+    }
+
+
+def _git(*args: str) -> str | None:
+    try:
+        completed = subprocess.run(["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def environment() -> dict[str, Any]:
+    status = _git("status", "--porcelain", "--untracked-files=no", "--", ".")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": None if status is None else bool(status),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Print best times of matching panels and steps against a baseline result file."""
+    baseline_runs = {json.dumps(run["panel"], sort_keys=True): run for run in baseline["runs"]}
+    print(f"[Benchmark] Compared with {str(baseline['environment'].get('commit'))[:10]} "
+          f"({baseline['environment'].get('timestamp')})")
+    for run in current["runs"]:
+        previous = baseline_runs.get(json.dumps(run["panel"], sort_keys=True))
+        if previous is None:
+            continue
+        for name, result in run["steps"].items():
+            if name not in previous["steps"]:
+                continue
+            before = previous["steps"][name]["seconds_best"]
+            after = result["seconds_best"]
+            ratio = after / before if before else float("inf")
+            print(f"  {run['panel']['countries']}x{run['panel']['years']} {name:<36} "
+                  f"{before:9.4f}s -> {after:9.4f}s  x{ratio:.2f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Time GDP loading, normalizing, report sections and backends on synthetic panels.")
+    parser.add_argument("--countries", type=int, nargs="+", default=[266, 2660, 26600],
+                        help="Panel sizes to run, one panel per value")
+    parser.add_argument("--years", type=int, default=65)
+    parser.add_argument("--missing-ratio", type=float, default=0.15)
+    parser.add_argument("--regions", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--region", default="ALL", help="Report region for the section and report steps")
+    parser.add_argument("--backends", nargs="+", choices=sorted(ENGINE_BACKENDS), help="Engine backends to time")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per step")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    result: dict[str, Any] = {"environment": environment(), "runs": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for countries in args.countries:
+            panel = {
+                "countries": countries,
+                "years": args.years,
+                "missing_ratio": args.missing_ratio,
+                "regions": args.regions,
+                "first_year": 1960,
+                "seed": args.seed,
+            }
+            scenario = default_scenario(panel, args.region)
+            steps = benchmark_panel(panel, scenario, Path(directory), args.repeat, args.backends)
+            result["runs"].append({"panel": panel, "scenario": scenario, "steps": steps})
+    if resource is not None:
+        # ru_maxrss is KiB on Linux and bytes on macOS.
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["environment"]["max_rss_mib"] = max_rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = PROJECT_ROOT / "benchmarks" / "results" / f"{(result['environment']['commit'] or 'nogit')[:10]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as file:
+        json.dump(result, file, indent=2)
+    print(f"[Benchmark] Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            compare(result, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
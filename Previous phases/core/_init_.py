@@ -1,4 +1,19 @@
-from .contracts import DataSink, PipelineService
+from .chunked import ChunkedEngine
+from .contracts import ColumnarPipelineService, DataSink, PipelineService, StreamingPipelineService
+from .dense import DenseMatrixEngine
 from .engine import TransformationEngine
+from .incremental import IncrementalEngine, ReportState
+from .panel_index import PanelIndex
 
-__all__ = ["DataSink", "PipelineService", "TransformationEngine"]
+__all__ = [
+    "ChunkedEngine",
+    "ColumnarPipelineService",
+    "DataSink",
+    "DenseMatrixEngine",
+    "IncrementalEngine",
+    "PanelIndex",
+    "PipelineService",
+    "ReportState",
+    "StreamingPipelineService",
+    "TransformationEngine",
+]
\ No newline at end of file
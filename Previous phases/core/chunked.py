@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+
+import pandas as pd
+
+from .contracts import DataSink
+from .engine import TransformationEngine, normalize_frame
+
+# Global row positions are (chunk number, row inside the normalized chunk) packed into one int.
+# They order rows of the same year exactly as the in-memory melt does.
+_CHUNK_STRIDE = 1 << 32
+
+
+class ChunkPartial:
+    """
+    Mergeable summary of a run of input chunks for a list of scenarios.
+
+    It holds the sum and count per (Region, Year) over every row, and per scenario:
+    - bounded top/bottom-K heaps for the report year,
+    - the first and last in-range row of every country,
+    - every row inside the decline window.
+    Only the rows those structures reference are kept. Each one is a real input row,
+    so the in-memory engine builds the same report sections from them as from the full table.
+    """
+
+    def __init__(self, scenarios: list[dict[str, Any]], top_k: int = 10):
+        self.scenarios = scenarios
+        self.top_k = top_k
+        self.region_year = pd.DataFrame(
+            {"Total": pd.Series(dtype=float), "Count": pd.Series(dtype="int64")},
+            index=pd.MultiIndex.from_arrays([[], []], names=["Region", "Year"]),
+        )
+        self.rows = pd.DataFrame(columns=["Country Name", "Region", "Year", "Value"])
+        self.picks: list[dict[str, Any]] = [
+            {"top": [], "bottom": [], "first": {}, "last": {}, "window": set()} for _ in scenarios
+        ]
+
+    @classmethod
+    def from_chunk(cls, chunk: pd.DataFrame, chunk_number: int, scenarios: list[dict[str, Any]],
+                   top_k: int = 10) -> ChunkPartial:
+        partial = cls(scenarios, top_k)
+        df = normalize_frame(chunk).reset_index(drop=True)
+        df.index = df.index + chunk_number * _CHUNK_STRIDE
+        partial.region_year = df.groupby(["Region", "Year"], observed=True).agg(
+            Total=("Value", "sum"), Count=("Value", "size")
+        )
+
+        for settings, picks in zip(scenarios, partial.picks):
+            selected = df if str(settings["region"]).upper() == "ALL" else df[df["Region"] == settings["region"]]
+            report_year = selected[selected["Year"] == int(settings["year"])]
+            picks["top"] = _top(report_year.nlargest(top_k, "Value"), top_k)
+            picks["bottom"] = _bottom(report_year.nsmallest(top_k, "Value"), top_k)
+
+            start_year, end_year = int(settings["start_year"]), int(settings["end_year"])
+            in_range = selected[(selected["Year"] >= start_year) & (selected["Year"] <= end_year)]
+            # A stable sort keeps row order among a country's repeated years, as the engine does.
+            ordered = in_range.sort_values(["Country Name", "Year"], kind="stable")
+            first = ordered.groupby("Country Name", observed=True).head(1)
+            last = ordered.groupby("Country Name", observed=True).tail(1)
+            picks["first"] = dict(zip(first["Country Name"], zip(first["Year"].tolist(), first.index.tolist())))
+            picks["last"] = dict(zip(last["Country Name"], zip(last["Year"].tolist(), last.index.tolist())))
+
+            window_start = end_year - int(settings["decline_years"]) + 1
+            picks["window"] = set(in_range.index[in_range["Year"] >= window_start].tolist())
+
+        partial.rows = df
+        partial._prune()
+        return partial
+
+    def merge(self, other: ChunkPartial) -> ChunkPartial:
+        """Fold in the partial of later chunks; merging must follow chunk order."""
+        self.region_year = (
+            pd.concat([self.region_year, other.region_year]).groupby(level=["Region", "Year"], observed=True).sum()
+        )
+        for picks, more in zip(self.picks, other.picks):
+            picks["top"] = heapq.nlargest(self.top_k, picks["top"] + more["top"])
+            picks["bottom"] = heapq.nlargest(self.top_k, picks["bottom"] + more["bottom"])
+            for country, (year, position) in more["first"].items():
+                current = picks["first"].get(country)
+                if current is None or year < current[0]:
+                    picks["first"][country] = (year, position)
+            for country, (year, position) in more["last"].items():
+                current = picks["last"].get(country)
+                if current is None or year >= current[0]:
+                    picks["last"][country] = (year, position)
+            picks["window"] |= more["window"]
+        self.rows = pd.concat([self.rows, other.rows]) if len(self.rows) else other.rows
+        self._prune()
+        return self
+
+    def reduced_frame(self) -> pd.DataFrame:
+        """The kept rows in input order."""
+        return self.rows.sort_index()
+
+    def region_year_totals(self) -> pd.DataFrame:
+        """The (Region, Year) totals in the layout of TransformationEngine._region_year_totals."""
+        return self.region_year.sort_index().reset_index()
+
+    def _prune(self) -> None:
+        keep: set[int] = set()
+        for picks in self.picks:
+            keep.update(position for _, position in picks["top"])
+            keep.update(position for _, position in picks["bottom"])
+            keep.update(position for _, position in picks["first"].values())
+            keep.update(position for _, position in picks["last"].values())
+            keep |= picks["window"]
+        self.rows = self.rows[self.rows.index.isin(keep)]
+
+
+def _top(frame: pd.DataFrame, top_k: int) -> list[tuple[tuple[float, int], int]]:
+    # Heap keys rank larger values first and, among equal values, earlier rows first (like nlargest).
+    return heapq.nlargest(top_k, [((value, -position), position) for position, value in frame["Value"].items()])
+
+
+def _bottom(frame: pd.DataFrame, top_k: int) -> list[tuple[tuple[float, int], int]]:
+    return heapq.nlargest(top_k, [((-value, -position), position) for position, value in frame["Value"].items()])
+
+
+class ChunkedEngine(TransformationEngine):
+    """
+    Out-of-core engine: streams the input as row blocks, turns each block into a ChunkPartial
+    (on a process pool when workers > 1) and reduces the partials in chunk order. Peak memory
+    follows chunk_rows and the number of countries, not the size of the input.
+    """
+
+    def __init__(self, sink: DataSink, settings: dict[str, Any] | list[dict[str, Any]], workers: int = 1,
+                 chunk_rows: int = 100_000, top_k: int = 10):
+        super().__init__(sink, settings, workers)
+        self.chunk_rows = chunk_rows
+        self.top_k = top_k
+
+    def execute_frame(self, frame: pd.DataFrame) -> None:
+        self.execute_chunks(
+            frame.iloc[start:start + self.chunk_rows] for start in range(0, len(frame), self.chunk_rows)
+        )
+
+    def execute_chunks(self, chunks: Iterable[pd.DataFrame]) -> None:
+        settings_list = self.settings if isinstance(self.settings, list) else [self.settings]
+        partial = self._reduce(chunks, settings_list)
+        reduced = partial.reduced_frame()
+        region_year = partial.region_year_totals()
+        reports = [
+            TransformationEngine(self.sink, settings)._build_report(reduced, region_year)
+            for settings in settings_list
+        ]
+        list(map(self.sink.write, reports))
+
+    def _reduce(self, chunks: Iterable[pd.DataFrame], settings_list: list[dict[str, Any]]) -> ChunkPartial:
+        partial = ChunkPartial(settings_list, self.top_k)
+        if self.workers <= 1:
+            for number, chunk in enumerate(chunks):
+                partial.merge(ChunkPartial.from_chunk(chunk, number, settings_list, self.top_k))
+            return partial
+
+        # Keep a bounded number of chunks in flight so the reader never runs ahead of the pool.
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending: deque = deque()
+            for number, chunk in enumerate(chunks):
+                pending.append(executor.submit(ChunkPartial.from_chunk, chunk, number, settings_list, self.top_k))
+                if len(pending) >= 2 * self.workers:
+                    partial.merge(pending.popleft().result())
+            while pending:
+                partial.merge(pending.popleft().result())
+        return partial
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+_META_FILE = "meta.json"
+_INDEX_FILE = "index.json"
+_FORMAT_VERSION = 1
+
+
+def content_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """
+    Disk cache of already-normalized frames, keyed on the source file's size, mtime and content hash.
+
+    Each entry is a directory with one .npy file per column. String columns are stored as integer
+    codes plus a categories array. Numeric columns and codes are opened with mmap_mode, so a warm
+    load only maps the files instead of parsing the source again. A size/mtime index skips
+    re-hashing unchanged files. A touched but unchanged file still hits the cache through its hash.
+    """
+
+    def __init__(self, directory: str | Path = ".cache", mmap_mode: str | None = "r"):
+        self.directory = Path(directory)
+        self.mmap_mode = mmap_mode
+
+    def load_or_build(self, source: str | Path, variant: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        source = Path(source)
+        key = self._key(source, variant)
+        frame = self._load(key)
+        if frame is None:
+            frame = build()
+            if self._cacheable(frame):
+                self._store(key, frame)
+        return frame
+
+    def _cacheable(self, frame: pd.DataFrame) -> bool:
+        # String columns are stored as codes, which cannot represent missing values.
+        return all(
+            pd.api.types.is_numeric_dtype(frame[name].dtype) or not frame[name].isna().any()
+            for name in frame.columns
+        )
+
+    def _key(self, source: Path, variant: str) -> str:
+        stat = source.stat()
+        index_path = self.directory / _INDEX_FILE
+        index = self._read_index(index_path)
+        entry = index.get(str(source.resolve()))
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            digest = entry["hash"]
+        else:
+            digest = content_hash(source)
+            index[str(source.resolve())] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+            self._write_json(index_path, index)
+        return f"{variant}-{digest}"
+
+    def _read_index(self, index_path: Path) -> dict:
+        if not index_path.exists():
+            return {}
+        try:
+            with index_path.open("r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _write_json(self, path: Path, payload: dict) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(payload, file)
+        os.replace(tmp_name, path)
+
+    def _load(self, key: str) -> pd.DataFrame | None:
+        entry = self.directory / key
+        meta_path = entry / _META_FILE
+        if not meta_path.exists():
+            return None
+        with meta_path.open("r", encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta.get("version") != _FORMAT_VERSION:
+            return None
+
+        columns = {}
+        for position, column in enumerate(meta["columns"]):
+            if column["kind"] == "string":
+                codes = np.load(entry / f"{position}.codes.npy", mmap_mode=self.mmap_mode)
+                categories = np.load(entry / f"{position}.categories.npy").astype(object)
+                columns[column["name"]] = categories[codes]
+            else:
+                columns[column["name"]] = np.load(entry / f"{position}.npy", mmap_mode=self.mmap_mode)
+        return pd.DataFrame(columns, index=pd.RangeIndex(meta["rows"]), copy=False)
+
+    def _store(self, key: str, frame: pd.DataFrame) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.directory, prefix=".staging-"))
+        try:
+            columns = []
+            for position, name in enumerate(frame.columns):
+                series = frame[name]
+                if pd.api.types.is_numeric_dtype(series.dtype):
+                    np.save(staging / f"{position}.npy", series.to_numpy())
+                    columns.append({"name": str(name), "kind": "numeric"})
+                    continue
+                codes, categories = pd.factorize(series.astype(str), sort=False)
+                np.save(staging / f"{position}.codes.npy", codes.astype(np.int32))
+                np.save(staging / f"{position}.categories.npy", np.asarray(categories, dtype=str))
+                columns.append({"name": str(name), "kind": "string"})
+            self._write_json(staging / _META_FILE, {
+                "version": _FORMAT_VERSION,
+                "rows": len(frame),
+                "columns": columns,
+            })
+            target = self.directory / key
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
@@ -1,4 +1,7 @@
-from typing import Any, Protocol, runtime_checkable
+from typing import TYPE_CHECKING, Any, Iterable, Protocol, runtime_checkable
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 @runtime_checkable
 class DataSink(Protocol):
@@ -7,4 +10,14 @@ class DataSink(Protocol):
 @runtime_checkable
 class PipelineService(Protocol):
     def execute(self, raw_data: list[dict[str, Any]]) -> None:
-        ...
\ No newline at end of file
+        ...
+@runtime_checkable
+class ColumnarPipelineService(PipelineService, Protocol):
+    def execute_frame(self, frame: "pd.DataFrame") -> None:
+        ...
+@runtime_checkable
+class StreamingPipelineService(PipelineService, Protocol):
+    chunk_rows: int
+
+    def execute_chunks(self, chunks: Iterable["pd.DataFrame"]) -> None:
+        ...
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .contracts import DataSink
+from .engine import TransformationEngine
+
+
+class DensePanel:
+    """
+    Country x Year matrix (NaN where a value is missing) plus per-row country names and region
+    codes, with years in ascending column order. Rows keep the order of the input. For long
+    input, `positions` holds each cell's row in the long table, which breaks ranking ties the
+    way the long-table engine does.
+    """
+
+    def __init__(self, countries: np.ndarray, regions: list[str], region_codes: np.ndarray,
+                 years: np.ndarray, values: np.ndarray, region_year: pd.DataFrame,
+                 positions: np.ndarray | None = None):
+        self.countries = countries
+        self.regions = regions
+        self.region_codes = region_codes
+        self.years = years
+        self.values = values
+        self.region_year = region_year
+        self.positions = positions
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> DensePanel | None:
+        """Build the panel from wide or long input; None when a country repeats or spans regions."""
+        if "Region" not in df.columns and "Continent" in df.columns:
+            df = df.rename(columns={"Continent": "Region"})
+        if {"Country Name", "Region", "Year", "Value"}.issubset(set(df.columns)):
+            return cls._from_long(df)
+
+        missing = list(filter(lambda column_name: column_name not in df.columns, ["Country Name", "Region"]))
+        if missing:
+            raise ValueError(f"Input data missing required fields: {missing}")
+        df = df.dropna(subset=["Country Name", "Region"])
+        if df["Country Name"].duplicated().any():
+            return None
+
+        year_columns = sorted(filter(lambda column_name: str(column_name).isdigit(), df.columns), key=int)
+        values = np.column_stack(
+            [pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float) for column in year_columns]
+        ) if year_columns else np.empty((len(df), 0))
+        region_codes, regions = pd.factorize(df["Region"], sort=True)
+        years = np.array([int(column) for column in year_columns], dtype=np.int64)
+
+        # The melt lists a year's rows in input order, so a cell's place in its (Region, Year)
+        # group is the number of present cells above it in the same region and column.
+        order = np.argsort(region_codes, kind="stable")
+        present = ~np.isnan(values[order])
+        seen = np.cumsum(present, axis=0)
+        sizes = np.bincount(region_codes, minlength=len(regions))
+        seen_before_region = np.vstack([np.zeros((1, len(years)), dtype=seen.dtype), seen])[np.r_[0, np.cumsum(sizes)[:-1]]]
+        sorted_rows, year_index = np.nonzero(present)
+        sorted_codes = region_codes[order]
+        steps = (seen - 1)[sorted_rows, year_index] - seen_before_region[sorted_codes[sorted_rows], year_index]
+        region_year = _region_year_totals(
+            regions.tolist(), years, sorted_codes[sorted_rows], year_index,
+            values[order[sorted_rows], year_index], steps,
+        )
+        return cls(df["Country Name"].to_numpy(dtype=object), regions.tolist(), region_codes, years, values, region_year)
+
+    @classmethod
+    def _from_long(cls, df: pd.DataFrame) -> DensePanel | None:
+        df = df.dropna(subset=["Country Name", "Region", "Year", "Value"])
+        years = pd.to_numeric(df["Year"], errors="coerce")
+        values = pd.to_numeric(df["Value"], errors="coerce")
+        valid = (years.notna() & values.notna()).to_numpy()
+        df = df[valid]
+        years = years[valid].astype(int).to_numpy()
+        values = values[valid].astype(float).to_numpy()
+
+        country_codes, countries = pd.factorize(df["Country Name"])
+        year_codes, unique_years = pd.factorize(years, sort=True)
+        if pd.Series(country_codes * len(unique_years) + year_codes).duplicated().any():
+            return None
+        if (df.groupby(country_codes)["Region"].nunique() > 1).any():
+            return None
+
+        entry_regions, regions = pd.factorize(df["Region"].to_numpy(), sort=True)
+        first_rows = np.unique(country_codes, return_index=True)[1]
+        matrix = np.full((len(countries), len(unique_years)), np.nan)
+        matrix[country_codes, year_codes] = values
+        positions = np.full(matrix.shape, -1, dtype=np.int64)
+        positions[country_codes, year_codes] = np.arange(len(values))
+        cells = entry_regions * len(unique_years) + year_codes
+        steps = pd.Series(cells).groupby(cells).cumcount().to_numpy()
+        region_year = _region_year_totals(
+            regions.tolist(), np.asarray(unique_years, dtype=np.int64), entry_regions, year_codes, values, steps,
+        )
+        return cls(
+            np.asarray(countries, dtype=object),
+            regions.tolist(),
+            entry_regions[first_rows],
+            np.asarray(unique_years, dtype=np.int64),
+            matrix,
+            region_year,
+            positions,
+        )
+
+
+def _region_year_totals(regions: list[str], years: np.ndarray, region_index: np.ndarray, year_index: np.ndarray,
+                        values: np.ndarray, steps: np.ndarray) -> pd.DataFrame:
+    """
+    Sum and count per (Region, Year) in the layout of TransformationEngine._region_year_totals.
+    `steps` is each value's place inside its group in long-table order. The sums repeat pandas'
+    compensated (Kahan) groupby sum in that order, so they match the long-table totals bit for
+    bit; each step adds one value to every group at once.
+    """
+    width = len(years)
+    cells = region_index * width + year_index
+    total = np.zeros(len(regions) * width)
+    compensation = np.zeros(len(regions) * width)
+    by_step = np.argsort(steps, kind="stable")
+    bounds = np.flatnonzero(np.r_[True, np.diff(steps[by_step]) != 0, True])
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        entries = by_step[start:stop]
+        cell = cells[entries]
+        y = values[entries] - compensation[cell]
+        t = total[cell] + y
+        carry = t - total[cell] - y
+        compensation[cell] = np.where(np.isnan(carry), 0.0, carry)
+        total[cell] = t
+
+    counts = np.bincount(cells, minlength=len(regions) * width)
+    filled = np.flatnonzero(counts)
+    return pd.DataFrame({
+        "Region": [regions[cell // width] for cell in filled],
+        "Year": years[filled % width],
+        "Total": total[filled],
+        "Count": counts[filled],
+    })
+
+
+class DenseMatrixEngine(TransformationEngine):
+    """
+    Backend that answers every section from a DensePanel instead of melting to a long table:
+    argpartition for top/bottom 10, column arithmetic for growth, segment sums for the continent
+    sections and a row-wise diff for declines. Input with repeated countries falls back to the
+    long-table engine.
+    """
+
+    def __init__(self, sink: DataSink, settings: dict[str, Any] | list[dict[str, Any]]):
+        super().__init__(sink, settings)
+
+    def execute_many(self, settings_list: list[dict[str, Any]], frame: pd.DataFrame) -> list[dict[str, Any]]:
+        panel = DensePanel.from_frame(frame)
+        if panel is None:
+            print("[DenseMatrixEngine] Input repeats countries; using the long-table engine")
+            return super().execute_many(settings_list, frame)
+        reports = [self._dense_report(panel, settings) for settings in settings_list]
+        list(map(self.sink.write, reports))
+        return reports
+
+    def _dense_report(self, panel: DensePanel, settings: dict[str, Any]) -> dict[str, Any]:
+        region = settings["region"]
+        single_year = int(settings["year"])
+        start_year = int(settings["start_year"])
+        end_year = int(settings["end_year"])
+        decline_years = int(settings["decline_years"])
+
+        if start_year > end_year:
+            raise ValueError("start_year cannot be greater than end_year")
+        if decline_years < 2:
+            raise ValueError("decline_years must be at least 2")
+
+        if str(region).upper() == "ALL":
+            rows = np.arange(len(panel.countries))
+        elif region in panel.regions:
+            rows = np.flatnonzero(panel.region_codes == panel.regions.index(region))
+        else:
+            rows = np.empty(0, dtype=np.intp)
+
+        in_years = (panel.region_year["Year"] >= start_year) & (panel.region_year["Year"] <= end_year)
+        region_year = panel.region_year[in_years].reset_index(drop=True)
+
+        return {
+            "context": {
+                "region": region,
+                "year": single_year,
+                "start_year": start_year,
+                "end_year": end_year,
+                "decline_years": decline_years,
+            },
+            "top_10_countries": self._dense_ranked(panel, rows, single_year, largest=True),
+            "bottom_10_countries": self._dense_ranked(panel, rows, single_year, largest=False),
+            "country_growth_rates": self._dense_growth(panel, rows, start_year, end_year),
+            "average_gdp_by_continent": self._avg_gdp_by_continent(region_year),
+            "global_gdp_trend": self._global_gdp_trend(region_year),
+            "fastest_growing_continent": self._fastest_growing_continent(region_year),
+            "consistent_decline_countries": self._dense_decline(panel, rows, start_year, end_year, decline_years),
+            "continent_contribution": self._continent_contribution(region_year),
+        }
+
+    def _dense_ranked(self, panel: DensePanel, rows: np.ndarray, year: int, largest: bool,
+                      count: int = 10) -> list[dict[str, Any]]:
+        column = np.flatnonzero(panel.years == year)
+        if len(column) == 0:
+            return []
+        values = panel.values[rows, column[0]]
+        present = np.flatnonzero(~np.isnan(values))
+        if len(present) == 0:
+            return []
+        keys = -values[present] if largest else values[present]
+        k = min(count, len(present))
+        # argpartition finds the k-th key; every row tied with it stays a candidate so that,
+        # like nlargest/nsmallest, ties go to the row the long table lists first.
+        threshold = keys[np.argpartition(keys, k - 1)[k - 1]]
+        candidates = np.flatnonzero(keys <= threshold)
+        order = candidates if panel.positions is None else panel.positions[rows[present[candidates]], column[0]]
+        ranked = candidates[np.lexsort((order, keys[candidates]))][:count]
+        chosen = rows[present[ranked]]
+        return [
+            {"country": country, "gdp": float(value)}
+            for country, value in zip(panel.countries[chosen].tolist(), panel.values[chosen, column[0]])
+        ]
+
+    def _dense_growth(self, panel: DensePanel, rows: np.ndarray, start_year: int, end_year: int) -> list[dict[str, Any]]:
+        low, high = np.searchsorted(panel.years, [start_year, end_year + 1])
+        window = panel.values[rows, low:high]
+        present = ~np.isnan(window)
+        has_values = present.any(axis=1)
+        first = np.argmax(present, axis=1)
+        last = window.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        positions = np.arange(len(rows))
+        start_values = window[positions, first] if window.shape[1] else np.empty(0)
+        end_values = window[positions, last] if window.shape[1] else np.empty(0)
+        keep = np.flatnonzero(has_values & (start_values != 0)) if window.shape[1] else np.empty(0, dtype=np.intp)
+
+        # The long-table engine lists countries by name before sorting by growth.
+        countries = panel.countries[rows[keep]]
+        by_name = np.argsort(countries, kind="stable")
+        start_values, end_values = start_values[keep][by_name], end_values[keep][by_name]
+        growth = ((end_values - start_values) / start_values) * 100
+        growth_rows = [
+            {
+                "country": country,
+                "start_value": float(start_value),
+                "end_value": float(end_value),
+                "growth_rate_pct": float(rate),
+            }
+            for country, start_value, end_value, rate in zip(
+                countries[by_name].tolist(), start_values, end_values, growth
+            )
+        ]
+        return sorted(growth_rows, key=lambda item: item["growth_rate_pct"], reverse=True)
+
+    def _dense_decline(self, panel: DensePanel, rows: np.ndarray, start_year: int, end_year: int,
+                       decline_years: int) -> list[dict[str, Any]]:
+        window_start = end_year - decline_years + 1
+        columns = np.flatnonzero((panel.years >= max(window_start, start_year)) & (panel.years <= end_year))
+        # A decline needs a value in every year of the window, inside the analysis range.
+        if len(columns) != decline_years:
+            return []
+        window = panel.values[rows][:, columns]
+        decreasing = ~np.isnan(window).any(axis=1) & (np.diff(window, axis=1) < 0).all(axis=1)
+        return [{"country": country} for country in sorted(panel.countries[rows[decreasing]].tolist())]
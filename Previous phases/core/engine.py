@@ -1,45 +1,95 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 from .contracts import DataSink
+from .panel_index import PanelIndex
+
+
+# "compact" stores Country Name and Region as category and Year as int16; "compact_float32"
+# also stores Value as float32 (about 7 significant digits, see README for the tolerance).
+DTYPE_MODES = ("default", "compact", "compact_float32")
+
+# execute_many sorts the table into a PanelIndex once it serves this many scenarios. On a 1.46M-row
+# table the sort costs about five scenarios' worth of full-table masks, so fewer scenarios keep the masks.
+PANEL_INDEX_MIN_SCENARIOS = 6
+
+
+def normalize_frame(df: pd.DataFrame, dtypes: str = "default") -> pd.DataFrame:
+    """Turn wide or long GDP input into the clean long table (Country Name, Region, Year, Value)."""
+    if dtypes not in DTYPE_MODES:
+        raise ValueError(f"Unsupported dtypes mode: {dtypes}")
+    if "Region" not in df.columns and "Continent" in df.columns:
+        df = df.rename(columns={"Continent": "Region"})
+    if dtypes != "default":
+        # Converting before the melt keeps the repeated id columns as small integer codes.
+        df = df.astype({name: "category" for name in ("Country Name", "Region") if name in df.columns})
+
+    has_long_shape = {"Country Name", "Region", "Year", "Value"}.issubset(set(df.columns))
+    if not has_long_shape:
+        year_columns = list(filter(lambda column_name: str(column_name).isdigit(), df.columns))
+        required = ["Country Name", "Region"]
+        missing = list(filter(lambda column_name: column_name not in df.columns, required))
+        if missing:
+            raise ValueError(f"Input data missing required fields: {missing}")
+        df = df.melt(id_vars=required, value_vars=year_columns, var_name="Year", value_name="Value")
+
+    df = df.dropna(subset=["Country Name", "Region", "Year", "Value"]).copy()
+    df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
+    df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
+    df = df.dropna(subset=["Year", "Value"]).copy()
+    df["Year"] = df["Year"].astype(np.int16 if dtypes != "default" else int)
+    df["Value"] = df["Value"].astype(np.float32 if dtypes == "compact_float32" else float)
+    return df
 
 
 class TransformationEngine:
-    def __init__(self, sink: DataSink, settings: dict[str, Any]):
+    def __init__(self, sink: DataSink, settings: dict[str, Any] | list[dict[str, Any]], workers: int = 1,
+                 dtypes: str = "default"):
+        if dtypes not in DTYPE_MODES:
+            raise ValueError(f"Unsupported dtypes mode: {dtypes}")
         self.sink = sink
         self.settings = settings
+        self.workers = workers
+        self.dtypes = dtypes
 
     def execute(self, raw_data: list[dict[str, Any]]) -> None:
-        frame = pd.DataFrame(raw_data)
+        self.execute_frame(pd.DataFrame(raw_data))
+
+    def execute_frame(self, frame: pd.DataFrame) -> None:
+        settings_list = self.settings if isinstance(self.settings, list) else [self.settings]
+        self.execute_many(settings_list, frame)
+
+    def execute_many(self, settings_list: list[dict[str, Any]], frame: pd.DataFrame) -> list[dict[str, Any]]:
+        """Normalize once, build one report per scenario and write each to the sink in order."""
         normalized = self._normalize(frame)
-        report = self._build_report(normalized)
-        self.sink.write(report)
+        region_year = self._region_year_totals(normalized)
+        index = PanelIndex(normalized) if len(settings_list) >= PANEL_INDEX_MIN_SCENARIOS else None
+        if self.workers > 1 and len(settings_list) > 1:
+            # Each worker receives the table once through the initializer, not once per scenario.
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(settings_list)),
+                initializer=_init_worker,
+                initargs=(normalized if index is None else None, region_year, index),
+            ) as executor:
+                reports = list(executor.map(_build_in_worker, settings_list))
+        else:
+            reports = [
+                TransformationEngine(self.sink, settings)._build_report(normalized, region_year, index)
+                for settings in settings_list
+            ]
+        list(map(self.sink.write, reports))
+        return reports
 
     def _normalize(self, df: pd.DataFrame) -> pd.DataFrame:
-        if "Region" not in df.columns and "Continent" in df.columns:
-            df = df.rename(columns={"Continent": "Region"})
-
-        has_long_shape = {"Country Name", "Region", "Year", "Value"}.issubset(set(df.columns))
-        if not has_long_shape:
-            year_columns = list(filter(lambda column_name: str(column_name).isdigit(), df.columns))
-            required = ["Country Name", "Region"]
-            missing = list(filter(lambda column_name: column_name not in df.columns, required))
-            if missing:
-                raise ValueError(f"Input data missing required fields: {missing}")
-            df = df.melt(id_vars=required, value_vars=year_columns, var_name="Year", value_name="Value")
-
-        df = df.dropna(subset=["Country Name", "Region", "Year", "Value"]).copy()
-        df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
-        df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
-        df = df.dropna(subset=["Year", "Value"]).copy()
-        df["Year"] = df["Year"].astype(int)
-        df["Value"] = df["Value"].astype(float)
-        return df
-
-    def _build_report(self, df: pd.DataFrame) -> dict[str, Any]:
+        return normalize_frame(df, self.dtypes)
+
+    def _build_report(self, df: pd.DataFrame | None, all_region_year: pd.DataFrame | None = None,
+                      index: PanelIndex | None = None) -> dict[str, Any]:
         region = self.settings["region"]
         single_year = int(self.settings["year"])
         start_year = int(self.settings["start_year"])
@@ -49,20 +99,37 @@ class TransformationEngine:
         if start_year > end_year:
             raise ValueError("start_year cannot be greater than end_year")
 
-        region_filter = df if str(region).upper() == "ALL" else df[df["Region"] == region]
-        year_region_df = region_filter[region_filter["Year"] == single_year]
+        # Shared intermediate layer: one range selection and one Region x Year aggregate feed every section.
+        all_regions = str(region).upper() == "ALL"
+        if index is not None:
+            # Slices of the sorted table, put back in table order so ties rank as with the masks.
+            year_region_df = index.rows(region, single_year, source_order=True)
+            range_df = index.range_rows(region, start_year, end_year, source_order=True)
+        else:
+            year_region_df = df[df["Year"] == single_year]
+            if not all_regions:
+                year_region_df = year_region_df[year_region_df["Region"] == region]
+            in_range = df[(df["Year"] >= start_year) & (df["Year"] <= end_year)]
+            range_df = in_range if all_regions else in_range[in_range["Region"] == region]
+        if all_region_year is None:
+            if index is not None:
+                in_range = range_df if all_regions else index.range_rows("ALL", start_year, end_year, source_order=True)
+            region_year = self._region_year_totals(in_range)
+        else:
+            # Whole (Region, Year) groups fall inside or outside the range, so filtering the
+            # aggregate of the full table gives the same sums as aggregating the range.
+            in_years = (all_region_year["Year"] >= start_year) & (all_region_year["Year"] <= end_year)
+            region_year = all_region_year[in_years].reset_index(drop=True)
 
         top10 = self._to_country_value_records(year_region_df.nlargest(10, "Value"))
         bottom10 = self._to_country_value_records(year_region_df.nsmallest(10, "Value"))
 
-        range_df = region_filter[(region_filter["Year"] >= start_year) & (region_filter["Year"] <= end_year)]
-
         growth_rates = self._country_growth_rates(range_df)
-        avg_by_continent = self._avg_gdp_by_continent(df, start_year, end_year)
-        global_trend = self._global_gdp_trend(df, start_year, end_year)
-        fastest_continent = self._fastest_growing_continent(df, start_year, end_year)
+        avg_by_continent = self._avg_gdp_by_continent(region_year)
+        global_trend = self._global_gdp_trend(region_year)
+        fastest_continent = self._fastest_growing_continent(region_year)
         declining_countries = self._consistent_decline(range_df, end_year, decline_years)
-        continent_contribution = self._continent_contribution(df, start_year, end_year)
+        continent_contribution = self._continent_contribution(region_year)
 
         return {
             "context": {
@@ -99,29 +166,35 @@ class TransformationEngine:
             return []
 
         ordered = frame.sort_values(["Country Name", "Year"])
-        grouped = ordered.groupby("Country Name", as_index=False)
-
-        growth_rows: list[dict[str, Any]] = []
-        for _, group in grouped:
-            start_value = float(group.iloc[0]["Value"])
-            end_value = float(group.iloc[-1]["Value"])
-            if start_value == 0:
-                continue
-            growth_rate = ((end_value - start_value) / start_value) * 100
-            growth_rows.append(
-                {
-                    "country": group.iloc[0]["Country Name"],
-                    "start_value": start_value,
-                    "end_value": end_value,
-                    "growth_rate_pct": float(growth_rate),
-                }
+        endpoints = ordered.groupby("Country Name", observed=True)["Value"].agg(["first", "last"])
+        endpoints = endpoints[endpoints["first"] != 0]
+        start_values = endpoints["first"].to_numpy(dtype=float)
+        end_values = endpoints["last"].to_numpy(dtype=float)
+        growth = ((end_values - start_values) / start_values) * 100
+
+        growth_rows = [
+            {
+                "country": country,
+                "start_value": float(start_value),
+                "end_value": float(end_value),
+                "growth_rate_pct": float(rate),
+            }
+            for country, start_value, end_value, rate in zip(
+                endpoints.index.tolist(), start_values, end_values, growth
             )
-
+        ]
         return sorted(growth_rows, key=lambda item: item["growth_rate_pct"], reverse=True)
 
-    def _avg_gdp_by_continent(self, df: pd.DataFrame, start_year: int, end_year: int) -> list[dict[str, Any]]:
-        in_range = df[(df["Year"] >= start_year) & (df["Year"] <= end_year)]
-        grouped = in_range.groupby("Region", as_index=False)["Value"].mean().reset_index().sort_values("Value", ascending=False)
+    def _region_year_totals(self, in_range: pd.DataFrame) -> pd.DataFrame:
+        """Sum and count of Value per (Region, Year) over the given rows, sorted by both keys."""
+        return in_range.groupby(["Region", "Year"], as_index=False, observed=True).agg(
+            Total=("Value", "sum"), Count=("Value", "size")
+        )
+
+    def _avg_gdp_by_continent(self, region_year: pd.DataFrame) -> list[dict[str, Any]]:
+        totals = region_year.groupby("Region", as_index=False, observed=True)[["Total", "Count"]].sum()
+        totals["Value"] = totals["Total"] / totals["Count"]
+        grouped = totals.sort_values("Value", ascending=False)
         return list(
             map(
                 lambda row: {
@@ -132,9 +205,8 @@ class TransformationEngine:
             )
         )
 
-    def _global_gdp_trend(self, df: pd.DataFrame, start_year: int, end_year: int) -> list[dict[str, Any]]:
-        in_range = df[(df["Year"] >= start_year) & (df["Year"] <= end_year)]
-        grouped = in_range.groupby("Year", as_index=False).agg(Value=("Value", "sum")).sort_values(by="Year")
+    def _global_gdp_trend(self, region_year: pd.DataFrame) -> list[dict[str, Any]]:
+        grouped = region_year.groupby("Year", as_index=False).agg(Value=("Total", "sum")).sort_values(by="Year")
         return list(
             map(
                 lambda row: {
@@ -145,34 +217,26 @@ class TransformationEngine:
             )
         )
 
-    def _fastest_growing_continent(self, df: pd.DataFrame, start_year: int, end_year: int) -> dict[str, Any]:
-        in_range = df[(df["Year"] >= start_year) & (df["Year"] <= end_year)]
-        if in_range.empty:
+    def _fastest_growing_continent(self, region_year: pd.DataFrame) -> dict[str, Any]:
+        if region_year.empty:
             return {}
 
-        grouped = in_range.groupby(["Region", "Year"], as_index=False)["Value"].sum()
-        candidates: list[dict[str, Any]] = []
-
-        for continent in grouped["Region"].unique():
-            continent_rows = grouped[grouped["Region"] == continent].sort_values("Year")
-            start_value = float(continent_rows.iloc[0]["Value"])
-            end_value = float(continent_rows.iloc[-1]["Value"])
-            if start_value == 0:
-                continue
-            growth_rate = ((end_value - start_value) / start_value) * 100
-            candidates.append(
-                {
-                    "continent": continent,
-                    "start_total": start_value,
-                    "end_total": end_value,
-                    "growth_rate_pct": float(growth_rate),
-                }
-            )
-
-        if not candidates:
+        # region_year is sorted by Region then Year, so first/last are the range endpoints.
+        endpoints = region_year.groupby("Region", observed=True)["Total"].agg(["first", "last"])
+        endpoints = endpoints[endpoints["first"] != 0]
+        if endpoints.empty:
             return {}
 
-        return max(candidates, key=lambda item: item["growth_rate_pct"])
+        start_totals = endpoints["first"].to_numpy(dtype=float)
+        end_totals = endpoints["last"].to_numpy(dtype=float)
+        growth = ((end_totals - start_totals) / start_totals) * 100
+        best = int(np.argmax(growth))
+        return {
+            "continent": endpoints.index[best],
+            "start_total": float(start_totals[best]),
+            "end_total": float(end_totals[best]),
+            "growth_rate_pct": float(growth[best]),
+        }
 
     def _consistent_decline(self, range_df: pd.DataFrame, end_year: int, decline_years: int) -> list[dict[str, Any]]:
         if decline_years < 2:
@@ -183,25 +247,37 @@ class TransformationEngine:
         if window_df.empty:
             return []
 
-        records: list[dict[str, Any]] = []
-        grouped = window_df.groupby("Country Name")
-
-        for country, group in grouped:
-            series = group.sort_values("Year")["Value"].tolist()
-            if len(series) != decline_years:
-                continue
-            decreasing = all(map(lambda pair: pair[1] < pair[0], zip(series, series[1:])))
-            if decreasing:
-                records.append({"country": country})
-
-        return records
-
-    def _continent_contribution(self, df: pd.DataFrame, start_year: int, end_year: int) -> list[dict[str, Any]]:
-        in_range = df[(df["Year"] >= start_year) & (df["Year"] <= end_year)]
-        if in_range.empty:
+        # Lay the window out as a countries x years grid; a full row that only ever falls is a decline.
+        codes, countries = pd.factorize(window_df["Country Name"], sort=True)
+        offsets = window_df["Year"].to_numpy() - start_decline_window
+        row_counts = np.bincount(codes, minlength=len(countries))
+        cells = np.zeros((len(countries), decline_years), dtype=np.int64)
+        np.add.at(cells, (codes, offsets), 1)
+        full = (row_counts == decline_years) & (cells == 1).all(axis=1)
+
+        grid = np.full((len(countries), decline_years), np.nan)
+        grid[codes, offsets] = window_df["Value"].to_numpy(dtype=float)
+        decreasing = full & (np.diff(grid, axis=1) < 0).all(axis=1)
+
+        # Countries with repeated years but the right row count keep the row-by-row check.
+        repeated = np.flatnonzero((row_counts == decline_years) & ~full)
+        if len(repeated):
+            decreasing[repeated] = [
+                self._strictly_decreasing(window_df[window_df["Country Name"] == countries[i]])
+                for i in repeated
+            ]
+
+        return [{"country": country} for country in countries[decreasing].tolist()]
+
+    def _strictly_decreasing(self, group: pd.DataFrame) -> bool:
+        series = group.sort_values("Year")["Value"].tolist()
+        return all(map(lambda pair: pair[1] < pair[0], zip(series, series[1:])))
+
+    def _continent_contribution(self, region_year: pd.DataFrame) -> list[dict[str, Any]]:
+        if region_year.empty:
             return []
 
-        continent_totals = in_range.groupby("Region", as_index=False)["Value"].sum()
+        continent_totals = region_year.groupby("Region", as_index=False, observed=True).agg(Value=("Total", "sum"))
         global_total = float(continent_totals["Value"].sum())
         if global_total == 0:
             return []
@@ -220,3 +296,18 @@ class TransformationEngine:
             key=lambda item: item["contribution_pct"],
             reverse=True,
         )
+
+
+# Per-process state for execute_many's process pool.
+_worker_state: dict[str, Any] = {}
+
+
+def _init_worker(normalized: pd.DataFrame | None, region_year: pd.DataFrame, index: PanelIndex | None = None) -> None:
+    _worker_state["normalized"] = normalized
+    _worker_state["region_year"] = region_year
+    _worker_state["index"] = index
+
+
+def _build_in_worker(settings: dict[str, Any]) -> dict[str, Any]:
+    engine = TransformationEngine(sink=None, settings=settings)
+    return engine._build_report(_worker_state["normalized"], _worker_state["region_year"], _worker_state["index"])
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+import pandas as pd
+
+from .contracts import DataSink
+from .engine import TransformationEngine
+
+
+class ReportState:
+    """
+    Mergeable aggregates behind one report, so new rows update it without rescanning history:
+    sum and count per (Region, Year), first/last value in the analysis range per country, the
+    values and decreasing-run length inside the decline window per country, and the rows of
+    the report year. Rows are only ever added; a delta that repeats a (country, year) already
+    merged is rejected, which also stops the same delta file from being applied twice.
+    """
+
+    def __init__(self, settings: dict[str, Any], source_hash: str = ""):
+        self.settings = dict(settings)
+        self.source_hash = source_hash
+        self.deltas: list[str] = []
+        self.region = settings["region"]
+        self.all_regions = str(self.region).upper() == "ALL"
+        self.year = int(settings["year"])
+        self.start_year = int(settings["start_year"])
+        self.end_year = int(settings["end_year"])
+        self.decline_years = int(settings["decline_years"])
+        if self.start_year > self.end_year:
+            raise ValueError("start_year cannot be greater than end_year")
+        if self.decline_years < 2:
+            raise ValueError("decline_years must be at least 2")
+
+        self.seen: set[tuple[str, int]] = set()
+        self.region_year: dict[tuple[str, int], list[float]] = {}    # (Region, Year) -> [Total, Count]
+        self.year_rows: list[tuple[str, float]] = []                  # Report-year rows in arrival order.
+        self.endpoints: dict[str, list[float]] = {}                   # Country -> [first year, value, last year, value]
+        self.windows: dict[str, dict[int, float]] = {}                # Country -> {year: value} in the decline window.
+        self.decline_runs: dict[str, int] = {}                        # Country -> years in its decreasing run to end_year.
+
+    def merge(self, frame: pd.DataFrame) -> None:
+        """Merge normalized rows; time grows with the delta, not with the merged history."""
+        keys = list(zip(frame["Country Name"].tolist(), frame["Year"].tolist()))
+        unique_keys = set(keys)
+        repeated = sorted(unique_keys & self.seen)
+        if len(unique_keys) != len(keys) or repeated:
+            raise ValueError(f"Delta repeats rows already merged: {repeated[:5] or 'duplicates inside the delta'}")
+        self.seen |= unique_keys
+
+        totals = frame.groupby(["Region", "Year"], observed=True).agg(Total=("Value", "sum"), Count=("Value", "size"))
+        for (region, year), total, count in zip(totals.index, totals["Total"], totals["Count"]):
+            entry = self.region_year.setdefault((region, int(year)), [0.0, 0])
+            entry[0] += float(total)
+            entry[1] += int(count)
+
+        selected = frame if self.all_regions else frame[frame["Region"] == self.region]
+        report_year = selected[selected["Year"] == self.year]
+        self.year_rows.extend(zip(report_year["Country Name"].tolist(), report_year["Value"].tolist()))
+
+        in_range = selected[(selected["Year"] >= self.start_year) & (selected["Year"] <= self.end_year)]
+        for country, year, value in zip(in_range["Country Name"].tolist(), in_range["Year"].tolist(), in_range["Value"].tolist()):
+            entry = self.endpoints.get(country)
+            if entry is None:
+                self.endpoints[country] = [year, value, year, value]
+                continue
+            if year < entry[0]:
+                entry[0], entry[1] = year, value
+            if year > entry[2]:
+                entry[2], entry[3] = year, value
+
+        window = in_range[in_range["Year"] > self.end_year - self.decline_years]
+        touched = set()
+        for country, year, value in zip(window["Country Name"].tolist(), window["Year"].tolist(), window["Value"].tolist()):
+            self.windows.setdefault(country, {})[year] = value
+            touched.add(country)
+        for country in touched:
+            self.decline_runs[country] = self._decreasing_run(self.windows[country])
+
+    def _decreasing_run(self, values: dict[int, float]) -> int:
+        """Consecutive years ending at end_year over which the value strictly decreases."""
+        year = self.end_year
+        if year not in values:
+            return 0
+        run = 1
+        while year - 1 in values and values[year - 1] > values[year]:
+            run += 1
+            year -= 1
+        return run
+
+
+class IncrementalEngine(TransformationEngine):
+    """Engine that folds every frame it receives into a ReportState and reports from the state."""
+
+    def __init__(self, sink: DataSink, settings: dict[str, Any], state: ReportState | None = None):
+        super().__init__(sink, settings)
+        self.state = state if state is not None else ReportState(settings)
+
+    def execute_frame(self, frame: pd.DataFrame) -> None:
+        self.apply_delta(frame)
+        self.sink.write(self.report())
+
+    def apply_delta(self, frame: pd.DataFrame) -> None:
+        self.state.merge(self._normalize(frame))
+
+    def report(self) -> dict[str, Any]:
+        state = self.state
+        year_frame = pd.DataFrame(state.year_rows, columns=["Country Name", "Value"])
+        region_year = pd.DataFrame(
+            [
+                (region, year, total, count)
+                for (region, year), (total, count) in sorted(state.region_year.items())
+                if state.start_year <= year <= state.end_year
+            ],
+            columns=["Region", "Year", "Total", "Count"],
+        )
+
+        # Each country contributes its two range endpoints, which is all the growth section reads.
+        endpoint_rows = [
+            row
+            for country, (first_year, first_value, last_year, last_value) in state.endpoints.items()
+            for row in ((country, first_year, first_value), (country, last_year, last_value))
+        ]
+        growth_rates = self._country_growth_rates(pd.DataFrame(endpoint_rows, columns=["Country Name", "Year", "Value"]))
+        declining = sorted(country for country, run in state.decline_runs.items() if run >= state.decline_years)
+
+        return {
+            "context": {
+                "region": state.region,
+                "year": state.year,
+                "start_year": state.start_year,
+                "end_year": state.end_year,
+                "decline_years": state.decline_years,
+            },
+            "top_10_countries": self._to_country_value_records(year_frame.nlargest(10, "Value")),
+            "bottom_10_countries": self._to_country_value_records(year_frame.nsmallest(10, "Value")),
+            "country_growth_rates": growth_rates,
+            "average_gdp_by_continent": self._avg_gdp_by_continent(region_year),
+            "global_gdp_trend": self._global_gdp_trend(region_year),
+            "fastest_growing_continent": self._fastest_growing_continent(region_year),
+            "consistent_decline_countries": [{"country": country} for country in declining],
+            "continent_contribution": self._continent_contribution(region_year),
+        }
+
+
+def report_differences(actual: Any, expected: Any, rel_tol: float = 1e-9, path: str = "report") -> list[str]:
+    """Paths where two reports differ; floats compare with a relative tolerance."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if actual.keys() != expected.keys():
+            return [f"{path}: keys {sorted(actual)} != {sorted(expected)}"]
+        return [
+            difference
+            for key in expected
+            for difference in report_differences(actual[key], expected[key], rel_tol, f"{path}.{key}")
+        ]
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(actual) != len(expected):
+            return [f"{path}: {len(actual)} items != {len(expected)}"]
+        return [
+            difference
+            for position, (left, right) in enumerate(zip(actual, expected))
+            for difference in report_differences(left, right, rel_tol, f"{path}[{position}]")
+        ]
+    if isinstance(expected, float) and isinstance(actual, float):
+        return [] if math.isclose(actual, expected, rel_tol=rel_tol) else [f"{path}: {actual!r} != {expected!r}"]
+    return [] if actual == expected else [f"{path}: {actual!r} != {expected!r}"]
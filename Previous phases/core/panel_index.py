@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+class PanelIndex:
+    """
+    Long GDP table sorted once by (Region, Year), with the row offsets of every (Region, Year)
+    block. A region/year lookup is a dictionary hit plus a slice, and a region over a year
+    range is one contiguous span found by binary search, so queries never rescan the panel.
+    The sort is stable: countries keep their source order inside a block, so slices hold the
+    same rows in the same order as the equivalent boolean mask. Region "ALL" (any case)
+    covers every region. With source_order=True, lookups return rows in the order of the
+    frame the index was built from, exactly as a boolean mask over that frame would.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        region_codes, regions = pd.factorize(frame["Region"], sort=True)
+        years = frame["Year"].to_numpy(dtype=np.int64)
+        # lexsort is stable and sorts by the last key first.
+        order = np.lexsort((years, region_codes))
+
+        self.frame = frame.take(order)
+        # Source position of every sorted row, and the sorted position of every source row.
+        self._order = order
+        self._rank = np.empty_like(order)
+        self._rank[order] = np.arange(len(order))
+        self.regions: list[str] = regions.tolist()
+        self._years = years[order]
+        self._values = self.frame["Value"].to_numpy(dtype=float)
+        self._countries = self.frame["Country Name"].to_numpy(dtype=object)
+
+        sorted_regions = region_codes[order]
+        boundaries = np.flatnonzero(
+            np.r_[True, (sorted_regions[1:] != sorted_regions[:-1]) | (self._years[1:] != self._years[:-1])]
+        )
+        stops = np.r_[boundaries[1:], len(order)]
+        self._blocks: dict[tuple[str, int], tuple[int, int]] = {
+            (self.regions[sorted_regions[start]], int(self._years[start])): (int(start), int(stop))
+            for start, stop in zip(boundaries, stops)
+        }
+        region_starts = np.searchsorted(sorted_regions, np.arange(len(self.regions)), side="left")
+        region_stops = np.searchsorted(sorted_regions, np.arange(len(self.regions)), side="right")
+        self._region_spans: dict[str, tuple[int, int]] = {
+            region: (int(start), int(stop))
+            for region, start, stop in zip(self.regions, region_starts, region_stops)
+        }
+
+    def rows(self, region: str, year: int, source_order: bool = False) -> pd.DataFrame:
+        """Rows of one region (or ALL) in one year, with their original index labels."""
+        return self._rows(self._year_spans(region, int(year)), source_order)
+
+    def range_rows(self, region: str, start_year: int, end_year: int, source_order: bool = False) -> pd.DataFrame:
+        """Rows of one region (or ALL) from start_year to end_year inclusive."""
+        return self._rows(self._range_spans(region, start_year, end_year), source_order)
+
+    def _rows(self, spans: list[tuple[int, int]], source_order: bool) -> pd.DataFrame:
+        if len(spans) == 1 and not source_order:
+            start, stop = spans[0]
+            return self.frame.iloc[start:stop]
+        positions = self._positions(spans)
+        if source_order:
+            positions = self._rank[np.sort(self._order[positions])]
+        return self.frame.iloc[positions]
+
+    def top_n(self, region: str, year: int, n: int = 10, largest: bool = True) -> list[dict[str, Any]]:
+        positions = self._positions(self._year_spans(region, int(year)))
+        values = self._values[positions]
+        # Stable sort keeps source order between equal values, like DataFrame.nlargest.
+        ranked = np.argsort(-values if largest else values, kind="stable")[:n]
+        return [
+            {"country": country, "gdp": float(value)}
+            for country, value in zip(self._countries[positions[ranked]].tolist(), values[ranked])
+        ]
+
+    def total(self, region: str, start_year: int, end_year: int) -> float:
+        return float(sum(self._values[start:stop].sum() for start, stop in self._range_spans(region, start_year, end_year)))
+
+    def average(self, region: str, start_year: int, end_year: int) -> float | None:
+        spans = self._range_spans(region, start_year, end_year)
+        count = sum(stop - start for start, stop in spans)
+        if count == 0:
+            return None
+        return self.total(region, start_year, end_year) / count
+
+    def growth(self, region: str, start_year: int, end_year: int) -> list[dict[str, Any]]:
+        """Per-country growth from its first to its last year in the range, highest first."""
+        positions = self._positions(self._range_spans(region, start_year, end_year))
+        if len(positions) == 0:
+            return []
+        window = pd.DataFrame({
+            "Country Name": self._countries[positions],
+            "Year": self._years[positions],
+            "Value": self._values[positions],
+        }).sort_values(["Country Name", "Year"], kind="stable")
+        endpoints = window.groupby("Country Name", observed=True)["Value"].agg(["first", "last"])
+        endpoints = endpoints[endpoints["first"] != 0]
+        start_values = endpoints["first"].to_numpy(dtype=float)
+        end_values = endpoints["last"].to_numpy(dtype=float)
+        growth = ((end_values - start_values) / start_values) * 100
+        rows = [
+            {
+                "country": country,
+                "start_value": float(start_value),
+                "end_value": float(end_value),
+                "growth_rate_pct": float(rate),
+            }
+            for country, start_value, end_value, rate in zip(
+                endpoints.index.tolist(), start_values, end_values, growth
+            )
+        ]
+        return sorted(rows, key=lambda item: item["growth_rate_pct"], reverse=True)
+
+    def _selected_regions(self, region: str) -> list[str]:
+        if str(region).upper() == "ALL":
+            return self.regions
+        return [region] if region in self._region_spans else []
+
+    def _year_spans(self, region: str, year: int) -> list[tuple[int, int]]:
+        return [self._blocks[(name, year)] for name in self._selected_regions(region) if (name, year) in self._blocks]
+
+    def _range_spans(self, region: str, start_year: int, end_year: int) -> list[tuple[int, int]]:
+        if int(start_year) > int(end_year):
+            raise ValueError("start_year cannot be greater than end_year")
+        spans = []
+        for name in self._selected_regions(region):
+            region_start, region_stop = self._region_spans[name]
+            # Years are sorted inside a region, so the range is one contiguous span.
+            years = self._years[region_start:region_stop]
+            start = region_start + int(np.searchsorted(years, int(start_year), side="left"))
+            stop = region_start + int(np.searchsorted(years, int(end_year), side="right"))
+            if start < stop:
+                spans.append((start, stop))
+        return spans
+
+    def _positions(self, spans: list[tuple[int, int]]) -> np.ndarray:
+        if not spans:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate([np.arange(start, stop) for start, stop in spans])
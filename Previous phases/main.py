@@ -1,21 +1,175 @@
 from __future__ import annotations
 
+import argparse
 import json
+import pickle
+import time
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 from typing import Any
 
+import pandas as pd
+
+from core.chunked import ChunkedEngine
+from core.columnar_cache import ColumnarCache, content_hash
 from core.contracts import DataSink
-from core.engine import TransformationEngine
+from core.dense import DenseMatrixEngine
+from core.engine import TransformationEngine, normalize_frame
+from core.incremental import IncrementalEngine, ReportState, report_differences
 from plugins.inputs import CSVReader, JSONReader
-from plugins.outputs import ConsoleWriter, GraphicsChartWriter
+from plugins.outputs import ConsoleWriter, CSVReportWriter, GraphicsChartWriter, JSONReportWriter
+
+
+FAN_OUT_MODES = ("serial", "thread", "process")
+
+
+def _timed_write(sink: Any, records: dict[str, Any]) -> tuple[str, float, str | None]:
+    started = time.perf_counter()
+    try:
+        sink.write(records)
+    except Exception as error:
+        return "error", time.perf_counter() - started, f"{type(error).__name__}: {error}"
+    return "ok", time.perf_counter() - started, None
 
 
 class MultiSink:
-    def __init__(self, sinks: list[Any]):
+    """
+    Sends each report to every sink. "serial" calls the sinks one after another. "thread" and
+    "process" submit every sink's write to one pool per MultiSink (a worker per sink), so a slow
+    sink no longer holds up the others; timeout_seconds then bounds how long a report waits for
+    them. Each write's time, errors and timeouts accumulate in stats. By default a failing sink
+    stops the run: serial mode re-raises its exception, and the concurrent modes raise once every
+    sink has finished. With isolate_errors, failures are printed and counted instead, and the
+    other sinks still receive the report. A timeout in process mode terminates the pool's workers
+    and the next report starts a fresh pool. A timed-out thread cannot be stopped, so its sink
+    skips reports (counted as timeouts) until that write returns. A chart sink that opens windows
+    needs the main thread, so thread mode rejects it.
+    """
+
+    def __init__(self, sinks: list[Any], names: list[str] | None = None, mode: str = "serial",
+                 timeout_seconds: float | None = None, isolate_errors: bool = False, log_timings: bool = False):
+        if mode not in FAN_OUT_MODES:
+            raise ValueError(f"Unsupported fan-out mode: {mode}")
         self.sinks = sinks
+        self.names = names or [sink.__class__.__name__ for sink in sinks]
+        if mode == "thread":
+            interactive = [
+                name for name, sink in zip(self.names, self.sinks)
+                if isinstance(sink, GraphicsChartWriter) and not sink.headless
+            ]
+            if interactive:
+                raise ValueError(
+                    f"Fan-out mode 'thread' cannot run interactive chart sinks {interactive} off the main "
+                    "thread; set their 'headless' option or use mode 'serial' or 'process'"
+                )
+        self.mode = mode
+        self.timeout_seconds = timeout_seconds
+        self.isolate_errors = isolate_errors
+        self.log_timings = log_timings
+        self.stats: dict[str, dict[str, Any]] = {
+            name: {"writes": 0, "seconds": 0.0, "max_seconds": 0.0, "errors": 0, "timeouts": 0} for name in self.names
+        }
+        self._executor: Executor | None = None
+        self._running: dict[str, Future] = {}
+
+    def _pool(self) -> Executor:
+        # Process pool workers are not daemonic, so a sink may start its own pool (chart workers > 1).
+        if self._executor is None:
+            if self.mode == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=len(self.sinks), thread_name_prefix="MultiSink")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=len(self.sinks))
+        return self._executor
+
+    def _discard_pool(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if self.mode == "process":
+            # Before Python 3.14 ProcessPoolExecutor cannot stop a running task, so stop its workers.
+            if hasattr(executor, "terminate_workers"):
+                executor.terminate_workers()
+                return
+            for process in list((executor._processes or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
 
     def write(self, records: dict[str, Any]) -> None:
-        list(map(lambda sink: sink.write(records), self.sinks))
+        if self.mode == "serial":
+            outcomes = []
+            for name, sink in zip(self.names, self.sinks):
+                started = time.perf_counter()
+                try:
+                    sink.write(records)
+                except Exception as error:
+                    outcomes.append((name, "error", time.perf_counter() - started, f"{type(error).__name__}: {error}"))
+                    if not self.isolate_errors:
+                        self._record(outcomes)
+                        raise
+                    continue
+                outcomes.append((name, "ok", time.perf_counter() - started, None))
+            self._record(outcomes)
+            return
+
+        executor = self._pool()
+        started = time.perf_counter()
+        futures = {
+            name: None if name in self._running and not self._running[name].done()
+            else executor.submit(_timed_write, sink, records)
+            for name, sink in zip(self.names, self.sinks)
+        }
+        deadline = None if self.timeout_seconds is None else started + self.timeout_seconds
+        outcomes = []
+        broken = False
+        for name, future in futures.items():
+            if future is None:
+                outcomes.append((name, "timeout", 0.0, "skipped; its previous write is still running"))
+                continue
+            try:
+                status, seconds, message = future.result(
+                    None if deadline is None else max(deadline - time.perf_counter(), 0)
+                )
+            except FutureTimeoutError:
+                self._running[name] = future
+                broken = broken or self.mode == "process"
+                outcomes.append((name, "timeout", time.perf_counter() - started, f"timed out after {self.timeout_seconds}s"))
+                continue
+            except Exception as error:
+                # The write never ran to completion in a worker, e.g. an unpicklable sink or a crashed process.
+                broken = broken or isinstance(error, BrokenExecutor)
+                outcomes.append((name, "error", time.perf_counter() - started, f"{type(error).__name__}: {error}"))
+                continue
+            self._running.pop(name, None)
+            outcomes.append((name, status, seconds, message))
+        if broken:
+            self._discard_pool()
+            self._running.clear()
+        self._record(outcomes)
+        failures = [f"{name}: {message}" for name, status, _, message in outcomes if status != "ok"]
+        if failures and not self.isolate_errors:
+            raise RuntimeError(f"Output sinks failed: {'; '.join(failures)}")
+
+    def close(self) -> None:
+        """Shut the pool down. Writes still running in thread mode are left to finish on their own."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=self.mode == "process" or not self._running, cancel_futures=True)
+            self._executor = None
+
+    def _record(self, outcomes: list[tuple[str, str, float, str | None]]) -> None:
+        for name, status, seconds, message in outcomes:
+            stats = self.stats[name]
+            stats["writes"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            if status == "error":
+                stats["errors"] += 1
+            elif status == "timeout":
+                stats["timeouts"] += 1
+            if status != "ok" and self.isolate_errors:
+                print(f"[MultiSink] {name} failed after {seconds:.3f}s: {message}")
+        if self.log_timings:
+            print(f"[MultiSink] {', '.join(f'{name}={seconds:.3f}s ({status})' for name, status, seconds, _ in outcomes)}")
 
 
 def _is_data_sink(instance: Any) -> bool:
@@ -30,6 +184,15 @@ INPUT_DRIVERS = {
 OUTPUT_DRIVERS = {
     "console": ConsoleWriter,
     "chart": GraphicsChartWriter,
+    "json": JSONReportWriter,
+    "csv": CSVReportWriter,
+}
+
+# Engine backends selected by config "engine.backend"; the other "engine" keys are passed as options.
+ENGINE_BACKENDS = {
+    "memory": TransformationEngine,
+    "chunked": ChunkedEngine,
+    "dense": DenseMatrixEngine,
 }
 
 
@@ -55,34 +218,165 @@ def _validate_config(config: dict[str, Any]) -> None:
     if invalid_outputs:
         raise ValueError(f"Unsupported output drivers: {invalid_outputs}")
 
+    # "analysis" is one scenario or a list of scenarios run over the same loaded dataset.
+    scenarios = config["analysis"] if isinstance(config["analysis"], list) else [config["analysis"]]
+    if not scenarios:
+        raise ValueError("Analysis list is empty")
     required_analysis = ["region", "year", "start_year", "end_year", "decline_years"]
-    missing_analysis = list(filter(lambda key: key not in config["analysis"], required_analysis))
-    if missing_analysis:
-        raise ValueError(f"Missing analysis fields: {missing_analysis}")
+    for index, scenario in enumerate(scenarios):
+        missing_analysis = list(filter(lambda key: key not in scenario, required_analysis))
+        if missing_analysis:
+            raise ValueError(f"Missing analysis fields in scenario {index}: {missing_analysis}")
+
+
+class _FrameCollector:
+    """Pipeline service that keeps the frames it receives instead of building a report."""
+
+    def __init__(self):
+        self.frames: list[pd.DataFrame] = []
+
+    def execute(self, raw_data: list[dict[str, Any]]) -> None:
+        self.execute_frame(pd.DataFrame(raw_data))
+
+    def execute_frame(self, frame: pd.DataFrame) -> None:
+        self.frames.append(frame)
 
 
-def bootstrap(config_file: str = "config.json") -> None:
+class _ReportCapture:
+    def write(self, records: dict[str, Any]) -> None:
+        self.report = records
+
+
+def _delta_driver(delta_path: Path) -> Any:
+    driver_name = delta_path.suffix.lstrip(".").lower()
+    if driver_name not in INPUT_DRIVERS:
+        raise ValueError(f"Unsupported delta file type: {delta_path.name}")
+    return INPUT_DRIVERS[driver_name]
+
+
+def _read_frame(driver: Any, path: str, cache: ColumnarCache | None = None) -> pd.DataFrame:
+    collector = _FrameCollector()
+    driver(path=path, service=collector, cache=cache).run()
+    return collector.frames[0]
+
+
+def _load_state(state_path: Path) -> ReportState | None:
+    if not state_path.exists():
+        return None
+    with state_path.open("rb") as file:
+        return pickle.load(file)
+
+
+def _save_state(state: ReportState, state_path: Path) -> None:
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = state_path.with_suffix(".tmp")
+    with staging.open("wb") as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+    staging.replace(state_path)
+
+
+def _run_incremental(config: dict[str, Any], project_root: Path, sink: Any, input_driver: Any, input_path: str,
+                     cache: ColumnarCache | None, delta_files: list[str], check: bool) -> None:
+    settings = config["analysis"]
+    if isinstance(settings, list):
+        raise ValueError("Incremental mode needs a single analysis scenario")
+
+    state_path = project_root / config.get("incremental", {}).get("state_path", ".cache/report_state.pkl")
+    source_hash = content_hash(Path(input_path))
+    state = _load_state(state_path)
+    engine = IncrementalEngine(sink=sink, settings=settings, state=state)
+    if state is None or state.source_hash != source_hash or state.settings != settings:
+        print(f"[Incremental] Building report state from {Path(input_path).name}")
+        engine.state = ReportState(settings, source_hash)
+        engine.apply_delta(_read_frame(input_driver, input_path, cache))
+
+    for delta_file in delta_files:
+        delta_path = (Path.cwd() / delta_file).resolve()
+        if not delta_path.exists():
+            raise FileNotFoundError(f"Delta file not found: {delta_path}")
+        engine.apply_delta(_read_frame(_delta_driver(delta_path), str(delta_path)))
+        engine.state.deltas.append(str(delta_path))
+        print(f"[Incremental] Applied {delta_path.name}")
+    _save_state(engine.state, state_path)
+
+    report = engine.report()
+    sink.write(report)
+
+    if check:
+        frames = [_read_frame(input_driver, input_path, cache)]
+        frames += [_read_frame(_delta_driver(Path(path)), path) for path in engine.state.deltas]
+        capture = _ReportCapture()
+        # Sources may arrive wide or already long (from the cache), so normalize each before stacking.
+        full = pd.concat([normalize_frame(frame) for frame in frames], ignore_index=True)
+        TransformationEngine(sink=capture, settings=settings).execute_frame(full)
+        differences = report_differences(report, capture.report)
+        if differences:
+            raise RuntimeError(f"Incremental report differs from a full recompute: {differences[:10]}")
+        print(f"[Incremental] Check passed: report matches a full recompute over source + {len(engine.state.deltas)} delta(s)")
+
+
+def bootstrap(config_file: str = "config.json", delta_files: list[str] | None = None, check: bool = False) -> None:
     project_root = Path(__file__).resolve().parent
     config = _load_config(project_root / config_file)
     _validate_config(config)
 
-    sink_instances = list(map(lambda name: OUTPUT_DRIVERS[name](), config["output"]["drivers"]))
+    # Optional per-driver keyword arguments, e.g. "options": {"chart": {"headless": true}}.
+    driver_options = config["output"].get("options", {})
+    sink_instances = list(
+        map(lambda name: OUTPUT_DRIVERS[name](**driver_options.get(name, {})), config["output"]["drivers"])
+    )
     invalid_sinks = list(filter(lambda item: not _is_data_sink(item), sink_instances))
     if invalid_sinks:
         sink_names = list(map(lambda item: item.__class__.__name__, invalid_sinks))
         raise TypeError(f"Output drivers do not satisfy DataSink protocol: {sink_names}")
 
-    sink = sink_instances[0] if len(sink_instances) == 1 else MultiSink(sink_instances)
+    fan_out = config["output"].get("fan_out", {})
+    sink = (
+        sink_instances[0]
+        if len(sink_instances) == 1
+        else MultiSink(
+            sink_instances,
+            names=config["output"]["drivers"],
+            mode=fan_out.get("mode", "serial"),
+            timeout_seconds=fan_out.get("timeout_seconds"),
+            isolate_errors=bool(fan_out.get("isolate_errors", False)),
+            log_timings=bool(fan_out.get("log_timings", False)),
+        )
+    )
     # dependency injection of the sink into the transformation engine
-    engine = TransformationEngine(sink=sink, settings=config["analysis"])
+    engine_cfg = dict(config.get("engine", {}))
+    backend = engine_cfg.pop("backend", "memory")
+    if backend not in ENGINE_BACKENDS:
+        raise ValueError(f"Unsupported engine backend: {backend}")
+    try:
+        engine = ENGINE_BACKENDS[backend](sink=sink, settings=config["analysis"], **engine_cfg)
+    except TypeError as error:
+        raise ValueError(f"Invalid engine options for backend '{backend}': {error}") from error
 
     input_driver_name = config["input"]["driver"]
     input_driver = INPUT_DRIVERS[input_driver_name]
     input_path = str((project_root / config["input"]["path"]).resolve())
 
-    source = input_driver(path=input_path, service=engine)
-    source.run()
+    cache_cfg = config.get("cache", {})
+    cache = ColumnarCache(project_root / cache_cfg.get("directory", ".cache")) if cache_cfg.get("enabled") else None
+
+    try:
+        if delta_files is not None or check:
+            _run_incremental(config, project_root, sink, input_driver, input_path, cache, delta_files or [], check)
+        else:
+            source = input_driver(path=input_path, service=engine, cache=cache)
+            source.run()
+    finally:
+        if isinstance(sink, MultiSink):
+            sink.close()
 
 
 if __name__ == "__main__":
-    bootstrap()
+    parser = argparse.ArgumentParser(description="GDP analytics pipeline")
+    parser.add_argument("--config", default="config.json", help="Config file relative to the project root")
+    parser.add_argument("--delta", action="append", metavar="FILE",
+                        help="Merge new rows from FILE (csv/json) into the saved report state; repeatable")
+    parser.add_argument("--check", action="store_true",
+                        help="Incremental mode: verify the report against a full recompute")
+    args = parser.parse_args()
+    bootstrap(args.config, args.delta, args.check)
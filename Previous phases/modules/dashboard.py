@@ -1,5 +1,6 @@
 import json
 import os
+from core.panel_index import PanelIndex
 from modules.data_loader import load_dataset
 from modules.data_processor import filter_dataset, compute_statistic
 from modules.visualizer import (
@@ -21,7 +22,9 @@ def run_dashboard():
     data_path = os.path.join(os.path.dirname(__file__), "..", "data", "gdp_with_continent_filled.csv")
     df = load_dataset(data_path)
 
-    filtered = filter_dataset(df, region, year)
+    # One sort of the table serves the region lookup and both all-region chart lookups below.
+    index = PanelIndex(df)
+    filtered = filter_dataset(df, region, year, index)
 
     result = compute_statistic(filtered, operation)
 
@@ -31,7 +34,10 @@ def run_dashboard():
     print("Operation:", operation)
     print("Result:", result)
 
-    region_bar_chart(filtered, region, year)
-    region_pie_chart(filtered, region, year)
-    yearly_histogram(df, year)
-    yearly_scatter(df, year)
\ No newline at end of file
+    # Optional "chart_directory" saves the charts as PNG files instead of opening windows.
+    save_dir = config.get("chart_directory")
+    region_bar_chart(filtered, region, year, save_dir)
+    region_pie_chart(filtered, region, year, save_dir)
+    year_rows = index.rows("ALL", year, source_order=True)
+    yearly_histogram(year_rows, year, save_dir)
+    yearly_scatter(year_rows, year, save_dir)
\ No newline at end of file
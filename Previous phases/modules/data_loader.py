@@ -1,29 +1,52 @@
+import os
+
 import pandas as pd
 
-def load_dataset(path):
-    try:
-        df = pd.read_csv(path)
+from core.columnar_cache import ColumnarCache
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache")
+
+
+def _read_long(path):
+    df = pd.read_csv(path)
+
+    # Remove unused columns
+    df = df.drop(columns=["Country Code", "Indicator Name", "Indicator Code"])
 
-        # Remove unused columns
-        df = df.drop(columns=["Country Code", "Indicator Name", "Indicator Code"])
+    # Rename Continent -> Region (project requirement)
+    df = df.rename(columns={"Continent": "Region"})
 
-        # Rename Continent -> Region (project requirement)
-        df = df.rename(columns={"Continent": "Region"})
+    # Convert wide years into rows
+    df = df.melt(
+        id_vars=["Country Name", "Region"],
+        var_name="Year",
+        value_name="Value"
+    )
 
-        # Convert wide years into rows
-        df = df.melt(
-            id_vars=["Country Name", "Region"],
-            var_name="Year",
-            value_name="Value"
-        )
+    # Clean data
+    df = df.dropna()
 
-        # Clean data
-        df = df.dropna()
+    df["Year"] = df["Year"].astype(int)
+    df["Value"] = df["Value"].astype(float)
 
-        df["Year"] = df["Year"].astype(int)
-        df["Value"] = df["Value"].astype(float)
+    return df
+
+
+def _compact(df):
+
+    # Repeated names become category codes and years fit in int16; values stay float64.
+    return df.astype({"Country Name": "category", "Region": "category", "Year": "int16"})
+
+
+def load_dataset(path, use_cache=False, compact=False):
+    try:
+        if not use_cache:
+            df = _read_long(path)
+        else:
+            # Opt-in: warm runs map the long table cached under <project>/.cache/ instead of parsing the CSV.
+            df = ColumnarCache(CACHE_DIR).load_or_build(path, "legacy-long", lambda: _read_long(path))
 
-        return df
+        return _compact(df) if compact else df
 
     except FileNotFoundError:
         raise Exception("CSV file not found")
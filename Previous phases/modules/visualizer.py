@@ -1,6 +1,21 @@
+import os
+
 import matplotlib.pyplot as plt
 
-def region_bar_chart(filtered_df, region, year):
+
+def _show(save_dir, file_name):
+
+    # With save_dir the figure goes to a PNG file instead of an interactive window.
+    if save_dir is None:
+        plt.show()
+        return
+
+    os.makedirs(save_dir, exist_ok=True)
+    plt.savefig(os.path.join(save_dir, file_name))
+    plt.close()
+
+
+def region_bar_chart(filtered_df, region, year, save_dir=None):
 
     plt.figure()
     plt.bar(filtered_df["Country Name"], filtered_df["Value"], label="GDP")
@@ -10,19 +25,19 @@ def region_bar_chart(filtered_df, region, year):
     plt.legend()
     plt.xticks(rotation=90)
     plt.tight_layout()
-    plt.show()
+    _show(save_dir, f"region_bar_{region}_{year}.png")
 
 
-def region_pie_chart(filtered_df, region, year):
+def region_pie_chart(filtered_df, region, year, save_dir=None):
 
     plt.figure()
     plt.pie(filtered_df["Value"], autopct="%1.1f%%")
     plt.title(f"GDP Distribution of {region} ({year})")
     plt.legend(filtered_df["Country Name"], loc="best", bbox_to_anchor=(1, 0, 0.5, 1))
-    plt.show()
+    _show(save_dir, f"region_pie_{region}_{year}.png")
 
 
-def yearly_histogram(df, year):
+def yearly_histogram(df, year, save_dir=None):
 
     year_df = df[df["Year"] == year]
 
@@ -31,10 +46,10 @@ def yearly_histogram(df, year):
     plt.title(f"GDP Histogram ({year})")
     plt.xlabel("GDP")
     plt.ylabel("Frequency")
-    plt.show()
+    _show(save_dir, f"histogram_{year}.png")
 
 
-def yearly_scatter(df, year):
+def yearly_scatter(df, year, save_dir=None):
 
     year_df = df[df["Year"] == year]
 
@@ -43,4 +58,4 @@ def yearly_scatter(df, year):
     plt.title(f"GDP Scatter Plot ({year})")
     plt.xticks(rotation=90)
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    _show(save_dir, f"scatter_{year}.png")
\ No newline at end of file
@@ -1,38 +1,125 @@
 from __future__ import annotations
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 import pandas as pd
 
 
-from core.contracts import PipelineService
+from core.columnar_cache import ColumnarCache
+from core.contracts import ColumnarPipelineService, PipelineService, StreamingPipelineService
+from core.engine import normalize_frame
 
 
 class CSVReader:
-    def __init__(self, path: str, service: PipelineService):
+    def __init__(self, path: str, service: PipelineService, cache: ColumnarCache | None = None):
         self.path = Path(path)
         self.service = service
+        self.cache = cache
     def run(self) -> None:
         if not self.path.exists():
             raise FileNotFoundError(f"CSV file not found: {self.path}")
-        frame = pd.read_csv(self.path)
-        raw_records = frame.to_dict(orient="records")
-        records: list[dict[str, Any]] = [
-            {str(key): value for key, value in row.items()} for row in raw_records
-        ]
+        if isinstance(self.service, StreamingPipelineService):
+            self.service.execute_chunks(self._read_chunks(self.service.chunk_rows))
+            return
+        if isinstance(self.service, ColumnarPipelineService):
+            self.service.execute_frame(_cached_frame(self.cache, self.path, self._read_frame))
+            return
+        records: list[dict[str, Any]] = self._read_frame().to_dict(orient="records")
         self.service.execute(records)
 
+    def _read_frame(self) -> pd.DataFrame:
+        frame = pd.read_csv(self.path)
+        frame.columns = frame.columns.map(str)
+        return frame
+
+    def _read_chunks(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        with pd.read_csv(self.path, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                chunk.columns = chunk.columns.map(str)
+                yield chunk
+
 class JSONReader:
-    def __init__(self, path: str, service: PipelineService):
+    def __init__(self, path: str, service: PipelineService, cache: ColumnarCache | None = None):
         self.path = Path(path)
         self.service = service
+        self.cache = cache
     def run(self) -> None:
         if not self.path.exists():
             raise FileNotFoundError(f"JSON file not found: {self.path}")
 
+        if isinstance(self.service, StreamingPipelineService):
+            self.service.execute_chunks(self._read_chunks(self.service.chunk_rows))
+            return
+
+        if isinstance(self.service, ColumnarPipelineService):
+            self.service.execute_frame(_cached_frame(self.cache, self.path, self._read_frame))
+            return
+
         with self.path.open("r", encoding="utf-8") as file:
             payload = json.load(file)
+        records = self._records(payload)
+
+        normalized_records: list[dict[str, Any]] = [
+            {str(key): value for key, value in item.items()} for item in records
+        ]
 
+        self.service.execute(normalized_records)
+
+    def _read_frame(self) -> pd.DataFrame:
+        with self.path.open("r", encoding="utf-8") as file:
+            text = file.read()
+        if text.lstrip().startswith("["):
+            return self._array_to_frame(text)
+        return pd.DataFrame.from_records(self._records(json.loads(text)))
+
+    def _read_chunks(self, chunk_rows: int, block_size: int = 1 << 20) -> Iterator[pd.DataFrame]:
+        """Stream a top-level array as frames of chunk_rows records, reading block_size characters at a time."""
+        with self.path.open("r", encoding="utf-8") as file:
+            head = file.read(block_size)
+            if not head.lstrip().startswith("["):
+                # Wrapped payloads ({"records": [...]}) are decoded whole and then split.
+                records = self._records(json.loads(head + file.read()))
+                for start in range(0, len(records), chunk_rows):
+                    yield self._chunk_frame(records[start:start + chunk_rows])
+                return
+
+            decoder = json.JSONDecoder()
+            buffer, position = head, head.index("[") + 1
+            batch: list[dict[str, Any]] = []
+            exhausted = False
+            while True:
+                while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ","):
+                    position += 1
+                if position < len(buffer) and buffer[position] == "]":
+                    break
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # The next object is cut off at the end of the buffer; read another block.
+                    if exhausted:
+                        raise ValueError("JSON input ends before the closing ']'")
+                    block = file.read(block_size)
+                    exhausted = not block
+                    buffer, position = buffer[position:] + block, 0
+                    continue
+                if not isinstance(item, dict):
+                    raise ValueError("JSON records must be a list of objects")
+                batch.append(item)
+                position = end
+                if len(batch) == chunk_rows:
+                    yield self._chunk_frame(batch)
+                    batch = []
+            if batch:
+                yield self._chunk_frame(batch)
+
+    @staticmethod
+    def _chunk_frame(records: list[dict[str, Any]]) -> pd.DataFrame:
+        frame = pd.DataFrame.from_records(records)
+        frame.columns = frame.columns.map(str)
+        return frame
+
+    @staticmethod
+    def _records(payload: Any) -> list[dict[str, Any]]:
         if isinstance(payload, dict) and "records" in payload:
             records = payload["records"]
         elif isinstance(payload, list):
@@ -42,9 +129,41 @@ class JSONReader:
 
         if not isinstance(records, list) or not all(isinstance(item, dict) for item in records):
             raise ValueError("JSON records must be a list of objects")
+        return records
+
+    @staticmethod
+    def _array_to_frame(text: str) -> pd.DataFrame:
+        """Decode a top-level array object by object straight into columns; no record list is kept."""
+        decoder = json.JSONDecoder()
+        columns: dict[str, list[Any]] = {}
+        count = 0
+        position = text.index("[") + 1
+        while True:
+            while position < len(text) and (text[position].isspace() or text[position] == ","):
+                position += 1
+            if position >= len(text):
+                raise ValueError("JSON input ends before the closing ']'")
+            if text[position] == "]":
+                break
+            item, position = decoder.raw_decode(text, position)
+            if not isinstance(item, dict):
+                raise ValueError("JSON records must be a list of objects")
+            for key, value in item.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [None] * count
+                column.append(value)
+            count += 1
+            if len(item) != len(columns):
+                # Pad fields this record did not have.
+                for column in columns.values():
+                    if len(column) < count:
+                        column.append(None)
+        return pd.DataFrame(columns, index=pd.RangeIndex(count))
 
-        normalized_records: list[dict[str, Any]] = [
-            {str(key): value for key, value in item.items()} for item in records
-        ]
 
-        self.service.execute(normalized_records)
\ No newline at end of file
+def _cached_frame(cache: ColumnarCache | None, path: Path, read_frame) -> pd.DataFrame:
+    """Return the source as a frame, or its normalized long table from the cache when one is set."""
+    if cache is None:
+        return read_frame()
+    return cache.load_or_build(path, "normalized", lambda: normalize_frame(read_frame()))
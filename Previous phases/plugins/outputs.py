@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from typing import Any
+import csv
+import json
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
 
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from core.contracts import DataSink
 
@@ -86,97 +93,214 @@ class ConsoleWriter(DataSink):
         )
 
 
-class GraphicsChartWriter(DataSink):
+class JSONReportWriter(DataSink):
+    """Writes each report to <directory>/<region>_<year>_<start>-<end>.json in one buffered write."""
+
+    def __init__(self, directory: str = "reports", indent: int | None = None):
+        self.directory = Path(directory)
+        self.indent = indent
+
     def write(self, records: dict[str, Any]) -> None:
-        self._plot_top_bottom(records)
-        self._plot_country_growth_rates(records)
-        self._plot_global_trend(records)
-        self._plot_average_by_continent(records)
-        self._plot_continent_contribution(records)
-        plt.show()
-
-    def _plot_country_growth_rates(self, records: dict[str, Any]) -> None:
-        rows = records["country_growth_rates"]
-        if not rows:
-            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{_file_stem(records.get('context', {}))}.json"
+        with path.open("w", encoding="utf-8", buffering=1 << 16) as file:
+            json.dump(records, file, indent=self.indent)
 
-        context = records.get("context", {})
-        region = context.get("region", "Selected Region")
-        start_year = context.get("start_year")
-        end_year = context.get("end_year")
-
-        countries = list(map(lambda item: item["country"], rows))
-        growth_rates = list(map(lambda item: item["growth_rate_pct"], rows))
-        colors = list(map(lambda value: "green" if value >= 0 else "red", growth_rates))
-
-        plt.figure(figsize=(12, max(5, len(countries) * 0.25)))
-        plt.barh(countries, growth_rates, color=colors)
-        plt.axvline(0, color="black", linewidth=1)
-        plt.title(f"GDP Growth Rate by Country ({region}, {start_year}-{end_year})")
-        plt.xlabel("Growth Rate (%)")
-        plt.ylabel("Country")
-        plt.tight_layout()
-
-    def _plot_top_bottom(self, records: dict[str, Any]) -> None:
-        top_rows = records["top_10_countries"]
-        bottom_rows = records["bottom_10_countries"]
-
-        fig, axes = plt.subplots(1, 2, figsize=(15, 5))
-        if top_rows:
-            top_countries = list(map(lambda item: item["country"], top_rows))
-            top_values = list(map(lambda item: item["gdp"], top_rows))
-            axes[0].bar(top_countries, top_values)
-            axes[0].set_title("Top 10 Countries by GDP")
-            axes[0].tick_params(axis="x", rotation=75)
-
-        if bottom_rows:
-            bottom_countries = list(map(lambda item: item["country"], bottom_rows))
-            bottom_values = list(map(lambda item: item["gdp"], bottom_rows))
-            axes[1].bar(bottom_countries, bottom_values, color="orange")
-            axes[1].set_title("Bottom 10 Countries by GDP")
-            axes[1].tick_params(axis="x", rotation=75)
-
-        fig.tight_layout()
-
-    def _plot_global_trend(self, records: dict[str, Any]) -> None:
-        trend_rows = records["global_gdp_trend"]
-        if not trend_rows:
-            return
 
-        years = list(map(lambda item: item["year"], trend_rows))
-        values = list(map(lambda item: item["total_gdp"], trend_rows))
+class CSVReportWriter(DataSink):
+    """
+    Writes each report to <directory>/<region>_<year>_<start>-<end>.csv as long rows of
+    section, position, field and value, one row per field of every section item.
+    """
 
-        plt.figure(figsize=(8, 4))
-        plt.plot(years, values, marker="o")
-        plt.title("Total Global GDP Trend")
-        plt.xlabel("Year")
-        plt.ylabel("GDP")
-        plt.tight_layout()
+    def __init__(self, directory: str = "reports"):
+        self.directory = Path(directory)
 
-    def _plot_average_by_continent(self, records: dict[str, Any]) -> None:
-        rows = records["average_gdp_by_continent"]
-        if not rows:
-            return
+    def write(self, records: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{_file_stem(records.get('context', {}))}.csv"
+        with path.open("w", encoding="utf-8", newline="", buffering=1 << 16) as file:
+            writer = csv.writer(file)
+            writer.writerow(["section", "position", "field", "value"])
+            for section, content in records.items():
+                items = content if isinstance(content, list) else [content]
+                writer.writerows(
+                    (section, position, field, value)
+                    for position, item in enumerate(items)
+                    for field, value in item.items()
+                )
 
-        continents = list(map(lambda item: item["continent"], rows))
-        averages = list(map(lambda item: item["average_gdp"], rows))
 
-        plt.figure(figsize=(8, 4))
-        plt.bar(continents, averages)
-        plt.title("Average GDP by Continent")
-        plt.xticks(rotation=45)
-        plt.ylabel("Average GDP")
-        plt.tight_layout()
+class GraphicsChartWriter(DataSink):
+    """
+    Draws the report charts. By default they open in interactive windows. With headless=True
+    each chart is drawn on a bare Agg-backed Figure (no display or pyplot state needed) and
+    saved to directory in every requested format. With workers > 1 the charts are rendered on
+    a process pool. The growth chart keeps only the top and bottom growth_top_n countries, so
+    it stays readable for large panels.
+    """
+
+    def __init__(self, headless: bool = False, directory: str = "charts", formats: list[str] | None = None,
+                 workers: int = 1, growth_top_n: int = 20):
+        self.headless = headless
+        self.directory = Path(directory)
+        self.formats = list(formats or ["png"])
+        self.workers = workers
+        self.growth_top_n = growth_top_n
+        self.timings: list[dict[str, Any]] = []
 
-    def _plot_continent_contribution(self, records: dict[str, Any]) -> None:
-        rows = records["continent_contribution"]
-        if not rows:
+    def write(self, records: dict[str, Any]) -> None:
+        if not self.headless:
+            list(map(lambda draw: draw(records, plt.figure, self.growth_top_n), CHARTS.values()))
+            plt.show()
             return
 
-        continents = list(map(lambda item: item["continent"], rows))
-        percentages = list(map(lambda item: item["contribution_pct"], rows))
-
-        plt.figure(figsize=(7, 7))
-        plt.pie(percentages, labels=continents, autopct="%1.1f%%")
-        plt.title("Contribution of Each Continent to Global GDP")
-        plt.tight_layout()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = str(self.directory / _file_stem(records.get("context", {})))
+        jobs = [(name, records, stem, self.formats, self.growth_top_n) for name in CHARTS]
+        started = time.perf_counter()
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+                self.timings = list(executor.map(_render_chart, *zip(*jobs)))
+        else:
+            self.timings = [_render_chart(*job) for job in jobs]
+        total = time.perf_counter() - started
+
+        for timing in self.timings:
+            if timing["files"]:
+                print(f"[GraphicsChartWriter] {timing['chart']}: {timing['seconds']:.3f}s -> {', '.join(timing['files'])}")
+        print(f"[GraphicsChartWriter] Rendered {len(self.timings)} charts in {total:.3f}s (workers={self.workers})")
+
+
+def _file_stem(context: dict[str, Any]) -> str:
+    region = re.sub(r"[^A-Za-z0-9]+", "_", str(context.get("region", "report"))).strip("_")
+    return f"{region}_{context.get('year')}_{context.get('start_year')}-{context.get('end_year')}"
+
+
+def _render_chart(name: str, records: dict[str, Any], stem: str, formats: list[str], growth_top_n: int) -> dict[str, Any]:
+    started = time.perf_counter()
+    fig = CHARTS[name](records, lambda figsize: Figure(figsize=figsize), growth_top_n)
+    files = []
+    if fig is not None:
+        for extension in formats:
+            path = f"{stem}_{name}.{extension}"
+            fig.savefig(path, format=extension)
+            files.append(path)
+    return {"chart": name, "seconds": time.perf_counter() - started, "files": files}
+
+
+def _draw_top_bottom(records: dict[str, Any], new_figure: Callable[..., Any], growth_top_n: int) -> Any:
+    top_rows = records["top_10_countries"]
+    bottom_rows = records["bottom_10_countries"]
+
+    fig = new_figure(figsize=(15, 5))
+    axes = fig.subplots(1, 2)
+    if top_rows:
+        top_countries = list(map(lambda item: item["country"], top_rows))
+        top_values = list(map(lambda item: item["gdp"], top_rows))
+        axes[0].bar(top_countries, top_values)
+        axes[0].set_title("Top 10 Countries by GDP")
+        axes[0].tick_params(axis="x", rotation=75)
+
+    if bottom_rows:
+        bottom_countries = list(map(lambda item: item["country"], bottom_rows))
+        bottom_values = list(map(lambda item: item["gdp"], bottom_rows))
+        axes[1].bar(bottom_countries, bottom_values, color="orange")
+        axes[1].set_title("Bottom 10 Countries by GDP")
+        axes[1].tick_params(axis="x", rotation=75)
+
+    fig.tight_layout()
+    return fig
+
+
+def _draw_country_growth_rates(records: dict[str, Any], new_figure: Callable[..., Any], growth_top_n: int) -> Any:
+    rows = records["country_growth_rates"]
+    if not rows:
+        return None
+
+    context = records.get("context", {})
+    region = context.get("region", "Selected Region")
+    start_year = context.get("start_year")
+    end_year = context.get("end_year")
+
+    title = f"GDP Growth Rate by Country ({region}, {start_year}-{end_year})"
+    if len(rows) > 2 * growth_top_n:
+        # Rows are sorted by growth, highest first.
+        title += f", top and bottom {growth_top_n} of {len(rows)}"
+        rows = rows[:growth_top_n] + rows[-growth_top_n:]
+
+    countries = list(map(lambda item: item["country"], rows))
+    growth_rates = list(map(lambda item: item["growth_rate_pct"], rows))
+    colors = list(map(lambda value: "green" if value >= 0 else "red", growth_rates))
+
+    fig = new_figure(figsize=(12, max(5, len(countries) * 0.25)))
+    ax = fig.add_subplot()
+    ax.barh(countries, growth_rates, color=colors)
+    ax.axvline(0, color="black", linewidth=1)
+    ax.set_title(title)
+    ax.set_xlabel("Growth Rate (%)")
+    ax.set_ylabel("Country")
+    fig.tight_layout()
+    return fig
+
+
+def _draw_global_trend(records: dict[str, Any], new_figure: Callable[..., Any], growth_top_n: int) -> Any:
+    trend_rows = records["global_gdp_trend"]
+    if not trend_rows:
+        return None
+
+    years = list(map(lambda item: item["year"], trend_rows))
+    values = list(map(lambda item: item["total_gdp"], trend_rows))
+
+    fig = new_figure(figsize=(8, 4))
+    ax = fig.add_subplot()
+    ax.plot(years, values, marker="o")
+    ax.set_title("Total Global GDP Trend")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("GDP")
+    fig.tight_layout()
+    return fig
+
+
+def _draw_average_by_continent(records: dict[str, Any], new_figure: Callable[..., Any], growth_top_n: int) -> Any:
+    rows = records["average_gdp_by_continent"]
+    if not rows:
+        return None
+
+    continents = list(map(lambda item: item["continent"], rows))
+    averages = list(map(lambda item: item["average_gdp"], rows))
+
+    fig = new_figure(figsize=(8, 4))
+    ax = fig.add_subplot()
+    ax.bar(continents, averages)
+    ax.set_title("Average GDP by Continent")
+    ax.tick_params(axis="x", rotation=45)
+    ax.set_ylabel("Average GDP")
+    fig.tight_layout()
+    return fig
+
+
+def _draw_continent_contribution(records: dict[str, Any], new_figure: Callable[..., Any], growth_top_n: int) -> Any:
+    rows = records["continent_contribution"]
+    if not rows:
+        return None
+
+    continents = list(map(lambda item: item["continent"], rows))
+    percentages = list(map(lambda item: item["contribution_pct"], rows))
+
+    fig = new_figure(figsize=(7, 7))
+    ax = fig.add_subplot()
+    ax.pie(percentages, labels=continents, autopct="%1.1f%%")
+    ax.set_title("Contribution of Each Continent to Global GDP")
+    fig.tight_layout()
+    return fig
+
+
+# Chart name (used in file names) -> draw function, in the order the figures are shown.
+CHARTS: dict[str, Callable[..., Any]] = {
+    "top_bottom": _draw_top_bottom,
+    "growth_rates": _draw_country_growth_rates,
+    "global_trend": _draw_global_trend,
+    "average_by_continent": _draw_average_by_continent,
+    "continent_contribution": _draw_continent_contribution,
+}
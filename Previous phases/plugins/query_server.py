@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from core.columnar_cache import ColumnarCache
+from core.engine import normalize_frame
+from core.panel_index import PanelIndex
+from plugins.inputs import CSVReader, JSONReader
+
+QUERY_INPUTS = {
+    "csv": CSVReader,
+    "json": JSONReader,
+}
+
+QUERY_KINDS = ("top", "bottom", "sum", "average", "growth")
+
+
+class QueryService:
+    """
+    Columnar pipeline service that indexes the loaded panel and answers top/bottom-N, sum,
+    average and growth queries. Answers are kept in an LRU cache keyed on the query, so a
+    repeated dashboard query costs one dictionary lookup.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self.index: PanelIndex | None = None
+        self._answer_cached = lru_cache(maxsize=cache_size)(self._answer)
+
+    def execute(self, raw_data: list[dict[str, Any]]) -> None:
+        self.execute_frame(pd.DataFrame(raw_data))
+
+    def execute_frame(self, frame: pd.DataFrame) -> None:
+        self.index = PanelIndex(normalize_frame(frame))
+        self._answer_cached.cache_clear()
+
+    def query(self, kind: str, region: str, year: int | None = None, start_year: int | None = None,
+              end_year: int | None = None, n: int = 10) -> Any:
+        if self.index is None:
+            raise RuntimeError("No dataset loaded")
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Unsupported query: {kind}")
+        if kind in ("top", "bottom"):
+            if year is None:
+                raise ValueError(f"'{kind}' needs year")
+            return self._answer_cached(kind, region, int(year), None, None, int(n))
+        if start_year is None or end_year is None:
+            raise ValueError(f"'{kind}' needs start_year and end_year")
+        return self._answer_cached(kind, region, None, int(start_year), int(end_year), None)
+
+    def cache_info(self) -> dict[str, int]:
+        info = self._answer_cached.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+    def _answer(self, kind: str, region: str, year: int | None, start_year: int | None,
+                end_year: int | None, n: int | None) -> Any:
+        if kind == "top":
+            return self.index.top_n(region, year, n)
+        if kind == "bottom":
+            return self.index.top_n(region, year, n, largest=False)
+        if kind == "sum":
+            return self.index.total(region, start_year, end_year)
+        if kind == "average":
+            return self.index.average(region, start_year, end_year)
+        return self.index.growth(region, start_year, end_year)
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    service: QueryService
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        kind = url.path.strip("/")
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if kind == "cache":
+                self._send(200, self.service.cache_info())
+                return
+            result = self.service.query(
+                kind,
+                params.get("region", "ALL"),
+                year=params.get("year"),
+                start_year=params.get("start_year"),
+                end_year=params.get("end_year"),
+                n=params.get("n", 10),
+            )
+            self._send(200, {"query": kind, **params, "result": result})
+        except ValueError as error:
+            self._send(400, {"error": str(error)})
+
+    def _send(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve(service: QueryService, host: str = "127.0.0.1", port: int = 8765) -> None:
+    handler = type("QueryHandler", (_QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"[QueryServer] Listening on http://{host}:{port} (/top, /bottom, /sum, /average, /growth, /cache)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[QueryServer] Stopped.")
+    finally:
+        server.server_close()
+
+
+def load_service(config_file: str = "config.json", cache_size: int = 1024) -> QueryService:
+    project_root = Path(__file__).resolve().parent.parent
+    with (project_root / config_file).open("r", encoding="utf-8") as file:
+        config = json.load(file)
+    driver = config["input"].get("driver")
+    if driver not in QUERY_INPUTS:
+        raise ValueError(f"Unsupported input driver: {driver}")
+
+    cache_cfg = config.get("cache", {})
+    cache = ColumnarCache(project_root / cache_cfg.get("directory", ".cache")) if cache_cfg.get("enabled") else None
+    service = QueryService(cache_size)
+    input_path = str((project_root / config["input"]["path"]).resolve())
+    QUERY_INPUTS[driver](path=input_path, service=service, cache=cache).run()
+    return service
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Indexed GDP panel queries over HTTP or from the command line.")
+    parser.add_argument("--config", default="config.json", help="Config file relative to the project root")
+    parser.add_argument("--cache-size", type=int, default=1024, help="LRU result cache entries")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    server_args = commands.add_parser("serve", help="Answer queries over HTTP")
+    server_args.add_argument("--host", default="127.0.0.1")
+    server_args.add_argument("--port", type=int, default=8765)
+
+    for kind in QUERY_KINDS:
+        query_args = commands.add_parser(kind, help=f"Run one '{kind}' query")
+        query_args.add_argument("--region", default="ALL")
+        if kind in ("top", "bottom"):
+            query_args.add_argument("--year", type=int, required=True)
+            query_args.add_argument("-n", type=int, default=10)
+        else:
+            query_args.add_argument("--start-year", type=int, required=True)
+            query_args.add_argument("--end-year", type=int, required=True)
+
+    args = parser.parse_args(argv)
+    service = load_service(args.config, args.cache_size)
+    if args.command == "serve":
+        serve(service, args.host, args.port)
+        return
+    try:
+        result = service.query(
+            args.command,
+            args.region,
+            year=getattr(args, "year", None),
+            start_year=getattr(args, "start_year", None),
+            end_year=getattr(args, "end_year", None),
+            n=getattr(args, "n", 10),
+        )
+    except ValueError as error:
+        sys.exit(f"Query error: {error}")
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()